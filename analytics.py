@@ -0,0 +1,264 @@
+"""
+Streaming category analytics over scraped datasets.
+Articles are read incrementally from JSON arrays or JSON Lines files, so the
+analysis runs in constant memory regardless of the dataset size.
+"""
+
+import heapq
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime
+
+from date_index import CZECH_MONTHS
+from keyword_index import article_keyword_tokens
+from serializer import open_text
+
+_MONTH_RE = re.compile(
+    r"\b(" + "|".join(sorted(CZECH_MONTHS, key=len, reverse=True)) + r")\s+(\d{4})",
+    re.IGNORECASE,
+)
+
+_SEPARATOR_RE = re.compile(r"[\s,]*")
+
+# Upper bounds of the content length histogram buckets (characters)
+LENGTH_BUCKETS = [500, 1000, 2000, 3000, 5000, 10000, 20000]
+
+# Keywords counted by the Space-Saving summary (exact below this many)
+MAX_TRACKED_KEYWORDS = 50000
+
+
+def iter_articles(file_path, chunk_size=1 << 20):
+    """Yield articles one by one from a JSON array or JSON Lines file.
+
+    Compressed files (``.gz``, ``.zst``) are decompressed as they are read.
+    """
+    with open_text(file_path) as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if not first:
+            return
+
+        if first != "[":
+            # JSON Lines - one article per line
+            line = first + f.readline()
+            while line:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+                line = f.readline()
+            return
+
+        # JSON array - decode one element at a time from a sliding buffer
+        decoder = json.JSONDecoder()
+        buffer = ""
+        position = 0
+        eof = False
+        while True:
+            position = _SEPARATOR_RE.match(buffer, position).end()
+            if buffer.startswith("]", position):
+                return
+            try:
+                article, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    if buffer[position:].strip():
+                        raise
+                    return
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    eof = True
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield article
+
+
+def extract_month(date_text):
+    """Return 'YYYY-MM' from a Protext date string, or None."""
+    if not date_text:
+        return None
+    match = _MONTH_RE.search(date_text)
+    if not match:
+        return None
+    month = CZECH_MONTHS[match.group(1).lower()]
+    return f"{match.group(2)}-{month:02d}"
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitters counter over a bounded number of items.
+
+    Exact while fewer than ``capacity`` distinct items were seen. After that a
+    new item replaces the least counted one and inherits its count, so every
+    reported count overestimates the true one by at most ``max_error``.
+    """
+
+    def __init__(self, capacity=MAX_TRACKED_KEYWORDS):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.max_error = 0
+        self._heap = []  # (count, item), lazily updated
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, item, count=1):
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+        else:
+            evicted, floor = self._pop_min()
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[item] = floor + count
+            self.errors[item] = floor
+            self.max_error = max(self.max_error, floor)
+        heapq.heappush(self._heap, (counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            # Drop the stale entries left behind by increments
+            self._heap = [(c, i) for i, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item, count
+
+    def most_common(self, n=None):
+        """(item, count) pairs, most counted first."""
+        items = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)
+        return items if n is None else items[:n]
+
+
+class CategoryAggregator:
+    """Single-pass aggregation of category statistics."""
+
+    def __init__(self):
+        self.total_articles = 0
+        self.categories = Counter()
+        self.category_months = {}  # category -> Counter of 'YYYY-MM'
+        self.keywords = SpaceSaving(MAX_TRACKED_KEYWORDS)
+        self.length_histogram = [0] * (len(LENGTH_BUCKETS) + 1)
+        self.length_min = None
+        self.length_max = 0
+        self.length_total = 0
+        self.category_lengths = Counter()
+        self.id_ranges = {}  # category -> [min_id, max_id]
+
+    def add(self, article):
+        """Add one article to all aggregates."""
+        self.total_articles += 1
+        category = article.get("category", "Uncategorized")
+        self.categories[category] += 1
+
+        month = extract_month(article.get("date")) or "unknown"
+        self.category_months.setdefault(category, Counter())[month] += 1
+
+        for keyword in article_keyword_tokens(article):
+            self.keywords.add(keyword)
+
+        length = len(article.get("content") or "")
+        bucket = 0
+        while bucket < len(LENGTH_BUCKETS) and length >= LENGTH_BUCKETS[bucket]:
+            bucket += 1
+        self.length_histogram[bucket] += 1
+        self.length_min = (
+            length if self.length_min is None else min(self.length_min, length)
+        )
+        self.length_max = max(self.length_max, length)
+        self.length_total += length
+        self.category_lengths[category] += length
+
+        article_id = article.get("id")
+        if isinstance(article_id, int):
+            id_range = self.id_ranges.get(category)
+            if id_range is None:
+                self.id_ranges[category] = [article_id, article_id]
+            else:
+                id_range[0] = min(id_range[0], article_id)
+                id_range[1] = max(id_range[1], article_id)
+
+    def add_articles(self, articles):
+        """Add an iterable of articles, returns self for chaining."""
+        for article in articles:
+            self.add(article)
+        return self
+
+    def sorted_categories(self):
+        """Categories sorted by count (descending) as (category, count) tuples."""
+        return sorted(self.categories.items(), key=lambda x: x[1], reverse=True)
+
+    def to_dict(self, top_keywords=100):
+        """Serializable summary of all aggregates."""
+        labels = []
+        lower = 0
+        for upper in LENGTH_BUCKETS:
+            labels.append(f"{lower}-{upper - 1}")
+            lower = upper
+        labels.append(f"{lower}+")
+
+        return {
+            "total_articles": self.total_articles,
+            "total_categories": len(self.categories),
+            "categories": dict(self.sorted_categories()),
+            "category_months": {
+                category: dict(sorted(months.items()))
+                for category, months in self.category_months.items()
+            },
+            "category_id_ranges": {
+                category: {"min_id": r[0], "max_id": r[1]}
+                for category, r in self.id_ranges.items()
+            },
+            "content_length": {
+                "min": self.length_min or 0,
+                "max": self.length_max,
+                "mean": (
+                    round(self.length_total / self.total_articles, 1)
+                    if self.total_articles
+                    else 0
+                ),
+                "histogram": dict(zip(labels, self.length_histogram)),
+                "mean_by_category": {
+                    category: round(self.category_lengths[category] / count, 1)
+                    for category, count in self.categories.items()
+                },
+            },
+            "top_keywords": dict(self.keywords.most_common(top_keywords)),
+            # Counts above are exact when this is 0, otherwise each may be
+            # overcounted by up to this much (Space-Saving bound)
+            "top_keywords_max_error": self.keywords.max_error,
+        }
+
+
+def aggregate_file(file_path):
+    """Stream a dataset file through a CategoryAggregator."""
+    return CategoryAggregator().add_articles(iter_articles(file_path))
+
+
+def save_analysis_to_json(aggregator, output_dir, source_file=None):
+    """Save the full analysis to a single JSON file."""
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        analysis_file = os.path.join(output_dir, f"analysis_{timestamp}.json")
+
+        analysis_data = {"analysis_date": datetime.now().isoformat()}
+        if source_file:
+            analysis_data["source_file"] = os.path.basename(source_file)
+        analysis_data.update(aggregator.to_dict())
+
+        with open(analysis_file, "w", encoding="utf-8") as f:
+            json.dump(analysis_data, f, ensure_ascii=False, indent=2)
+
+        print(f"Analysis saved to: {analysis_file}")
+        return analysis_file
+
+    except Exception as e:
+        print(f"Error saving analysis: {e}")
+        return None
@@ -0,0 +1,147 @@
+"""
+Compact article record.
+Articles used to be plain dicts, each carrying a hash table with a dozen keys.
+Article stores the known fields in ``__slots__`` (unknown fields go to a
+small overflow dict), interns repetitive strings such as categories,
+locations, dates and keyword tokens, and can defer loading its content until
+it is first read. It implements the mutable mapping protocol, so code written
+for dicts (``article["id"]``, ``article.get(...)``, ``dict(article)``) keeps
+working; absent fields behave like missing keys. Setting any field to None
+removes it.
+"""
+
+import sys
+from collections.abc import MutableMapping
+
+from serializer import dumps, loads
+
+# Field order of serialized records
+FIELDS = (
+    "id",
+    "title",
+    "content",
+    "link",
+    "date",
+    "published",
+    "location",
+    "keywords",
+    "keyword_tokens",
+    "category",
+    "content_hash",
+    "extractor_version",
+    "revision",
+)
+_FIELD_SET = frozenset(FIELDS)
+
+# Values repeated across many articles share one string object
+INTERNED_FIELDS = frozenset(
+    ("category", "location", "published", "extractor_version")
+)
+
+
+class Article(MutableMapping):
+    """Slotted, dict-compatible article record."""
+
+    __slots__ = FIELDS + ("_extra", "_content_loader")
+
+    def __init__(self, fields=None, content_loader=None, **kwargs):
+        for name in FIELDS:
+            setattr(self, name, None)
+        self._extra = None
+        # Called with the article ID when content is first read
+        self._content_loader = content_loader
+        if fields:
+            self.update(fields)
+        if kwargs:
+            self.update(kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(data)
+
+    @classmethod
+    def from_json(cls, text):
+        """Article from one serialized record (str or bytes)."""
+        return cls(loads(text))
+
+    def _value(self, key):
+        if key == "content" and self.content is None and self._content_loader:
+            self.content = self._content_loader(self.id)
+            self._content_loader = None
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        return self._extra.get(key) if self._extra else None
+
+    def __getitem__(self, key):
+        value = self._value(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in INTERNED_FIELDS and isinstance(value, str):
+            value = sys.intern(value)
+        elif key == "keyword_tokens" and value is not None:
+            value = [sys.intern(token) for token in value]
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+            if key == "content":
+                self._content_loader = None
+        elif value is None:
+            # None means absent, as for the slotted fields
+            if self._extra:
+                self._extra.pop(key, None)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if self._value(key) is None:
+            raise KeyError(key)
+        if key in _FIELD_SET:
+            setattr(self, key, None)
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        for name in FIELDS:
+            if name == "content" and self._content_loader and self.content is None:
+                yield name
+            elif getattr(self, name) is not None:
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return self._value(key) is not None
+
+    def __repr__(self):
+        return f"Article(id={self.id!r}, title={self.title!r})"
+
+    def __reduce__(self):
+        # Content loaders do not cross process boundaries
+        return (Article, (self.to_dict(),))
+
+    def to_dict(self):
+        return {key: self._value(key) for key in self}
+
+    def to_json(self):
+        """Compact JSON record with the fields in schema order."""
+        return dumps(self.to_dict()).decode("utf-8")
+
+
+def dump_jsonl(articles, f):
+    """Write articles (Article or dict) to a text file, one record per line."""
+    for article in articles:
+        f.write(Article.from_dict(article).to_json() + "\n")
+
+
+def iter_jsonl(f):
+    """Yield Article records from a JSON Lines text file."""
+    for line in f:
+        if line.strip():
+            yield Article.from_json(line)
@@ -0,0 +1,314 @@
+"""
+Memory-mapped article store with random access by ID.
+A store is two files next to the dataset: ``<name>.store.jsonl`` holds one
+compact JSON record per line and is only ever appended to, and
+``<name>.store.idx`` holds fixed-width (ID, offset, length) entries - a
+sorted section followed by the entries appended since the last compaction.
+Both are read through mmap, so opening a store is instant and a lookup by ID
+or ID range binary-searches the index and decodes only the records it
+returns. An updated article is appended again with a new index entry that
+overrides the older one. Each flush only appends its entries; the index is
+rewritten sorted once the appended part outgrows a fraction of it.
+"""
+
+import mmap
+import os
+import struct
+
+from article import Article
+from serializer import dataset_stem, dumps, loads
+
+DATA_SUFFIX = ".store.jsonl"
+INDEX_SUFFIX = ".store.idx"
+INDEX_MAGIC = b"PTXIDX2\0"
+INDEX_MAGIC_V1 = b"PTXIDX1\0"  # sorted entries only, read-only support
+# number of entries in the sorted section
+INDEX_HEADER = struct.Struct("<Q")
+# article ID, byte offset in the data file, record length
+INDEX_ENTRY = struct.Struct("<IQI")
+# Appended entries allowed before the index is rewritten sorted: this many,
+# or this fraction of the sorted section if that is larger
+COMPACT_MIN_ENTRIES = 4096
+COMPACT_RATIO = 0.25
+
+
+def store_stem(file_path):
+    """Store path prefix for a dataset file (``content_X.json`` -> ``content_X``)."""
+    return dataset_stem(file_path)
+
+
+def _map(path):
+    """Read-only mmap of a file, or None if it is missing or empty."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+
+class ArticleStore:
+    """Read-only view of a store; lookups decode only the requested records.
+
+    The appended index entries are read into a dict on open, the sorted
+    section is binary-searched in place.
+    """
+
+    def __init__(self, stem):
+        self.stem = stem
+        self._data = _map(stem + DATA_SUFFIX)
+        self._index = _map(stem + INDEX_SUFFIX)
+        self._start = 0
+        self._sorted = 0  # entries in the sorted section
+        self._appended = {}  # article ID -> (offset, length), newest wins
+        self._count = 0
+        if self._index is None:
+            return
+        magic = self._index[: len(INDEX_MAGIC)]
+        entries = len(self._index) - len(INDEX_MAGIC)
+        if magic == INDEX_MAGIC:
+            self._start = len(INDEX_MAGIC) + INDEX_HEADER.size
+            (self._sorted,) = INDEX_HEADER.unpack_from(self._index, len(INDEX_MAGIC))
+            entries = (len(self._index) - self._start) // INDEX_ENTRY.size
+        elif magic == INDEX_MAGIC_V1:
+            self._start = len(INDEX_MAGIC)
+            entries = self._sorted = entries // INDEX_ENTRY.size
+        else:
+            self.close()
+            raise ValueError(f"Not an article store index: {stem + INDEX_SUFFIX}")
+        # A partly written trailing entry is ignored
+        for position in range(self._sorted, entries):
+            article_id, offset, length = self._entry(position)
+            self._appended[article_id] = (offset, length)
+        self._count = self._sorted + sum(
+            1 for article_id in self._appended if not self._in_sorted(article_id)
+        )
+
+    @classmethod
+    def for_dataset(cls, file_path):
+        """Open the store kept next to a dataset, or None if there is none."""
+        stem = store_stem(file_path)
+        if not os.path.exists(stem + INDEX_SUFFIX):
+            return None
+        return cls(stem)
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for mapped in (self._data, self._index):
+            if mapped is not None:
+                mapped.close()
+        self._data = self._index = None
+        self._sorted = self._count = 0
+        self._appended = {}
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(
+            self._index, self._start + position * INDEX_ENTRY.size
+        )
+
+    def _lower_bound(self, article_id):
+        """Position of the first sorted entry with an ID >= ``article_id``."""
+        lo, hi = 0, self._sorted
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < article_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _in_sorted(self, article_id):
+        position = self._lower_bound(article_id)
+        return position < self._sorted and self._entry(position)[0] == article_id
+
+    def _locate(self, article_id):
+        """(offset, length) of the current record of an ID, or None."""
+        located = self._appended.get(article_id)
+        if located is None:
+            position = self._lower_bound(article_id)
+            if position < self._sorted:
+                entry_id, offset, length = self._entry(position)
+                if entry_id == article_id:
+                    located = offset, length
+        return located
+
+    def _entries(self, min_id, max_id):
+        """(ID, offset, length) of the current records in an ID range, in order."""
+        appended = sorted(
+            article_id
+            for article_id in self._appended
+            if min_id <= article_id <= max_id
+        )
+        position = self._lower_bound(min_id)
+        next_appended = 0
+        while True:
+            sorted_id = None
+            if position < self._sorted:
+                sorted_id, offset, length = self._entry(position)
+                if sorted_id > max_id:
+                    sorted_id = None
+            appended_id = None
+            if next_appended < len(appended):
+                appended_id = appended[next_appended]
+            if sorted_id is None and appended_id is None:
+                return
+            if appended_id is not None and (
+                sorted_id is None or appended_id <= sorted_id
+            ):
+                # An appended entry overrides the sorted one of the same ID
+                if appended_id == sorted_id:
+                    position += 1
+                next_appended += 1
+                yield (appended_id, *self._appended[appended_id])
+            else:
+                position += 1
+                yield sorted_id, offset, length
+
+    def __contains__(self, article_id):
+        return self._locate(article_id) is not None
+
+    def raw(self, article_id):
+        """The stored JSON record as bytes, or None."""
+        located = self._locate(article_id)
+        if located is None:
+            return None
+        offset, length = located
+        return self._data[offset : offset + length]
+
+    def get(self, article_id, lazy_content=False):
+        """The article with this ID, or None.
+
+        With ``lazy_content`` the content is dropped after decoding and read
+        from the store again on first access (for long-lived metadata lists).
+        """
+        record = self.raw(article_id)
+        if record is None:
+            return None
+        if not lazy_content:
+            return Article.from_json(record)
+        data = loads(record)
+        data.pop("content", None)
+        return Article(data, content_loader=self._load_content)
+
+    def _load_content(self, article_id):
+        record = self.raw(article_id)
+        if record is None:
+            return None
+        return loads(record).get("content")
+
+    def ids(self):
+        """All stored IDs in ascending order."""
+        return [entry[0] for entry in self._entries(0, 2**32 - 1)]
+
+    def range(self, min_id, max_id):
+        """Yield articles with ``min_id <= id <= max_id`` in ID order."""
+        for _, offset, length in self._entries(min_id, max_id):
+            yield Article.from_json(self._data[offset : offset + length])
+
+    def __iter__(self):
+        return self.range(0, 2**32 - 1)
+
+
+class ArticleStoreWriter:
+    """Appends records to a store and their index entries on ``flush``."""
+
+    def __init__(self, stem, reset=False):
+        self.stem = stem
+        self.data_path = stem + DATA_SUFFIX
+        self.index_path = stem + INDEX_SUFFIX
+        if reset:
+            for path in (self.data_path, self.index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._file = open(self.data_path, "ab")
+        self._new = {}
+
+    def append(self, article):
+        """Append one article (a later append of the same ID replaces it)."""
+        data = dumps(Article.from_dict(article).to_dict())
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(data + b"\n")
+        self._new[int(article["id"])] = (offset, len(data))
+
+    def flush(self):
+        """Make appended records visible by appending their index entries.
+
+        The index is rewritten sorted instead when it is missing, in the old
+        format or when the appended entries outgrow the compaction limit.
+        """
+        if not self._new:
+            return
+        # Records reach the data file before any index entry points at them
+        self._file.flush()
+        new, self._new = self._new, {}
+
+        sorted_count = appended = None
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(len(INDEX_MAGIC) + INDEX_HEADER.size)
+                size = os.fstat(f.fileno()).st_size
+        except FileNotFoundError:
+            header = b""
+        if header[: len(INDEX_MAGIC)] == INDEX_MAGIC and len(header) == (
+            len(INDEX_MAGIC) + INDEX_HEADER.size
+        ):
+            (sorted_count,) = INDEX_HEADER.unpack_from(header, len(INDEX_MAGIC))
+            appended = (size - len(header)) // INDEX_ENTRY.size - sorted_count
+        if sorted_count is None or appended + len(new) > max(
+            COMPACT_MIN_ENTRIES, COMPACT_RATIO * sorted_count
+        ):
+            self._compact(new)
+            return
+
+        with open(self.index_path, "r+b") as f:
+            # Drop a partly written entry of an interrupted flush
+            f.truncate(len(header) + (sorted_count + appended) * INDEX_ENTRY.size)
+            f.seek(0, os.SEEK_END)
+            f.write(
+                b"".join(
+                    INDEX_ENTRY.pack(article_id, *entry)
+                    for article_id, entry in new.items()
+                )
+            )
+
+    def _compact(self, new):
+        """Rewrite the index as one sorted section including ``new``."""
+        entries = {}
+        if os.path.exists(self.index_path):
+            with ArticleStore(self.stem) as store:
+                for article_id, offset, length in store._entries(0, 2**32 - 1):
+                    entries[article_id] = (offset, length)
+        entries.update(new)
+
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(INDEX_HEADER.pack(len(entries)))
+            for article_id in sorted(entries):
+                f.write(INDEX_ENTRY.pack(article_id, *entries[article_id]))
+        os.replace(tmp_path, self.index_path)
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def build_store(articles, stem):
+    """Write a fresh store from an iterable of articles, return the count."""
+    writer = ArticleStoreWriter(stem, reset=True)
+    count = 0
+    for article in articles:
+        if article.get("id"):
+            writer.append(article)
+            count += 1
+    writer.close()
+    return count
@@ -0,0 +1,499 @@
+"""
+Benchmark suite: extraction, the save path and end-to-end scans.
+Every benchmark runs in a fresh subprocess (so peak RSS is its own) and
+reports throughput, p50/p95/p99 latency, CPU use and peak RSS. Results are
+compared against a stored baseline to catch regressions:
+
+    python benchmarks/bench.py --save-baseline     # on the reference version
+    python benchmarks/bench.py                     # after a change
+    python benchmarks/bench.py parse save-1k --quick
+
+The parse benchmark runs on the real Protext pages in benchmarks/fixtures
+(recorded with --record-fixtures N, which needs Tor or --no-tor access to
+protext.cz) and falls back to synthetic mock pages while there are none.
+The corpus is stored with the result, and a baseline measured on another
+corpus is reported instead of compared. End-to-end scans run against
+mock_server.py started in its own process, so the server does not compete
+with the scraper for CPU.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+# Real article pages (<id>.html) and rss.xml, also usable by mock_server.py
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+# Relative change that counts as a regression
+DEFAULT_TOLERANCE = 0.10
+
+BENCHMARKS = {
+    "parse": {"kind": "parse", "pages": 500},
+    "save-1k": {"kind": "save", "articles": 1000, "batch": 500},
+    "save-10k": {"kind": "save", "articles": 10000, "batch": 500},
+    "save-100k": {"kind": "save", "articles": 100000, "batch": 500},
+    "scan": {
+        "kind": "scan",
+        "ids": 2000,
+        "workers": 16,
+        "latency": "lognormal:-4,0.5",
+        "missing_rate": 0.1,
+        "errors": [],
+    },
+    "scan-faults": {
+        "kind": "scan",
+        "ids": 2000,
+        "workers": 16,
+        "latency": "lognormal:-4,0.5",
+        "missing_rate": 0.3,
+        "errors": ["429=0.01", "403=0.005", "503=0.02"],
+        "slow_tail": "0.01,0.5",
+    },
+}
+
+# Smaller variants for a quick check
+QUICK_OVERRIDES = {
+    "parse": {"pages": 100},
+    "scan": {"ids": 500},
+    "scan-faults": {"ids": 500},
+}
+
+
+def _percentiles(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _result(items, wall, cpu, latencies, **extra):
+    result = {
+        "items": items,
+        "seconds": round(wall, 3),
+        "pages_per_s": round(items / wall, 1) if wall else 0.0,
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+    result.update(
+        {k: round(v * 1000, 2) for k, v in _percentiles(latencies).items()}
+    )
+    result.update(extra)
+    return result
+
+
+def _fixture_files(fixtures_dir):
+    if not os.path.isdir(fixtures_dir):
+        return []
+    return [
+        os.path.join(fixtures_dir, name)
+        for name in sorted(os.listdir(fixtures_dir))
+        if name.endswith((".html", ".body"))
+    ]
+
+
+def load_corpus(fixtures_dir=None, pages=500):
+    """HTML pages to parse and a label of their source.
+
+    Fixture files (<id>.html or recorded .body files) come from
+    ``fixtures_dir``, by default benchmarks/fixtures; they are repeated up to
+    ``pages``. Without fixtures, synthetic mock pages are used.
+    """
+    files = _fixture_files(fixtures_dir or FIXTURES_DIR)
+    if files:
+        corpus = []
+        for path in files:
+            with open(path, "rb") as f:
+                corpus.append(f.read())
+        repeated = [corpus[i % len(corpus)] for i in range(max(pages, 1))]
+        return repeated, f"fixtures:{len(corpus)}"
+    if fixtures_dir:
+        raise RuntimeError(f"No fixture pages in {fixtures_dir}")
+
+    from mock_server import MockConfig, MockProtext
+
+    mock = MockProtext(MockConfig(missing_rate=0))
+    corpus = [mock.article_page(article_id) for article_id in range(1, pages + 1)]
+    return corpus, "synthetic"
+
+
+def record_fixtures(count, use_tor=True, fixtures_dir=FIXTURES_DIR):
+    """Download ``count`` real article pages (and the RSS feed) as fixtures.
+
+    IDs are spread over roughly the newest 20 000 articles so the corpus
+    covers several years of page templates.
+    """
+    from scraper import Scraper
+
+    scraper = Scraper(use_tor=use_tor)
+    newest_id, _ = scraper.fetch_latest_ids()
+    if not newest_id:
+        raise RuntimeError("Could not determine the newest article ID")
+    os.makedirs(fixtures_dir, exist_ok=True)
+
+    rss = scraper.request(f"{scraper.base_url}/rss/cz.php")
+    if rss is not None and rss.status_code == 200:
+        with open(os.path.join(fixtures_dir, "rss.xml"), "wb") as f:
+            f.write(rss.content)
+
+    step = max(1, 20000 // count)
+    saved = 0
+    article_id = newest_id
+    while saved < count and article_id > 0:
+        response = scraper.request(scraper.article_url(article_id))
+        if response is not None and response.status_code == 200:
+            with open(os.path.join(fixtures_dir, f"{article_id}.html"), "wb") as f:
+                f.write(response.content)
+            saved += 1
+        article_id -= step
+    print(f"Recorded {saved} pages to {fixtures_dir}")
+    return saved
+
+
+def bench_parse(spec):
+    from scraper import parse_article_html
+
+    corpus, source = load_corpus(spec.get("fixtures"), spec["pages"])
+    latencies = []
+    parsed = 0
+    cpu_start = _cpu_seconds()
+    started = time.perf_counter()
+    for i, raw in enumerate(corpus):
+        t = time.perf_counter()
+        parsed += parse_article_html(raw, i, f"fixture-{i}") is not None
+        latencies.append(time.perf_counter() - t)
+    wall = time.perf_counter() - started
+    return _result(
+        len(corpus),
+        wall,
+        _cpu_seconds() - cpu_start,
+        latencies,
+        parsed=parsed,
+        corpus=source,
+    )
+
+
+def synthetic_articles(count, seed=0):
+    """Article dicts shaped like extractor output, with distinct content."""
+    from mock_server import CITIES, WORDS
+
+    rng = random.Random(seed)
+    syllables = ["ko", "pra", "ně", "sto", "li", "vá", "ten", "mi", "roz", "dě"]
+    vocabulary = WORDS + [
+        "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        for _ in range(2000)
+    ]
+    for article_id in range(1, count + 1):
+        words = rng.choices(vocabulary, k=rng.randint(200, 800))
+        yield {
+            "title": " ".join(rng.choices(vocabulary, k=10)).capitalize(),
+            "content": " ".join(words),
+            "link": f"https://www.protext.cz/zprava.php?id={article_id}",
+            "id": article_id,
+            "date": f"{rng.choice(CITIES)} 10. října 2025 (PROTEXT)",
+            "keywords": "Protext-ČR-" + "-".join(rng.sample(WORDS, 3)),
+            "category": "Finance, ekonomika",
+        }
+
+
+def bench_save(spec):
+    from scraper import DatasetWriter
+
+    output_dir = tempfile.mkdtemp(prefix="bench_save_")
+    try:
+        articles = list(synthetic_articles(spec["articles"]))
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            cpu_start = _cpu_seconds()
+            started = time.perf_counter()
+            writer = DatasetWriter(output_dir, "content.json")
+            latencies = []
+            for start in range(0, len(articles), spec["batch"]):
+                t = time.perf_counter()
+                writer.add(articles[start : start + spec["batch"]])
+                writer.save()
+                latencies.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            writer.close()
+            close_seconds = time.perf_counter() - t
+            wall = time.perf_counter() - started
+        size = os.path.getsize(os.path.join(output_dir, "content.json"))
+        return _result(
+            len(articles),
+            wall,
+            _cpu_seconds() - cpu_start,
+            latencies,
+            close_seconds=round(close_seconds, 3),
+            output_mb=round(size / 2**20, 1),
+        )
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_mock_server(spec, max_id):
+    port = _free_port()
+    command = [
+        sys.executable,
+        os.path.join(REPO_DIR, "mock_server.py"),
+        "--port", str(port),
+        "--max-id", str(max_id),
+        "--missing-rate", str(spec.get("missing_rate", 0.1)),
+        "--latency", spec.get("latency", "0"),
+        "--retry-after", "0",
+    ]  # fmt: skip
+    for error in spec.get("errors", []):
+        command += ["--error", error]
+    if spec.get("slow_tail"):
+        command += ["--slow-tail", spec["slow_tail"]]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + "/__stats", timeout=1).read()
+            return server, base_url
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("Mock server did not start")
+
+
+def bench_scan(spec):
+    from scraper import Scraper
+
+    max_id = 100000
+    server, base_url = _start_mock_server(spec, max_id)
+    output_dir = tempfile.mkdtemp(prefix="bench_scan_")
+    try:
+        scraper = Scraper(use_tor=False, base_url=base_url, delay_scale=0)
+        latencies = []
+        fetch = scraper.fetch
+
+        def timed_fetch(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return fetch(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - t)
+
+        scraper.fetch = timed_fetch
+
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            cpu_start = _cpu_seconds()
+            started = time.perf_counter()
+            found = scraper.scan_range(
+                max_id - spec["ids"] + 1,
+                max_id,
+                max_workers=spec["workers"],
+                batch_size=spec.get("batch_size", 500),
+                output_dir=output_dir,
+                filename="content.json",
+            )
+            wall = time.perf_counter() - started
+            cpu = _cpu_seconds() - cpu_start
+
+        with urllib.request.urlopen(base_url + "/__stats", timeout=5) as response:
+            server_stats = json.load(response)
+        # A scan that finds nothing measures nothing - fail instead of
+        # recording a bogus baseline
+        if not found:
+            raise RuntimeError("Scan benchmark found no articles")
+        if not server_stats.get("requests"):
+            raise RuntimeError("Mock server received no requests")
+        return _result(
+            spec["ids"], wall, cpu, latencies, found=len(found), server=server_stats
+        )
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+RUNNERS = {"parse": bench_parse, "save": bench_save, "scan": bench_scan}
+
+
+def run_isolated(name, spec):
+    """Run one benchmark in a fresh interpreter, returns its result dict.
+
+    Returns None if the benchmark crashed or printed no result.
+    """
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(spec)],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        print(f"Benchmark {name} failed:\n{completed.stderr[-2000:]}")
+        return None
+    try:
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        print(f"Benchmark {name} printed no result:\n{completed.stdout[-2000:]}")
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against the baseline as a list of messages."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not result:
+            continue
+        if base.get("corpus") != result.get("corpus"):
+            regressions.append(
+                f"{name}: baseline measured on corpus {base.get('corpus')}, "
+                f"this run on {result.get('corpus')} - refresh it with --save-baseline"
+            )
+            continue
+        if result["pages_per_s"] < base["pages_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['pages_per_s']}/s "
+                f"(baseline {base['pages_per_s']}/s)"
+            )
+        for key in ("p95", "p99"):
+            # Sub-millisecond latencies are too noisy to compare
+            if base[key] >= 1 and result[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {result[key]} ms (baseline {base[key]} ms)"
+                )
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak RSS {result['peak_rss_mb']} MB "
+                f"(baseline {base['peak_rss_mb']} MB)"
+            )
+    return regressions
+
+
+def print_results(results, baseline):
+    print(
+        f"\n{'benchmark':<12} {'items':>7} {'pages/s':>9} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'CPU %':>6} {'RSS MB':>7}  baseline pages/s"
+    )
+    for name, r in results.items():
+        if not r:
+            print(f"{name:<12} failed")
+            continue
+        base = baseline.get(name, {}).get("pages_per_s", "-")
+        print(
+            f"{name:<12} {r['items']:>7} {r['pages_per_s']:>9} {r['p50']:>8} "
+            f"{r['p95']:>8} {r['p99']:>8} {r['cpu_percent']:>6} "
+            f"{r['peak_rss_mb']:>7}  {base}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Protext scraper benchmarks")
+    parser.add_argument(
+        "benchmarks", nargs="*", help=f"subset of: {', '.join(BENCHMARKS)}"
+    )
+    parser.add_argument("--quick", action="store_true", help="smaller inputs")
+    parser.add_argument("--fixtures", help="directory with HTML pages for parse")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument(
+        "--record-fixtures",
+        type=int,
+        metavar="N",
+        help="download N real pages into benchmarks/fixtures and exit",
+    )
+    parser.add_argument(
+        "--no-tor", action="store_true", help="record fixtures without Tor"
+    )
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        spec = json.loads(args.run_one)
+        print(json.dumps(RUNNERS[spec["kind"]](spec)))
+        return 0
+
+    if args.record_fixtures:
+        record_fixtures(args.record_fixtures, use_tor=not args.no_tor)
+        return 0
+
+    names = args.benchmarks or list(BENCHMARKS)
+    if args.quick and not args.benchmarks:
+        names = [name for name in names if name != "save-100k"]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        spec = dict(BENCHMARKS[name])
+        if args.quick:
+            spec.update(QUICK_OVERRIDES.get(name, {}))
+        if args.fixtures and spec["kind"] == "parse":
+            spec["fixtures"] = args.fixtures
+        print(f"Running {name}...")
+        results[name] = run_isolated(name, spec)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    # A crashed benchmark must fail the run, not silently skip the comparison
+    failed = [name for name, r in results.items() if not r]
+    if failed:
+        print(f"\nFAILED: {', '.join(failed)}")
+
+    if args.save_baseline:
+        baseline.update({name: r for name, r in results.items() if r})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 1 if failed else 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    if failed:
+        return 1
+    if baseline:
+        print(f"\nNo regressions (tolerance {args.tolerance * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Category filtering pushed down into the fetch.
+The response is streamed through an incremental HTML parser until the
+article category (span[itemprop="about"]) is seen, so pages of rejected
+categories are not downloaded in full. Known ID -> category pairs are cached
+so later filtered scans skip non-matching IDs without any request.
+"""
+
+import codecs
+import json
+import os
+import re
+import threading
+from html.parser import HTMLParser
+
+from metrics import BYTES_DOWNLOADED
+
+STREAM_CHUNK_SIZE = 8192
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_-]+)""", re.I)
+_HEADER_CHARSET_RE = re.compile(r"charset=([A-Za-z0-9_-]+)", re.I)
+
+
+class CategorySniffer(HTMLParser):
+    """Incremental parser that stops caring once the category span is read."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.category = None
+        self._capturing = False
+        self._parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.category is None and tag == "span" and ("itemprop", "about") in attrs:
+            self._capturing = True
+            self._parts = []
+
+    def handle_endtag(self, tag):
+        if self._capturing and tag == "span":
+            self._capturing = False
+            self.category = "".join(self._parts).strip()
+
+    def handle_data(self, data):
+        if self._capturing:
+            self._parts.append(data)
+
+
+def _declared_encoding(response, first_chunk):
+    """Encoding declared by the server or the page itself, if any."""
+    match = _HEADER_CHARSET_RE.search(response.headers.get("Content-Type", ""))
+    if match:
+        return match.group(1)
+    match = _META_CHARSET_RE.search(first_chunk[:4096])
+    if match:
+        return match.group(1).decode("ascii")
+    return None
+
+
+def read_until_category(response, selected_categories):
+    """Stream a response, aborting as soon as a non-selected category is seen.
+
+    Returns (raw_content, category). ``raw_content`` is None when the download
+    was aborted; ``category`` is None when it could not be determined early
+    (in which case the full page is returned for normal parsing).
+    """
+    chunks = []
+    sniffer = None
+    decoder = None
+    try:
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            if not chunk:
+                continue
+            chunks.append(chunk)
+            BYTES_DOWNLOADED.inc(len(chunk))
+
+            if sniffer is None:
+                encoding = _declared_encoding(response, chunk)
+                try:
+                    decoder = codecs.getincrementaldecoder(encoding)("replace")
+                except (LookupError, TypeError):
+                    # Without a reliable encoding the category could be
+                    # garbled - read the whole page and let chardet decide
+                    decoder = None
+                sniffer = CategorySniffer()
+
+            if decoder is None or sniffer.category is not None:
+                continue
+
+            sniffer.feed(decoder.decode(chunk))
+            if sniffer.category is not None:
+                if sniffer.category not in selected_categories:
+                    return None, sniffer.category
+    finally:
+        response.close()
+
+    category = sniffer.category if sniffer is not None else None
+    return b"".join(chunks), category
+
+
+class CategoryCache:
+    """Thread-safe, persisted ID -> category mapping."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._categories = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._categories)
+
+    def get(self, article_id):
+        with self._lock:
+            return self._categories.get(article_id)
+
+    def set(self, article_id, category):
+        with self._lock:
+            if self._categories.get(article_id) != category:
+                self._categories[article_id] = category
+                self._dirty = True
+
+    def is_rejected(self, article_id, selected_categories):
+        """True when the cached category of an ID is known not to match."""
+        category = self.get(article_id)
+        return category is not None and category not in selected_categories
+
+    def load(self, path):
+        """Merge a saved cache file into memory."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error loading category cache: {e}")
+            return
+        with self._lock:
+            for key, category in data.items():
+                self._categories.setdefault(int(key), category)
+
+    def save(self, path):
+        """Write the cache to disk if it changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {str(k): v for k, v in sorted(self._categories.items())}
+            self._dirty = False
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
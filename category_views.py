@@ -0,0 +1,117 @@
+"""
+Per-category views of a dataset.
+The dataset writer appends an (ID, category) line to ``<name>.views.jsonl``
+whenever an article is saved with a category it did not have before, so the
+IDs of one category, or of a union of categories, are known at any time
+without reading the dataset. Together with the article store the view can be
+exported directly, copying the stored records byte for byte.
+"""
+
+import json
+import os
+import threading
+
+from serializer import dataset_stem
+
+VIEWS_SUFFIX = ".views.jsonl"
+UNCATEGORIZED = "Uncategorized"
+
+
+class CategoryViews:
+    """Category -> IDs mapping backed by an append-only log."""
+
+    def __init__(self, path, reset=False):
+        self.path = path
+        self.categories = {}
+        self._category_of = {}
+        self._lock = threading.Lock()
+        if reset and os.path.exists(path):
+            os.remove(path)
+        self._load()
+
+    @classmethod
+    def for_dataset(cls, file_path):
+        """Open the views kept next to a dataset, or None if there are none."""
+        path = dataset_stem(file_path) + VIEWS_SUFFIX
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._move(entry["id"], entry["category"])
+
+    def _move(self, article_id, category):
+        previous = self._category_of.get(article_id)
+        if previous is not None:
+            self.categories[previous].discard(article_id)
+        self._category_of[article_id] = category
+        self.categories.setdefault(category, set()).add(article_id)
+
+    def __len__(self):
+        return len(self._category_of)
+
+    def add(self, articles):
+        """Record the category of saved articles, return how many changed."""
+        lines = []
+        with self._lock:
+            for article in articles:
+                article_id = article.get("id")
+                if not article_id:
+                    continue
+                category = article.get("category") or UNCATEGORIZED
+                if self._category_of.get(article_id) == category:
+                    continue
+                self._move(article_id, category)
+                lines.append(
+                    json.dumps(
+                        {"id": article_id, "category": category}, ensure_ascii=False
+                    )
+                )
+            if lines:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+        return len(lines)
+
+    def counts(self):
+        """Number of articles per category, largest first."""
+        with self._lock:
+            counts = {
+                category: len(ids) for category, ids in self.categories.items() if ids
+            }
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+    def ids(self, categories):
+        """Sorted IDs in any of the given categories."""
+        with self._lock:
+            selected = set()
+            for category in categories:
+                selected |= self.categories.get(category, set())
+        return sorted(selected)
+
+
+def export_view(views, store, categories, output_path):
+    """Write the articles of the given categories as a JSON array.
+
+    Records are copied from the article store without decoding. Returns the
+    number of exported articles.
+    """
+    count = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"[")
+        for article_id in views.ids(categories):
+            record = store.raw(article_id)
+            if record is None:
+                continue
+            f.write(b",\n" if count else b"\n")
+            f.write(record)
+            count += 1
+        f.write(b"\n]\n")
+    os.replace(tmp_path, output_path)
+    return count
@@ -0,0 +1,224 @@
+"""
+Sparse ID -> publication date index.
+Protext IDs grow with time, so a date range corresponds to an ID range. The
+index keeps about one known date per ``spacing`` IDs (fed from scan results
+and persisted in date_index.json) and refines itself on demand: the ID range
+for a date range is found by binary search between the nearest known
+entries, probing single IDs and remembering every answer. Missing IDs are
+stepped over by probing their neighbours. Dates come from the Czech
+datelines of the articles (parse_czech_date).
+"""
+
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from datetime import date, timedelta
+
+DATE_INDEX_FILE = "date_index.json"
+DEFAULT_SPACING = 100  # IDs per index entry when fed from scan results
+DEFAULT_PRECISION = 20  # IDs of uncertainty accepted at each end of a range
+MAX_PROBE_SKIP = 10  # neighbours tried on each side of a missing ID
+
+# Czech month names (genitive as used in Protext dates, plus nominative)
+CZECH_MONTHS = {
+    "ledna": 1,
+    "leden": 1,
+    "února": 2,
+    "únor": 2,
+    "března": 3,
+    "březen": 3,
+    "dubna": 4,
+    "duben": 4,
+    "května": 5,
+    "květen": 5,
+    "června": 6,
+    "červen": 6,
+    "července": 7,
+    "červenec": 7,
+    "srpna": 8,
+    "srpen": 8,
+    "září": 9,
+    "října": 10,
+    "říjen": 10,
+    "listopadu": 11,
+    "listopad": 11,
+    "prosince": 12,
+    "prosinec": 12,
+}
+
+# "Praha 10. října 2025 (PROTEXT)" or "Brno, 3. 2. 2025" - location, day, month
+_DATELINE_RE = re.compile(
+    r"^(?P<location>.*?)[\s,–-]*\b(?P<day>\d{1,2})\.\s*(?:(?P<month_name>"
+    + "|".join(sorted(CZECH_MONTHS, key=len, reverse=True))
+    + r")|(?P<month>\d{1,2})\.)\s*(?P<year>\d{4})",
+    re.IGNORECASE,
+)
+
+
+def parse_czech_date(date_text):
+    """Return (ISO date 'YYYY-MM-DD', location) from a Protext dateline.
+
+    Either part is None when it cannot be read; an invalid day of the month
+    gives no date.
+    """
+    if not date_text:
+        return None, None
+    match = _DATELINE_RE.search(" ".join(date_text.split()))
+    if not match:
+        return None, None
+    location = match.group("location").strip(" ,–-") or None
+    if match.group("month_name"):
+        month = CZECH_MONTHS[match.group("month_name").lower()]
+    else:
+        month = int(match.group("month"))
+    try:
+        published = date(int(match.group("year")), month, int(match.group("day")))
+    except ValueError:
+        return None, location
+    return published.isoformat(), location
+
+
+class DateIndex:
+    """Thread-safe, persisted sparse mapping of article ID to ISO date."""
+
+    def __init__(self, spacing=DEFAULT_SPACING):
+        self.spacing = spacing
+        self.dates = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.probes = 0
+
+    def __len__(self):
+        return len(self.dates)
+
+    def get(self, article_id):
+        return self.dates.get(article_id)
+
+    def set(self, article_id, published):
+        """Remember the date of an ID (probe results are always kept)."""
+        with self._lock:
+            if self.dates.get(article_id) != published:
+                self.dates[article_id] = published
+                self._dirty = True
+
+    def add_articles(self, articles):
+        """Sample dates from scanned articles, one per ``spacing`` IDs."""
+        with self._lock:
+            buckets = {article_id // self.spacing for article_id in self.dates}
+            for article in articles:
+                published = article.get("published")
+                if not published:
+                    continue
+                bucket = article["id"] // self.spacing
+                if bucket not in buckets:
+                    buckets.add(bucket)
+                    self.dates[article["id"]] = published
+                    self._dirty = True
+
+    def _bracket(self, day, min_id, max_id):
+        """Nearest known IDs before and on/after ``day`` within the bounds."""
+        with self._lock:
+            known = sorted(
+                (article_id, published)
+                for article_id, published in self.dates.items()
+                if min_id <= article_id <= max_id
+            )
+        ids = [article_id for article_id, _ in known]
+        hi = max_id + 1
+        for article_id, published in known:
+            if published >= day:
+                hi = article_id
+                break
+        lo = min_id - 1
+        for article_id, published in reversed(known[: bisect_left(ids, hi)]):
+            if published < day:
+                lo = article_id
+                break
+        return lo, hi
+
+    def _probe_near(self, mid, lo, hi, probe):
+        """(ID, date) of the nearest existing article to ``mid`` inside (lo, hi)."""
+        for offset in range(MAX_PROBE_SKIP + 1):
+            for article_id in (mid + offset, mid - offset) if offset else (mid,):
+                if not lo < article_id < hi:
+                    continue
+                published = self.get(article_id)
+                if published is None:
+                    self.probes += 1
+                    published = probe(article_id)
+                    if published:
+                        self.set(article_id, published)
+                if published:
+                    return article_id, published
+        return None, None
+
+    def first_id_on_or_after(self, day, probe, min_id, max_id, precision, low=True):
+        """Bracket (lo, hi) of the first ID published on or after ``day``.
+
+        IDs up to ``lo`` are older than ``day`` and IDs from ``hi`` on are not,
+        with ``hi - lo <= precision`` unless a run of missing IDs stops the
+        search. Such a run is assumed to lie after the boundary with ``low``,
+        before it otherwise, so the caller always gets the wider range.
+        """
+        lo, hi = self._bracket(day, min_id, max_id)
+        while hi - lo > max(precision, 1):
+            mid = (lo + hi) // 2
+            article_id, published = self._probe_near(mid, lo, hi, probe)
+            if article_id is None:
+                # Nothing around mid - give up this half on the safe side
+                if low:
+                    hi = mid
+                else:
+                    lo = mid
+            elif published < day:
+                lo = article_id
+            else:
+                hi = article_id
+        return lo, hi
+
+    def id_range_for_dates(
+        self, start, end, probe, min_id, max_id, precision=DEFAULT_PRECISION
+    ):
+        """ID range (first, last) covering ISO dates ``start``..``end``.
+
+        ``probe(article_id)`` returns the ISO date of an ID or None when it is
+        missing. The range may include up to ``precision`` IDs outside the
+        dates at each end; None when no ID can fall in the range.
+        """
+        day_after = (date.fromisoformat(end) + timedelta(days=1)).isoformat()
+        lo, _ = self.first_id_on_or_after(
+            start, probe, min_id, max_id, precision, low=True
+        )
+        _, hi = self.first_id_on_or_after(
+            day_after, probe, max(lo, min_id), max_id, precision, low=False
+        )
+        first, last = lo + 1, hi - 1
+        return (first, last) if first <= last else None
+
+    def load(self, path):
+        """Merge a saved index file into memory."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error loading date index: {e}")
+            return
+        with self._lock:
+            for key, published in data.items():
+                self.dates.setdefault(int(key), published)
+
+    def save(self, path):
+        """Write the index to disk if it changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {str(k): v for k, v in sorted(self.dates.items())}
+            self._dirty = False
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=0)
+        os.replace(tmp_path, path)
@@ -0,0 +1,122 @@
+"""
+Dead-letter queue of IDs that could not be fetched.
+Failures are classified instead of being reported as "not found": transient
+network errors and throttling (429/403/503) are worth retrying, parse
+failures are kept for inspection, and genuinely missing IDs (404) never get
+here. The queue is persisted next to the dataset, so IDs left over when a
+scan ends are retried in the deferred pass of a later run.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+FAILURE_NETWORK = "network"
+FAILURE_THROTTLED = "throttled"
+FAILURE_PARSE = "parse"
+
+# Failure classes retried by the deferred pass
+TRANSIENT_FAILURES = (FAILURE_NETWORK, FAILURE_THROTTLED)
+
+
+class FetchError(Exception):
+    """An ID that failed for a reason other than being missing."""
+
+    def __init__(self, kind, detail=""):
+        super().__init__(f"{kind}: {detail}" if detail else kind)
+        self.kind = kind
+        self.detail = detail
+
+
+class DeadLetterQueue:
+    """Thread-safe, persisted ID -> failure record mapping."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, article_id):
+        with self._lock:
+            return article_id in self._entries
+
+    def add(self, article_id, kind, error="", attempts=1):
+        """Record a failed attempt (attempts add up across passes and runs)."""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            entry = self._entries.get(article_id)
+            if entry is None:
+                entry = {"attempts": 0, "first_failed": now}
+                self._entries[article_id] = entry
+            entry.update(kind=kind, error=error[:200], last_failed=now)
+            entry["attempts"] += attempts
+            self._dirty = True
+
+    def remove(self, article_id):
+        """Forget an ID that has since been fetched or turned out missing."""
+        with self._lock:
+            if self._entries.pop(article_id, None) is not None:
+                self._dirty = True
+
+    def pending(self, kinds=TRANSIENT_FAILURES, max_attempts=None):
+        """IDs of the given failure classes, newest first."""
+        with self._lock:
+            return sorted(
+                (
+                    article_id
+                    for article_id, entry in self._entries.items()
+                    if entry["kind"] in kinds
+                    and (max_attempts is None or entry["attempts"] < max_attempts)
+                ),
+                reverse=True,
+            )
+
+    def counts(self):
+        """Number of queued IDs per failure class."""
+        counts = {}
+        with self._lock:
+            for entry in self._entries.values():
+                counts[entry["kind"]] = counts.get(entry["kind"], 0) + 1
+        return counts
+
+    def pop_all(self):
+        """Take all entries out of the queue (worker processes ship them)."""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            self._dirty = True
+        return entries
+
+    def merge(self, entries):
+        """Add entries taken from another queue."""
+        for article_id, entry in entries.items():
+            self.add(article_id, entry["kind"], entry["error"], entry["attempts"])
+
+    def load(self, path):
+        """Merge a saved queue file into memory."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error loading dead-letter queue: {e}")
+            return
+        with self._lock:
+            for key, entry in data.items():
+                self._entries.setdefault(int(key), entry)
+
+    def save(self, path):
+        """Write the queue to disk if it changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {str(k): v for k, v in sorted(self._entries.items())}
+            self._dirty = False
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
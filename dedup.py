@@ -0,0 +1,287 @@
+"""
+Near-duplicate detection for scraped press releases.
+Articles are reduced to MinHash signatures over word shingles and stored in an
+LSH band index, so candidate duplicates are found without pairwise comparison
+of the whole corpus. Signatures use one-permutation hashing: every shingle is
+hashed once and lands in one of NUM_PERM bins, so the cost is linear in the
+text length instead of NUM_PERM passes over all shingles. Bin values are
+32-bit, kept in arrays in memory and saved base64-packed.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+from array import array
+from datetime import datetime
+
+# MinHash / LSH parameters - 16 bands of 8 rows put the LSH threshold at ~0.7
+NUM_PERM = 128
+LSH_BANDS = 16
+SHINGLE_SIZE = 4
+SIMILARITY_THRESHOLD = 0.8
+
+# Saved signature files carry the scheme; files of another scheme are rebuilt
+SIGNATURE_SCHEME = "oph-rotation-u32"
+
+# Empty bins borrow the value of the next filled bin plus this (odd) offset per
+# step, wrapped to 32 bits
+_DENSIFY_OFFSET = 0x9E3779B1
+_MAX_HASH = (1 << 32) - 1
+_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _shingle_hashes(text, shingle_size=SHINGLE_SIZE):
+    """Hash word shingles of normalized text into 64-bit integers."""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return set()
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i : i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+    return {
+        int.from_bytes(
+            hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        for s in shingles
+    }
+
+
+def _pack_signature(signature):
+    """Little-endian packed, base64-encoded 32-bit bin values."""
+    if sys.byteorder == "big":
+        signature = array(_TYPECODE, signature)
+        signature.byteswap()
+    return base64.b64encode(signature.tobytes()).decode("ascii")
+
+
+def _unpack_signature(packed):
+    signature = array(_TYPECODE)
+    signature.frombytes(base64.b64decode(packed))
+    if sys.byteorder == "big":
+        signature.byteswap()
+    return signature
+
+
+def article_text(article):
+    """Text used for duplicate detection (title + content)."""
+    return f"{article.get('title', '')} {article.get('content', '')}"
+
+
+class NearDuplicateIndex:
+    """MinHash signatures with an LSH band index for sub-linear candidate lookup."""
+
+    def __init__(
+        self, num_perm=NUM_PERM, bands=LSH_BANDS, threshold=SIMILARITY_THRESHOLD
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.signatures = {}  # article_id -> array of 32-bit ints
+        # hash of (band, rows) -> article ID, or a list once the bucket is shared
+        self.buckets = {}
+        self.matches = {}  # (id_a, id_b) -> estimated similarity
+
+    def signature(self, text):
+        """Compute the one-permutation MinHash signature of a text."""
+        hashes = _shingle_hashes(text)
+        if not hashes:
+            return None
+        num_bins = self.num_perm
+        bins = [None] * num_bins
+        for h in hashes:
+            # Low bits pick the bin, the top 32 bits are the value
+            slot = h % num_bins
+            value = h >> 32
+            current = bins[slot]
+            if current is None or value < current:
+                bins[slot] = value
+
+        # Densify by rotation: walk the ring backwards twice so every empty
+        # bin sees the nearest filled bin to its right
+        signature = list(bins)
+        nearest, distance = None, 0
+        for i in range(2 * num_bins - 1, -1, -1):
+            slot = i % num_bins
+            if bins[slot] is not None:
+                nearest, distance = bins[slot], 0
+            else:
+                distance += 1
+                if nearest is not None:
+                    value = nearest + distance * _DENSIFY_OFFSET
+                    signature[slot] = value & _MAX_HASH
+        return array(_TYPECODE, signature)
+
+    def _band_keys(self, signature):
+        # Colliding keys only add candidates, which are checked by similarity
+        for band in range(self.bands):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            yield hash((band, rows.tobytes()))
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """Estimate Jaccard similarity from two signatures."""
+        same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+        return same / len(sig_a)
+
+    def add(self, article_id, text):
+        """Index an article and return its near-duplicates as (id, similarity)."""
+        if article_id in self.signatures:
+            return []
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        return self.add_signature(article_id, signature)
+
+    def add_signature(self, article_id, signature):
+        """Index a precomputed signature and return its near-duplicates."""
+        candidates = set()
+        band_keys = list(self._band_keys(signature))
+        for key in band_keys:
+            bucket = self.buckets.get(key)
+            if isinstance(bucket, list):
+                candidates.update(bucket)
+            elif bucket is not None:
+                candidates.add(bucket)
+
+        found = []
+        for other_id in candidates:
+            score = self.similarity(signature, self.signatures[other_id])
+            if score >= self.threshold:
+                pair = tuple(sorted((article_id, other_id)))
+                self.matches[pair] = score
+                found.append((other_id, score))
+
+        self.signatures[article_id] = signature
+        for key in band_keys:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = article_id
+            elif isinstance(bucket, list):
+                bucket.append(article_id)
+            else:
+                self.buckets[key] = [bucket, article_id]
+        return found
+
+    def add_articles(self, articles):
+        """Index a list of article dicts, returns number of new duplicate pairs."""
+        before = len(self.matches)
+        for article in articles:
+            article_id = article.get("id")
+            if article_id is not None:
+                self.add(article_id, article_text(article))
+        return len(self.matches) - before
+
+    def clusters(self):
+        """Group matched pairs into duplicate clusters (union-find)."""
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b in self.matches:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        groups = {}
+        for a, b in self.matches:
+            groups.setdefault(find(a), []).append((a, b))
+
+        result = []
+        for root, pairs in groups.items():
+            ids = sorted({i for pair in pairs for i in pair})
+            scores = [self.matches[pair] for pair in pairs]
+            result.append(
+                {
+                    "representative_id": ids[0],
+                    "ids": ids,
+                    "size": len(ids),
+                    "min_similarity": round(min(scores), 3),
+                    "max_similarity": round(max(scores), 3),
+                    "pairs": [
+                        {"ids": list(pair), "similarity": round(self.matches[pair], 3)}
+                        for pair in sorted(pairs)
+                    ],
+                }
+            )
+
+        result.sort(key=lambda c: (-c["size"], c["representative_id"]))
+        return result
+
+    def save(self, path):
+        """Persist signatures so later runs can extend the index."""
+        data = {
+            "scheme": SIGNATURE_SCHEME,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "threshold": self.threshold,
+            "signatures": {
+                str(k): _pack_signature(v) for k, v in self.signatures.items()
+            },
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved index, rebuilding the LSH buckets from the signatures.
+
+        Raises ValueError for files written with another signature scheme.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("scheme") != SIGNATURE_SCHEME:
+            raise ValueError(f"Unsupported signature scheme in {path}")
+        index = cls(data["num_perm"], data["bands"], data["threshold"])
+        for key, signature in data["signatures"].items():
+            article_id = int(key) if key.isdigit() else key
+            index.add_signature(article_id, _unpack_signature(signature))
+        return index
+
+
+def save_duplicate_clusters(index, output_dir):
+    """Save near-duplicate clusters to JSON file."""
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        duplicates_file = os.path.join(output_dir, f"duplicates_{timestamp}.json")
+        clusters = index.clusters()
+
+        duplicates_data = {
+            "analysis_date": datetime.now().isoformat(),
+            "indexed_articles": len(index.signatures),
+            "similarity_threshold": index.threshold,
+            "total_clusters": len(clusters),
+            "duplicate_articles": sum(c["size"] - 1 for c in clusters),
+            "clusters": clusters,
+        }
+
+        with open(duplicates_file, "w", encoding="utf-8") as f:
+            json.dump(duplicates_data, f, ensure_ascii=False, indent=2)
+
+        print(
+            f"Near-duplicates: {len(clusters)} clusters "
+            f"({duplicates_data['duplicate_articles']} redundant articles)"
+        )
+        print(f"Duplicate clusters saved to: {duplicates_file}")
+        return duplicates_file
+
+    except Exception as e:
+        print(f"Error saving duplicate clusters: {e}")
+        return None
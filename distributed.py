@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""
+Multi-node distributed scanning with ID-range leases.
+The ID range is split into leases kept in a SQLite database on shared
+storage. Workers on any number of nodes claim leases, run the normal article
+extraction, write results to their own shard file and report found/missing
+bitmaps. IDs that failed are kept in a shared dead-letter table and retried by
+whichever worker runs out of leases first; recovered IDs are written back to
+their lease. Leases of crashed workers expire and are reclaimed. The merge
+step combines all shards into one dataset deduplicated by ID.
+
+Usage:
+    python distributed.py init --db /shared/scan.db --min-id 1 --max-id 60000
+    python distributed.py work --db /shared/scan.db --workers 20
+    python distributed.py status --db /shared/scan.db
+    python distributed.py merge --db /shared/scan.db --output content_all.json
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from analytics import iter_articles
+from article import dump_jsonl
+from dead_letters import TRANSIENT_FAILURES
+from serializer import dumps
+
+DEFAULT_LEASE_SIZE = 500
+DEFAULT_LEASE_TTL = 900  # seconds without heartbeat before a lease is reclaimed
+MAX_RENEW_BACKOFF = 60  # seconds between renewal attempts on database errors
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    lease_id INTEGER PRIMARY KEY,
+    start_id INTEGER NOT NULL,
+    end_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    found_count INTEGER,
+    missing_count INTEGER,
+    found_bitmap BLOB,
+    missing_bitmap BLOB,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS leases_status ON leases (status, expires_at);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    article_id INTEGER PRIMARY KEY,
+    lease_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    error TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 1,
+    owner TEXT,
+    expires_at REAL
+);
+"""
+
+
+def connect(db_path):
+    """Open the coordination database.
+
+    The default rollback journal is used on purpose - WAL mode does not work
+    on network filesystems, which is where the database usually lives.
+    """
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def make_bitmap(start_id, end_id, ids):
+    """Pack a set of IDs from [start_id, end_id] into a bitmap."""
+    bitmap = bytearray((end_id - start_id + 8) // 8)
+    for article_id in ids:
+        offset = article_id - start_id
+        bitmap[offset // 8] |= 1 << (offset % 8)
+    return bytes(bitmap)
+
+
+def _set_bit(bitmap, start_id, article_id):
+    bitmap = bytearray(bitmap)
+    offset = article_id - start_id
+    bitmap[offset // 8] |= 1 << (offset % 8)
+    return bytes(bitmap)
+
+
+def bitmap_ids(start_id, bitmap):
+    """Unpack the IDs stored in a bitmap."""
+    return [
+        start_id + byte_index * 8 + bit
+        for byte_index, byte in enumerate(bitmap or b"")
+        for bit in range(8)
+        if byte & (1 << bit)
+    ]
+
+
+def init_scan(db_path, min_id, max_id, lease_size=DEFAULT_LEASE_SIZE, shard_dir=None):
+    """Create leases covering [min_id, max_id], newest IDs first."""
+    shard_dir = shard_dir or os.path.join(
+        os.path.dirname(os.path.abspath(db_path)), "shards"
+    )
+    os.makedirs(shard_dir, exist_ok=True)
+
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]:
+            conn.execute("ROLLBACK")
+            print(f"Scan already initialized in {db_path}")
+            return False
+
+        leases = []
+        end_id = max_id
+        while end_id >= min_id:
+            start_id = max(min_id, end_id - lease_size + 1)
+            leases.append((start_id, end_id))
+            end_id = start_id - 1
+
+        conn.executemany("INSERT INTO leases (start_id, end_id) VALUES (?, ?)", leases)
+        conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("min_id", str(min_id)),
+                ("max_id", str(max_id)),
+                ("lease_size", str(lease_size)),
+                ("shard_dir", os.path.abspath(shard_dir)),
+            ],
+        )
+        conn.execute("COMMIT")
+        print(f"Initialized {len(leases)} leases for IDs {min_id}-{max_id}")
+        print(f"Shards directory: {shard_dir}")
+        return True
+    finally:
+        conn.close()
+
+
+def get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def claim_lease(conn, worker_id, lease_ttl=DEFAULT_LEASE_TTL):
+    """Claim the next pending (or expired) lease, returns (lease_id, start, end)."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT lease_id, start_id, end_id FROM leases "
+            "WHERE status = 'pending' OR (status = 'leased' AND expires_at < ?) "
+            "ORDER BY lease_id LIMIT 1",
+            (now,),
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE leases SET status = 'leased', owner = ?, expires_at = ?, "
+                "attempts = attempts + 1 WHERE lease_id = ?",
+                (worker_id, now + lease_ttl, row[0]),
+            )
+        conn.execute("COMMIT")
+        return row
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def renew_lease(conn, lease_id, worker_id, lease_ttl=DEFAULT_LEASE_TTL):
+    """Extend a lease we still own, returns False if it was lost."""
+    cursor = conn.execute(
+        "UPDATE leases SET expires_at = ? "
+        "WHERE lease_id = ? AND owner = ? AND status = 'leased'",
+        (time.time() + lease_ttl, lease_id, worker_id),
+    )
+    return cursor.rowcount == 1
+
+
+def complete_lease(
+    conn,
+    lease_id,
+    worker_id,
+    start_id,
+    end_id,
+    found_ids,
+    missing_ids,
+    failures=None,
+):
+    """Mark a lease done and store its found/missing bitmaps.
+
+    ``failures`` (ID -> dead-letter entry with kind, error and attempts) go to
+    the shared dead-letter table in the same transaction. Only the current
+    owner of an unexpired lease can complete it; returns False if the lease
+    was lost (expired and reclaimed by another worker).
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cursor = conn.execute(
+            "UPDATE leases SET status = 'done', expires_at = NULL, completed_at = ?, "
+            "found_count = ?, missing_count = ?, found_bitmap = ?, missing_bitmap = ? "
+            "WHERE lease_id = ? AND owner = ? AND status = 'leased' "
+            "AND expires_at >= ?",
+            (
+                now,
+                len(found_ids),
+                len(missing_ids),
+                make_bitmap(start_id, end_id, found_ids),
+                make_bitmap(start_id, end_id, missing_ids),
+                lease_id,
+                worker_id,
+                now,
+            ),
+        )
+        completed = cursor.rowcount == 1
+        if completed and failures:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dead_letters "
+                "(article_id, lease_id, kind, error, attempts) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (article_id, lease_id, e["kind"], e["error"], e["attempts"])
+                    for article_id, e in failures.items()
+                ],
+            )
+        conn.execute("COMMIT")
+        return completed
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def claim_dead_letters(conn, worker_id, kinds, lease_ttl=DEFAULT_LEASE_TTL):
+    """Claim the unclaimed (or expired) failed IDs of the given kinds.
+
+    Returns ID -> dead-letter entry; the claim is released by
+    resolve_dead_letters or expires after ``lease_ttl``.
+    """
+    now = time.time()
+    placeholders = ", ".join("?" * len(kinds))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT article_id, kind, error, attempts FROM dead_letters "
+            f"WHERE kind IN ({placeholders}) "
+            "AND (owner IS NULL OR expires_at < ?)",
+            (*kinds, now),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE dead_letters SET owner = ?, expires_at = ? WHERE article_id = ?",
+            [(worker_id, now + lease_ttl, row[0]) for row in rows],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return {
+        article_id: {"kind": kind, "error": error, "attempts": attempts}
+        for article_id, kind, error, attempts in rows
+    }
+
+
+def resolve_dead_letters(conn, worker_id, found_ids, missing_ids, failures):
+    """Report the outcome of retrying claimed IDs.
+
+    Found and missing IDs leave the dead-letter table and are added to the
+    bitmaps and counts of their lease; IDs in ``failures`` stay with updated
+    entries and are released for another retry. IDs whose claim was taken
+    over by another worker are left to it.
+    """
+    found_ids = set(found_ids)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for article_id in (*found_ids, *missing_ids):
+            row = conn.execute(
+                "SELECT l.lease_id, l.start_id, l.found_bitmap, l.missing_bitmap "
+                "FROM dead_letters d JOIN leases l ON l.lease_id = d.lease_id "
+                "WHERE d.article_id = ? AND d.owner = ?",
+                (article_id, worker_id),
+            ).fetchone()
+            if row is None:
+                continue
+            lease_id, start_id, found_bitmap, missing_bitmap = row
+            if article_id in found_ids:
+                conn.execute(
+                    "UPDATE leases SET found_count = found_count + 1, "
+                    "found_bitmap = ? WHERE lease_id = ?",
+                    (_set_bit(found_bitmap, start_id, article_id), lease_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE leases SET missing_count = missing_count + 1, "
+                    "missing_bitmap = ? WHERE lease_id = ?",
+                    (_set_bit(missing_bitmap, start_id, article_id), lease_id),
+                )
+            conn.execute(
+                "DELETE FROM dead_letters WHERE article_id = ?", (article_id,)
+            )
+        conn.executemany(
+            "UPDATE dead_letters SET kind = ?, error = ?, attempts = ?, "
+            "owner = NULL, expires_at = NULL WHERE article_id = ? AND owner = ?",
+            [
+                (e["kind"], e["error"], e["attempts"], article_id, worker_id)
+                for article_id, e in failures.items()
+            ],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class LeaseLost(Exception):
+    """The current lease could not be renewed and may belong to another worker."""
+
+
+class _LeaseHeartbeat(threading.Thread):
+    """Keeps the current lease alive while the worker is scanning it.
+
+    Database errors (e.g. "database is locked") are retried with backoff while
+    the lease is still valid. If it cannot be renewed, ``lost`` is set and the
+    worker stops instead of scanning a range another worker may now own.
+    """
+
+    def __init__(self, db_path, worker_id, lease_ttl):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.worker_id = worker_id
+        self.lease_ttl = lease_ttl
+        self.lease_id = None
+        self.lost = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            while not self._stop_event.wait(self.lease_ttl / 3):
+                lease_id = self.lease_id
+                if lease_id is not None and not self._renew(conn, lease_id):
+                    print(f"Lease {lease_id} was lost - stopping the worker")
+                    self.lost.set()
+                    return
+        finally:
+            conn.close()
+
+    def _renew(self, conn, lease_id):
+        # The last renewal was at most lease_ttl / 3 ago, so at least
+        # 2/3 of the TTL is left - stop retrying with a margin before that
+        deadline = time.monotonic() + self.lease_ttl / 2
+        delay = 1
+        while True:
+            try:
+                return renew_lease(conn, lease_id, self.worker_id, self.lease_ttl)
+            except sqlite3.OperationalError as e:
+                if time.monotonic() + delay >= deadline:
+                    print(f"Lease {lease_id} could not be renewed: {e}")
+                    return False
+                print(f"Lease {lease_id} renewal failed ({e}), retrying in {delay} s")
+                if self._stop_event.wait(delay):
+                    return True
+                delay = min(delay * 2, MAX_RENEW_BACKOFF)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def run_worker(
+    db_path,
+    max_workers=20,
+    lease_ttl=DEFAULT_LEASE_TTL,
+    worker_id=None,
+    scraper=None,
+    retry_passes=2,
+):
+    """Claim and scan leases until none are left.
+
+    IDs that fail (network errors, throttling, unparsable pages) are kept out
+    of the lease's missing bitmap and stored in the shared dead-letter table
+    when the lease completes. Once no leases are left, the transient failures
+    of all workers (including earlier runs) are claimed and retried in up to
+    ``retry_passes`` deferred passes; recovered and missing IDs are written
+    back to their lease, the rest stays queued for the next worker.
+    """
+    from scraper import ScanConfig, Scraper
+
+    if scraper is None:
+        scraper = Scraper()
+    worker_id = (
+        worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    )
+    conn = connect(db_path)
+    shard_dir = get_meta(conn, "shard_dir")
+    if not shard_dir:
+        print(f"Scan not initialized in {db_path}")
+        conn.close()
+        return 0
+    os.makedirs(shard_dir, exist_ok=True)
+    shard_path = os.path.join(shard_dir, f"{worker_id}.jsonl")
+
+    print(f"Worker {worker_id} started (workers: {max_workers})")
+    print(f"Writing results to {shard_path}")
+
+    def process(article_id):
+        if heartbeat.lost.is_set():
+            raise LeaseLost()
+        return scraper.process_id(article_id, defer_failures=True)
+
+    def append_to_shard(articles):
+        with open(shard_path, "a", encoding="utf-8") as f:
+            dump_jsonl(articles, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    scraper.set_max_workers(max_workers)
+    heartbeat = _LeaseHeartbeat(db_path, worker_id, lease_ttl)
+    heartbeat.start()
+    leases_done = 0
+    total_found = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while not heartbeat.lost.is_set():
+                lease = claim_lease(conn, worker_id, lease_ttl)
+                if not lease:
+                    break
+                lease_id, start_id, end_id = lease
+                heartbeat.lease_id = lease_id
+                print(f"\nLease {lease_id}: IDs {start_id}-{end_id}")
+
+                id_list = list(range(end_id, start_id - 1, -1))
+                try:
+                    results = list(executor.map(process, id_list))
+                except LeaseLost:
+                    # Left to whoever reclaims it - nothing is reported
+                    scraper.dead_letters.pop_all()
+                    break
+
+                found = [article for article in results if article]
+                found_ids = [article["id"] for article in found]
+                # Failed IDs are neither found nor missing - they wait for a retry
+                missing_ids = [
+                    article_id
+                    for article_id, article in zip(id_list, results)
+                    if not article and article_id not in scraper.dead_letters
+                ]
+                failures = scraper.dead_letters.pop_all()
+
+                # Results are durable before the lease is reported done
+                append_to_shard(found)
+
+                heartbeat.lease_id = None
+                if not complete_lease(
+                    conn,
+                    lease_id,
+                    worker_id,
+                    start_id,
+                    end_id,
+                    found_ids,
+                    missing_ids,
+                    failures,
+                ):
+                    # Another worker owns the range now; the shard merge drops
+                    # whatever both of us wrote
+                    print(f"Lease {lease_id} was lost before completion - skipped")
+                    continue
+                leases_done += 1
+                total_found += len(found)
+                print(
+                    f"Lease {lease_id} done: {len(found_ids)} found, "
+                    f"{len(missing_ids)} missing, {len(failures)} failed "
+                    f"(Total: {total_found})"
+                )
+
+        claimed = {}
+        if retry_passes and not heartbeat.lost.is_set():
+            claimed = claim_dead_letters(conn, worker_id, TRANSIENT_FAILURES, lease_ttl)
+        if claimed:
+            scraper.dead_letters.merge(claimed)
+            config = ScanConfig(
+                int(get_meta(conn, "min_id")),
+                int(get_meta(conn, "max_id")),
+                max_workers=max_workers,
+                retry_passes=retry_passes,
+            )
+            recovered = list(scraper.retry_dead_letters(config, None))
+            append_to_shard(recovered)
+            total_found += len(recovered)
+            failures = scraper.dead_letters.pop_all()
+            found_ids = {article["id"] for article in recovered}
+            missing_ids = [
+                article_id
+                for article_id in claimed
+                if article_id not in found_ids and article_id not in failures
+            ]
+            resolve_dead_letters(conn, worker_id, found_ids, missing_ids, failures)
+            if failures:
+                print(f"{len(failures)} IDs still failing - left in the lease database")
+    finally:
+        heartbeat.stop()
+        conn.close()
+
+    print(
+        f"\nWorker {worker_id} finished: {leases_done} leases, {total_found} articles"
+    )
+    return leases_done
+
+
+def scan_status(db_path):
+    """Return and print lease progress."""
+    conn = connect(db_path)
+    try:
+        now = time.time()
+        counts = dict(
+            conn.execute(
+                "SELECT CASE WHEN status = 'leased' AND expires_at < ? "
+                "THEN 'expired' ELSE status END, COUNT(*) FROM leases GROUP BY 1",
+                (now,),
+            ).fetchall()
+        )
+        found, missing = conn.execute(
+            "SELECT COALESCE(SUM(found_count), 0), COALESCE(SUM(missing_count), 0) "
+            "FROM leases WHERE status = 'done'"
+        ).fetchone()
+        owners = conn.execute(
+            "SELECT owner, COUNT(*) FROM leases WHERE status = 'done' GROUP BY owner"
+        ).fetchall()
+        failed = dict(
+            conn.execute("SELECT kind, COUNT(*) FROM dead_letters GROUP BY kind")
+        )
+    finally:
+        conn.close()
+
+    total = sum(counts.values())
+    print(f"Leases: {total} total")
+    for status in ("pending", "leased", "expired", "done"):
+        print(f"  {status}: {counts.get(status, 0)}")
+    print(f"Articles found: {found}, missing IDs: {missing}")
+    if failed:
+        summary = ", ".join(f"{kind}: {count}" for kind, count in sorted(failed.items()))
+        print(f"Failed IDs waiting for a retry: {sum(failed.values())} ({summary})")
+    for owner, done in owners:
+        print(f"  {owner}: {done} leases")
+    return {
+        "leases": counts,
+        "found": found,
+        "missing": missing,
+        "failed": failed,
+    }
+
+
+def merge_shards(db_path, output_path):
+    """Merge all worker shards into one JSON dataset deduplicated by ID."""
+    conn = connect(db_path)
+    try:
+        shard_dir = get_meta(conn, "shard_dir")
+    finally:
+        conn.close()
+
+    shard_files = sorted(
+        os.path.join(shard_dir, name)
+        for name in os.listdir(shard_dir)
+        if name.endswith(".jsonl")
+    )
+
+    seen_ids = set()
+    duplicates = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write("[")
+        for shard_file in shard_files:
+            for article in iter_articles(shard_file):
+                article_id = article.get("id")
+                if article_id in seen_ids:
+                    duplicates += 1
+                    continue
+                seen_ids.add(article_id)
+                out.write(",\n" if len(seen_ids) > 1 else "\n")
+                out.write(dumps(article).decode("utf-8"))
+        out.write("\n]\n")
+    os.replace(tmp_path, output_path)
+
+    print(
+        f"Merged {len(shard_files)} shards into {output_path}: "
+        f"{len(seen_ids)} articles (Skipped {duplicates} duplicates)"
+    )
+    return len(seen_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed Protext.cz ID scanning")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = subparsers.add_parser("init", help="split an ID range into leases")
+    init_parser.add_argument("--db", required=True, help="shared SQLite database")
+    init_parser.add_argument("--min-id", type=int, default=1)
+    init_parser.add_argument(
+        "--max-id", type=int, help="default: newest ID from the RSS feed"
+    )
+    init_parser.add_argument("--lease-size", type=int, default=DEFAULT_LEASE_SIZE)
+    init_parser.add_argument("--shards", help="shard directory (default: next to db)")
+
+    work_parser = subparsers.add_parser("work", help="claim and scan leases")
+    work_parser.add_argument("--db", required=True)
+    work_parser.add_argument("--workers", type=int, default=20)
+    work_parser.add_argument("--lease-ttl", type=int, default=DEFAULT_LEASE_TTL)
+    work_parser.add_argument("--worker-id")
+    work_parser.add_argument(
+        "--base-url", help="site to scan (e.g. a local mock_server.py instance)"
+    )
+    work_parser.add_argument("--no-tor", action="store_true", help="connect directly")
+    work_parser.add_argument(
+        "--hedge", action="store_true", help="duplicate slow requests (see Scraper)"
+    )
+    work_parser.add_argument("--log-level", default="INFO")
+    work_parser.add_argument("--log-file", help="JSON lines log file")
+
+    status_parser = subparsers.add_parser("status", help="show lease progress")
+    status_parser.add_argument("--db", required=True)
+
+    merge_parser = subparsers.add_parser("merge", help="merge shards into a dataset")
+    merge_parser.add_argument("--db", required=True)
+    merge_parser.add_argument("--output", required=True)
+
+    args = parser.parse_args()
+
+    if args.command == "init":
+        max_id = args.max_id
+        if max_id is None:
+            from scraper import fetch_latest_rss_articles
+
+            max_id, _ = fetch_latest_rss_articles()
+            if not max_id:
+                print("Could not determine latest article ID, use --max-id")
+                return
+        init_scan(args.db, args.min_id, max_id, args.lease_size, args.shards)
+    elif args.command == "work":
+        from scraper import BASE_URL, Scraper
+        from structured_log import configure_logging
+
+        configure_logging(args.log_level.upper(), args.log_file)
+
+        scraper = Scraper(
+            use_tor=not args.no_tor,
+            base_url=args.base_url or BASE_URL,
+            hedge=args.hedge,
+        )
+        run_worker(args.db, args.workers, args.lease_ttl, args.worker_id, scraper)
+    elif args.command == "status":
+        scan_status(args.db)
+    elif args.command == "merge":
+        merge_shards(args.db, args.output)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nBye!")
+        exit(0)
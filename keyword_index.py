@@ -0,0 +1,149 @@
+"""
+Keyword tokenization and keyword indexes.
+Raw Protext keyword strings ("Protext-ČR-zdraví-farmacie") are split into
+normalized tokens at extraction time, and a keyword -> article ID index plus a
+sparse keyword co-occurrence matrix are maintained incrementally next to the
+dataset.
+"""
+
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+
+# Source marker present on every release - carries no information
+IGNORED_KEYWORDS = {"protext"}
+
+_KEYWORD_SEPARATORS_RE = re.compile(r"\s*[-–—,;]\s*")
+
+
+def tokenize_keywords(keywords_text):
+    """Split a raw keywords string into a list of normalized, unique tokens."""
+    if not keywords_text:
+        return []
+
+    tokens = []
+    seen = set()
+    for token in _KEYWORD_SEPARATORS_RE.split(keywords_text):
+        token = unicodedata.normalize("NFC", token).strip().lower()
+        token = re.sub(r"\s+", " ", token)
+        if not token or token in IGNORED_KEYWORDS or token in seen:
+            continue
+        seen.add(token)
+        tokens.append(token)
+    return tokens
+
+
+def article_keyword_tokens(article):
+    """Keyword tokens of an article, tokenizing the raw string if needed."""
+    tokens = article.get("keyword_tokens")
+    if tokens is None:
+        tokens = tokenize_keywords(article.get("keywords"))
+    return tokens
+
+
+class KeywordIndex:
+    """Keyword -> article IDs postings with a sparse co-occurrence matrix."""
+
+    def __init__(self):
+        self.postings = {}  # keyword -> set of article IDs
+        self.cooccurrence = {}  # keyword -> Counter of co-occurring keywords
+        self.article_tokens = {}  # article ID -> tokens currently indexed
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.article_tokens)
+
+    def _remove(self, article_id):
+        tokens = self.article_tokens.pop(article_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(article_id)
+                if not ids:
+                    del self.postings[token]
+            row = self.cooccurrence.get(token)
+            if row is None:
+                continue
+            for other in tokens:
+                if other == token:
+                    continue
+                row[other] -= 1
+                if row[other] <= 0:
+                    del row[other]
+            if not row:
+                del self.cooccurrence[token]
+
+    def add(self, article_id, tokens):
+        """Index (or re-index) one article's keyword tokens."""
+        tokens = list(dict.fromkeys(tokens))
+        if self.article_tokens.get(article_id) == tokens:
+            return False
+        self._remove(article_id)
+        self._dirty = True
+        if not tokens:
+            return True
+
+        self.article_tokens[article_id] = tokens
+        for token in tokens:
+            self.postings.setdefault(token, set()).add(article_id)
+            row = self.cooccurrence.setdefault(token, Counter())
+            for other in tokens:
+                if other != token:
+                    row[other] += 1
+        return True
+
+    def add_articles(self, articles):
+        """Index a list of article dicts, returns number of changed entries."""
+        changed = 0
+        for article in articles:
+            article_id = article.get("id")
+            if article_id is not None:
+                changed += self.add(article_id, article_keyword_tokens(article))
+        return changed
+
+    def articles_tagged(self, keyword):
+        """Sorted IDs of all articles tagged with a keyword."""
+        token = unicodedata.normalize("NFC", keyword).strip().lower()
+        return sorted(self.postings.get(token, ()))
+
+    def top_cooccurring(self, keyword, limit=10):
+        """Most frequent keywords appearing together with a keyword."""
+        token = unicodedata.normalize("NFC", keyword).strip().lower()
+        return self.cooccurrence.get(token, Counter()).most_common(limit)
+
+    def top_keywords(self, limit=10):
+        """Keywords with the most tagged articles."""
+        counts = ((token, len(ids)) for token, ids in self.postings.items())
+        return sorted(counts, key=lambda x: x[1], reverse=True)[:limit]
+
+    def save(self, path):
+        """Write the index as JSON if it changed since the last save."""
+        if not self._dirty:
+            return
+        data = {
+            "articles": {str(k): v for k, v in self.article_tokens.items()},
+            "postings": {k: sorted(v) for k, v in self.postings.items()},
+            "cooccurrence": {k: dict(v) for k, v in self.cooccurrence.items()},
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved by save()."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls()
+        index.article_tokens = {
+            int(k) if k.isdigit() else k: v for k, v in data["articles"].items()
+        }
+        index.postings = {k: set(v) for k, v in data["postings"].items()}
+        index.cooccurrence = {k: Counter(v) for k, v in data["cooccurrence"].items()}
+        return index
@@ -0,0 +1,339 @@
+"""
+Scan metrics: counters, gauges and latency histograms.
+Instrumented code updates the module-level metrics below; MetricsExporter
+publishes them as Prometheus text over HTTP (/metrics) and/or as a JSON file
+rewritten periodically, including per-second rates for throughput alerts.
+Snapshots are plain dicts, so worker processes can ship theirs to the writer
+process to be summed (see merge_snapshots).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+)  # fmt: skip
+
+DEFAULT_EXPORT_INTERVAL = 10  # seconds
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self._values = {}
+
+    def snapshot(self):
+        with self._lock:
+            values = [[dict(key), value] for key, value in self._values.items()]
+        return {"type": self.kind, "help": self.help, "values": values}
+
+
+class Counter(_Metric):
+    """Monotonic count, optionally split by labels."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_key(labels), 0)
+
+
+class Gauge(Counter):
+    """Value that goes up and down (queue depth, active workers)."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Latency distribution in cumulative buckets (seconds)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, lock, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, lock)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._values[key] = entry
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            values = [
+                [dict(key), dict(entry, counts=list(entry["counts"]))]
+                for key, entry in self._values.items()
+            ]
+        return {
+            "type": self.kind,
+            "help": self.help,
+            "buckets": list(self.buckets),
+            "values": values,
+        }
+
+
+class MetricsRegistry:
+    """Named metrics of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text, self._lock))
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge(name, help_text, self._lock))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, self._lock, buckets))
+
+    def snapshot(self):
+        """All metrics as a JSON-serializable dict."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+def merge_snapshots(snapshots):
+    """Sum snapshots of several processes into one."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, dict(metric, values=[]))
+            for labels, value in metric["values"]:
+                for existing in target["values"]:
+                    if existing[0] == labels:
+                        if metric["type"] == "histogram":
+                            entry = existing[1]
+                            entry["counts"] = [
+                                a + b for a, b in zip(entry["counts"], value["counts"])
+                            ]
+                            entry["sum"] += value["sum"]
+                            entry["count"] += value["count"]
+                        else:
+                            existing[1] += value
+                        break
+                else:
+                    if metric["type"] == "histogram":
+                        value = dict(value, counts=list(value["counts"]))
+                    target["values"].append([labels, value])
+    return merged
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render_prometheus(snapshot):
+    """Prometheus text exposition format of a snapshot."""
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in metric["values"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            for bound, count in zip(metric["buckets"], value["counts"]):
+                bucket_labels = _format_labels(labels, {"le": bound})
+                lines.append(f"{name}_bucket{bucket_labels} {count}")
+            inf_labels = _format_labels(labels, {"le": "+Inf"})
+            lines.append(f"{name}_bucket{inf_labels} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def counter_totals(snapshot):
+    """Counter name -> value summed over all labels."""
+    return {
+        name: sum(value for _, value in metric["values"])
+        for name, metric in snapshot.items()
+        if metric["type"] == "counter"
+    }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus(self.server.collect()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """Publish metrics over HTTP and/or to a periodically rewritten JSON file.
+
+    ``collect`` returns the snapshot to publish (default: REGISTRY.snapshot).
+    """
+
+    def __init__(
+        self,
+        json_path=None,
+        port=None,
+        interval=DEFAULT_EXPORT_INTERVAL,
+        collect=None,
+    ):
+        self.json_path = json_path
+        self.port = port
+        self.interval = interval
+        self.collect = collect or REGISTRY.snapshot
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._httpd = None
+        self._last_totals = None
+        self._last_time = None
+
+    def write_json(self):
+        """Write the current snapshot with per-second counter rates."""
+        snapshot = self.collect()
+        now = time.monotonic()
+        totals = counter_totals(snapshot)
+        rates = {}
+        if self._last_totals is not None and now > self._last_time:
+            elapsed = now - self._last_time
+            rates = {
+                name: round((value - self._last_totals.get(name, 0)) / elapsed, 3)
+                for name, value in totals.items()
+            }
+        self._last_totals, self._last_time = totals, now
+
+        data = {
+            "updated": datetime.now().isoformat(),
+            "rates_per_second": rates,
+            "metrics": snapshot,
+        }
+        tmp_path = self.json_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.json_path)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write_json()
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+
+    def start(self):
+        if self.port is not None:
+            self._httpd = ThreadingHTTPServer(("0.0.0.0", self.port), _MetricsHandler)
+            self._httpd.daemon_threads = True
+            self._httpd.collect = self.collect
+            threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+            print(f"Metrics available at http://localhost:{self.port}/metrics")
+        if self.json_path:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop publishing; the JSON file gets a final update."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            try:
+                self.write_json()
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter(
+    "protext_requests_total", "HTTP responses by status code (error = no response)"
+)
+RETRIES = REGISTRY.counter(
+    "protext_retries_total", "Request attempts that were retried"
+)
+TOR_RENEWALS = REGISTRY.counter("protext_tor_renewals_total", "Tor circuit renewals")
+BYTES_DOWNLOADED = REGISTRY.counter(
+    "protext_bytes_downloaded_total", "Response body bytes read"
+)
+ARTICLES = REGISTRY.counter(
+    "protext_ids_total",
+    "Processed IDs by result (found, missing, filtered, duplicate, deferred)",
+)
+FETCH_FAILURES = REGISTRY.counter(
+    "protext_fetch_failures_total",
+    "IDs deferred for a retry pass by failure class (network, throttled, parse)",
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "protext_stage_seconds", "Time spent per stage (fetch, decode, parse, dedup, save)"
+)
+QUEUE_DEPTH = REGISTRY.gauge("protext_queue_depth", "IDs submitted but not finished")
+HEDGED_REQUESTS = REGISTRY.counter(
+    "protext_hedged_requests_total",
+    "Duplicate requests sent for slow requests by outcome (won, lost)",
+)
+PARSE_CACHE = REGISTRY.counter(
+    "protext_parse_cache_total",
+    "Parse-result cache lookups and evictions (hit, miss, eviction)",
+)
+ACTIVE_WORKERS = REGISTRY.gauge(
+    "protext_active_workers", "Worker threads currently processing an ID"
+)
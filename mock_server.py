@@ -0,0 +1,381 @@
+"""
+Local mock of the Protext.cz endpoints used by the scraper.
+Serves zprava.php?id= and rss/cz.php either from a fixture directory
+(<id>.html, rss.xml) or as deterministic synthetic pages, and can inject
+latency, 429/403/503 responses with Retry-After, missing IDs and slow tails.
+Scans, retries and backoff can then be load-tested offline:
+
+    python mock_server.py --port 8000 --latency lognormal:-3,0.5 --error 429=0.01
+
+    scraper = Scraper(use_tor=False, base_url="http://127.0.0.1:8000", delay_scale=0)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+CATEGORIES_FILE = os.path.join(os.path.dirname(__file__), "data", "categories.json")
+
+MONTHS_GENITIVE = [
+    "ledna",
+    "února",
+    "března",
+    "dubna",
+    "května",
+    "června",
+    "července",
+    "srpna",
+    "září",
+    "října",
+    "listopadu",
+    "prosince",
+]
+CITIES = ["Praha", "Brno", "Ostrava", "Plzeň", "Olomouc", "Liberec"]
+WORDS = [
+    "společnost", "trh", "zákazníci", "investice", "rozvoj", "projekt",
+    "technologie", "služby", "výsledky", "region", "spolupráce", "inovace",
+    "výroba", "energie", "zdraví", "vzdělávání", "kultura", "doprava",
+    "růst", "tržby", "partneři", "strategie", "udržitelnost", "digitalizace",
+]  # fmt: skip
+
+# Synthetic dates: the newest ID is published on ANCHOR_DATE, ~25 releases a day
+ANCHOR_DATE = date(2025, 10, 10)
+ARTICLES_PER_DAY = 25
+
+
+def _load_categories():
+    try:
+        with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return ["Bez kategorie"]
+
+
+def parse_latency(spec):
+    """Parse a latency spec into a sampling function (seconds).
+
+    "0.05" (fixed), "uniform:LOW,HIGH" or "lognormal:MU,SIGMA".
+    """
+    kind, _, params = spec.partition(":")
+    if not params:
+        value = float(kind)
+        return lambda rng: value
+    values = [float(v) for v in params.split(",")]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server."""
+
+    min_id: int = 1
+    max_id: int = 60000
+    fixtures_dir: Optional[str] = None
+    missing_rate: float = 0.1  # share of IDs in the range that do not exist
+    missing_status: int = 404
+    latency: str = "0"
+    slow_tail_rate: float = 0.0  # share of responses trickled out slowly
+    slow_tail_delay: float = 2.0  # seconds to trickle one slow response
+    error_rates: dict = field(default_factory=dict)  # status -> probability
+    retry_after: int = 1
+    rss_items: int = 20
+    seed: int = 0
+
+
+class MockProtext:
+    """Page generation and fault injection, independent of the HTTP layer."""
+
+    def __init__(self, config):
+        self.config = config
+        self.categories = _load_categories()
+        self.sample_latency = parse_latency(config.latency)
+        self.stats = Counter()
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def _random(self):
+        with self._lock:
+            return self._rng.random(), self.sample_latency(self._rng)
+
+    def is_missing(self, article_id):
+        """Deterministic: the same ID is always missing or always present."""
+        if not self.config.min_id <= article_id <= self.config.max_id:
+            return True
+        digest = hashlib.sha256(f"{self.config.seed}:{article_id}".encode()).digest()
+        return int.from_bytes(digest[:8], "big") / 2**64 < self.config.missing_rate
+
+    def article_date(self, article_id):
+        days = (self.config.max_id - article_id) // ARTICLES_PER_DAY
+        return ANCHOR_DATE - timedelta(days=days)
+
+    def article_page(self, article_id):
+        """Synthetic article HTML with the structure the extractor expects."""
+        rng = random.Random(article_id * 7919 + self.config.seed)
+        category = self.categories[article_id % len(self.categories)]
+        published = self.article_date(article_id)
+        city = rng.choice(CITIES)
+        title_words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12)))
+        title = f"Tisková zpráva {article_id}: {title_words}"
+
+        paragraphs = []
+        for _ in range(rng.randint(3, 30)):
+            sentences = []
+            for _ in range(rng.randint(2, 6)):
+                words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+                sentences.append(" ".join(words).capitalize() + ".")
+            paragraphs.append(f"<p>{' '.join(sentences)}</p>")
+        month = MONTHS_GENITIVE[published.month - 1]
+        dateline = f"{city} {published.day}. {month} {published.year} (PROTEXT)"
+
+        keywords = "-".join(["Protext", "ČR"] + rng.sample(WORDS, rng.randint(2, 5)))
+        return f"""<!DOCTYPE html>
+<html lang="cs"><head><meta charset="utf-8"><title>{title} | Protext</title>
+<script>var tracking = true;</script></head>
+<body><header><nav>Protext.cz - Tiskové zprávy</nav></header>
+<div class="omega seven columns">
+<span itemprop="about">{category}</span>
+<h1 itemprop="name headline">{title}</h1>
+<p itemprop="datePublished">{dateline}</p>
+<div id="articlebody" itemprop="articleBody">
+{"".join(paragraphs)}
+<p class="note">Zprávu zpracovala agentura ČTK.</p>
+</div>
+<p>Klíčová slova {keywords}</p>
+</div>
+<footer>© ČTK</footer></body></html>
+""".encode("utf-8")
+
+    def rss_feed(self):
+        """RSS with the newest existing IDs (links point at the real site)."""
+        items = []
+        article_id = self.config.max_id
+        while len(items) < self.config.rss_items and article_id >= self.config.min_id:
+            if not self.is_missing(article_id):
+                items.append(
+                    "<item><title>Tisková zpráva</title>"
+                    f"<link>https://www.protext.cz/zprava.php?id={article_id}</link>"
+                    "</item>"
+                )
+            article_id -= 1
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<rss version="2.0"><channel><title>Protext</title>'
+            + "".join(items)
+            + "</channel></rss>"
+        ).encode("utf-8")
+
+    def _fixture(self, name):
+        if not self.config.fixtures_dir:
+            return None
+        path = os.path.join(self.config.fixtures_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def respond(self, path, query):
+        """Decide a response: (status, headers, body, delay, trickle_seconds)."""
+        roll, delay = self._random()
+        trickle = 0.0
+
+        # Injected errors take priority, then slow tails
+        threshold = 0.0
+        for status, rate in sorted(self.config.error_rates.items()):
+            threshold += rate
+            if roll < threshold:
+                headers = {}
+                if status in (429, 503):
+                    headers["Retry-After"] = str(self.config.retry_after)
+                return status, headers, b"", delay, 0.0
+        if roll < threshold + self.config.slow_tail_rate:
+            trickle = self.config.slow_tail_delay
+
+        html = {"Content-Type": "text/html; charset=utf-8"}
+        if path.endswith("/rss/cz.php"):
+            body = self._fixture("rss.xml") or self.rss_feed()
+            return 200, {"Content-Type": "application/rss+xml"}, body, delay, trickle
+
+        if path.endswith("/zprava.php"):
+            try:
+                article_id = int(query.get("id", [""])[0])
+            except ValueError:
+                return 400, html, b"Bad id", delay, 0.0
+            if self.config.fixtures_dir:
+                body = self._fixture(f"{article_id}.html")
+            elif not self.is_missing(article_id):
+                body = self.article_page(article_id)
+            else:
+                body = None
+            if body is None:
+                return self.config.missing_status, html, b"", delay, 0.0
+            return 200, html, body, delay, trickle
+
+        return 404, html, b"Not found", delay, 0.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        mock = self.server.mock
+        parts = urlsplit(self.path)
+        if parts.path == "/__stats":
+            body = json.dumps(mock.stats).encode("utf-8")
+            status, headers, delay, trickle = 200, {}, 0.0, 0.0
+        else:
+            status, headers, body, delay, trickle = mock.respond(
+                parts.path, parse_qs(parts.query)
+            )
+            with mock._lock:
+                mock.stats[str(status)] += 1
+                mock.stats["requests"] += 1
+
+        if delay > 0:
+            time.sleep(delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if trickle <= 0:
+            self.wfile.write(body)
+            return
+        pieces = 8
+        size = math.ceil(len(body) / pieces) or 1
+        for start in range(0, len(body), size):
+            self.wfile.write(body[start : start + size])
+            self.wfile.flush()
+            time.sleep(trickle / pieces)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients abort downloads on purpose (category filter, timeouts)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockProtextServer:
+    """Threaded HTTP server around MockProtext, usable as a context manager."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.mock = MockProtext(config or MockConfig())
+        self.httpd = _HTTPServer((host, port), _Handler)
+        self.httpd.mock = self.mock
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        return dict(self.mock.stats)
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _parse_error(value):
+    status, _, rate = value.partition("=")
+    return int(status), float(rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock Protext.cz server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--min-id", type=int, default=1)
+    parser.add_argument("--max-id", type=int, default=60000)
+    parser.add_argument("--fixtures", help="directory with <id>.html and rss.xml")
+    parser.add_argument("--missing-rate", type=float, default=0.1)
+    parser.add_argument("--missing-status", type=int, default=404)
+    parser.add_argument(
+        "--latency",
+        default="0",
+        help='"0.05", "uniform:0.01,0.2" or "lognormal:MU,SIGMA" (seconds)',
+    )
+    parser.add_argument(
+        "--error",
+        action="append",
+        type=_parse_error,
+        default=[],
+        metavar="STATUS=RATE",
+        help="inject an error status with a probability, e.g. 429=0.01",
+    )
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument(
+        "--slow-tail",
+        metavar="RATE,SECONDS",
+        help="trickle this share of responses over SECONDS, e.g. 0.01,2",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        min_id=args.min_id,
+        max_id=args.max_id,
+        fixtures_dir=args.fixtures,
+        missing_rate=args.missing_rate,
+        missing_status=args.missing_status,
+        latency=args.latency,
+        error_rates=dict(args.error),
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    if args.slow_tail:
+        rate, seconds = args.slow_tail.split(",")
+        config.slow_tail_rate = float(rate)
+        config.slow_tail_delay = float(seconds)
+
+    server = MockProtextServer(config, args.host, args.port)
+    print(f"Mock Protext server on {server.base_url} (IDs {args.min_id}-{args.max_id})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nRequests served: {server.stats}")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
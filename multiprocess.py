@@ -0,0 +1,512 @@
+"""
+Multi-process scanner mode.
+A single Python process is GIL-bound in BeautifulSoup parsing, content
+cleaning and JSON serialization. This mode splits the ID range into chunks
+handed out to N worker processes, each with its own thread pool for I/O. All
+workers draw from one shared request budget, and a single writer process
+deduplicates by ID and saves through the normal DatasetWriter, so the output
+files are the same as in single-process mode. Workers count the hit rates of
+their chunks and the writer merges them into block_stats.json. Categories
+learned by the workers are shipped with their results too, so the writer is
+the only process writing category_cache.json. The IDs of a chunk whose worker
+failed go to the dead-letter queue for the retry passes.
+
+Chunks are handed out on demand, a few per worker ahead. In priority order
+every chunk is ranked with the hit rates reported so far, and with a time
+limit no chunks are handed out after it.
+"""
+
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analytics import iter_articles
+from metrics import QUEUE_DEPTH, REGISTRY, MetricsExporter, merge_snapshots
+from profiling import Profiler
+from date_index import DATE_INDEX_FILE, DateIndex
+from dead_letters import FAILURE_NETWORK, DeadLetterQueue
+from scheduler import BLOCK_STATS_FILE, BlockStats
+from scraper import (
+    CATEGORY_CACHE_FILE,
+    DEAD_LETTERS_FILE,
+    METRICS_FILE,
+    STATUS_FILE,
+    DatasetWriter,
+    ScanConfig,
+    Scraper,
+)
+from status import StatusMonitor
+from transport import HedgedTransport
+from structured_log import ProgressReporter, attach_queue, logger, process_log_queue
+
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_REQUESTS_PER_SECOND = 30
+
+CHUNKS_AHEAD = 2  # queued chunks per worker process
+
+_WORKER_DONE = "__worker_done__"
+_CHUNK_LOST = "__chunk_lost__"
+_FEEDER_STOP = "__feeder_stop__"
+
+
+class SharedRateLimiter:
+    """Request budget (requests per second) shared by all worker processes."""
+
+    def __init__(self, requests_per_second, context=mp):
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = context.Value("d", 0.0, lock=False)
+        self._lock = context.Lock()
+
+    def acquire(self):
+        """Block until the next request slot."""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _ChunkFeeder(threading.Thread):
+    """Hand out ID chunks to the workers as they finish (parent process).
+
+    ``next_chunk`` returns the next list of IDs (empty when done). Every
+    finished chunk is reported on ``feedback_queue`` with its block counts,
+    which are merged into ``stats`` (the scheduler's statistics) before the
+    next chunk is picked. ``chunks`` keeps every handed out chunk by index so
+    the chunk of a dead worker can be recovered.
+    """
+
+    def __init__(
+        self, task_queue, feedback_queue, next_chunk, processes, stats, deadline
+    ):
+        super().__init__(daemon=True)
+        self.task_queue = task_queue
+        self.feedback_queue = feedback_queue
+        self.next_chunk = next_chunk
+        self.processes = processes
+        self.stats = stats
+        self.deadline = deadline
+        self.chunks = []
+
+    def run(self):
+        in_flight = 0
+        while True:
+            while in_flight < CHUNKS_AHEAD * self.processes:
+                if self.deadline is not None and time.time() > self.deadline:
+                    print(
+                        f"\nTime limit reached after {len(self.chunks)} chunks - "
+                        "no new chunks are handed out"
+                    )
+                    self._finish()
+                    return
+                chunk = self.next_chunk()
+                if not chunk:
+                    self._finish()
+                    return
+                self.chunks.append(chunk)
+                self.task_queue.put((len(self.chunks) - 1, chunk))
+                in_flight += 1
+            blocks = self.feedback_queue.get()
+            if blocks == _FEEDER_STOP:
+                return
+            in_flight -= 1
+            if self.stats is not None:
+                self.stats.merge(blocks)
+
+    def _finish(self):
+        for _ in range(self.processes):
+            self.task_queue.put(None)
+
+
+def _worker_main(
+    task_queue,
+    result_queue,
+    feedback_queue,
+    rate_limiter,
+    max_workers,
+    selected_categories,
+    output_dir,
+    scraper_options,
+    log_queue,
+    log_level,
+    profile,
+    current_chunk,
+    done_reported,
+):
+    """Worker process: fetch ID chunks with a thread pool, send back articles.
+
+    ``current_chunk`` holds the index of the chunk being scanned (-1 between
+    chunks) and ``done_reported`` is set once _WORKER_DONE is queued, so the
+    parent only stands in for workers that died before reporting.
+    """
+    if log_queue is not None:
+        attach_queue(log_queue, log_level)
+    profiler = None
+    scraper = None
+    cache_path = os.path.join(output_dir, CATEGORY_CACHE_FILE)
+    block_stats = BlockStats()
+
+    def process(article_id):
+        return scraper.process_id(article_id, selected_categories, defer_failures=True)
+
+    chunk = None
+    try:
+        profiler = Profiler().start() if profile else None
+        scraper = Scraper(rate_limiter=rate_limiter, **scraper_options)
+        scraper.set_max_workers(max_workers)
+        # Read only here - the writer saves what the workers learn
+        scraper.category_cache.load(cache_path)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                task = task_queue.get()
+                if task is None:
+                    break
+                current_chunk.value, chunk = task
+                found = [article for article in executor.map(process, chunk) if article]
+                # Counted before the failures are shipped - they are not answers
+                scraper.record_blocks(block_stats, chunk, found)
+                blocks = block_stats.pop_all()
+                categories = {}
+                for article_id in chunk:
+                    category = scraper.category_cache.get(article_id)
+                    if category is not None:
+                        categories[article_id] = category
+                # Cumulative metrics of this process, summed by the writer
+                result_queue.put(
+                    (
+                        len(chunk),
+                        found,
+                        scraper.dead_letters.pop_all(),
+                        blocks,
+                        categories,
+                        os.getpid(),
+                        REGISTRY.snapshot(),
+                    )
+                )
+                current_chunk.value = -1
+                # Releases the next chunk, ranked with these counts
+                feedback_queue.put(blocks)
+    finally:
+        if current_chunk.value >= 0:
+            # Aborted mid-chunk - its IDs are retried instead of being dropped
+            result_queue.put((_CHUNK_LOST, chunk))
+            current_chunk.value = -1
+        if scraper is not None:
+            if isinstance(scraper.transport, HedgedTransport):
+                scraper.transport.print_summary()
+            if scraper.parse_cache is not None:
+                scraper.parse_cache.print_summary()
+        if profiler is not None:
+            profiler.finish(output_dir, f"profile_worker{os.getpid()}", summary=False)
+        result_queue.put(_WORKER_DONE)
+        done_reported.set()
+
+
+def _writer_main(
+    result_queue,
+    output_dir,
+    filename,
+    rescan,
+    save_frequency,
+    processes,
+    total_ids,
+    metrics_port,
+    live_status,
+    log_queue,
+    log_level,
+    profile,
+    rate_limiter,
+    scraper_options,
+    retry_config,
+    deadline,
+):
+    """Writer process: deduplicate by ID and save through DatasetWriter.
+
+    Once all workers are done it runs the deferred retry passes over the
+    dead-letter queue itself, drawing from the same shared request budget
+    (unless the time limit has passed).
+    """
+    if log_queue is not None:
+        attach_queue(log_queue, log_level)
+    profiler = Profiler().start() if profile else None
+    writer = DatasetWriter(output_dir, filename, rescan)
+    dead_letters = DeadLetterQueue()
+    dead_letters_path = os.path.join(output_dir, DEAD_LETTERS_FILE)
+    dead_letters.load(dead_letters_path)
+    date_index = DateIndex()
+    date_index_path = os.path.join(output_dir, DATE_INDEX_FILE)
+    date_index.load(date_index_path)
+    block_stats = BlockStats()
+    block_stats_path = os.path.join(output_dir, BLOCK_STATS_FILE)
+    block_stats.load(block_stats_path)
+    seen_ids = set()
+    processed = 0
+    finished_workers = 0
+
+    worker_metrics = {}
+
+    def collect():
+        return merge_snapshots([REGISTRY.snapshot()] + list(worker_metrics.values()))
+
+    exporter = MetricsExporter(
+        json_path=os.path.join(output_dir, METRICS_FILE),
+        port=metrics_port,
+        collect=collect,
+    ).start()
+    progress = ProgressReporter(collect, total_ids).start()
+    status = StatusMonitor(
+        collect,
+        total_ids,
+        status_path=os.path.join(output_dir, STATUS_FILE),
+        live=live_status,
+    ).start()
+
+    while finished_workers < processes:
+        item = result_queue.get()
+        if item == _WORKER_DONE:
+            finished_workers += 1
+            continue
+        if item[0] == _CHUNK_LOST:
+            chunk = item[1]
+            for article_id in chunk:
+                dead_letters.add(article_id, FAILURE_NETWORK, "worker process failed")
+            processed += len(chunk)
+            QUEUE_DEPTH.set(total_ids - processed)
+            print(f"{len(chunk)} IDs of a failed worker kept for the retry pass")
+            continue
+
+        chunk_size, found, failures, blocks, categories, worker_pid, snapshot = item
+        worker_metrics[worker_pid] = snapshot
+        dead_letters.merge(failures)
+        block_stats.merge(blocks)
+        for article_id, category in categories.items():
+            writer.category_cache.set(article_id, category)
+        for article in found:
+            dead_letters.remove(article["id"])
+        processed += chunk_size
+        QUEUE_DEPTH.set(total_ids - processed)
+        unique = [article for article in found if article["id"] not in seen_ids]
+        seen_ids.update(article["id"] for article in unique)
+        writer.add(unique)
+        date_index.add_articles(unique)
+
+        print(
+            f"Progress: {processed}/{total_ids} IDs processed, "
+            f"{len(seen_ids)} articles found"
+        )
+        if len(writer.pending) >= save_frequency:
+            print(f"Saving {len(writer.pending)} articles to disk...")
+            writer.save()
+            dead_letters.save(dead_letters_path)
+            date_index.save(date_index_path)
+            block_stats.save(block_stats_path)
+
+    within_time = deadline is None or time.time() <= deadline
+    if retry_config.retry_passes and within_time and dead_letters.pending():
+        scraper = Scraper(
+            rate_limiter=rate_limiter,
+            category_cache=writer.category_cache,
+            **scraper_options,
+        )
+        scraper.dead_letters = dead_letters
+        writer.save()
+        for article in scraper.retry_dead_letters(retry_config, writer):
+            if article["id"] not in seen_ids:
+                seen_ids.add(article["id"])
+                date_index.add_articles([article])
+
+    if writer.pending:
+        print(f"Final save: {len(writer.pending)} articles")
+    writer.close()
+    dead_letters.save(dead_letters_path)
+    date_index.save(date_index_path)
+    block_stats.save(block_stats_path)
+    if len(dead_letters):
+        print(
+            f"{len(dead_letters)} failed IDs saved to {DEAD_LETTERS_FILE} "
+            f"for the next run"
+        )
+    exporter.stop()
+    progress.stop()
+    status.stop()
+    if profiler is not None:
+        profiler.finish(output_dir, "profile_writer")
+
+
+def scan_id_range_multiprocess(
+    min_id,
+    max_id,
+    processes=None,
+    max_workers=10,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    step=1,
+    output_dir=None,
+    filename=None,
+    reverse=True,
+    save_frequency=100,
+    selected_categories=None,
+    rescan=False,
+    requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+    scraper_options=None,
+    metrics_port=None,
+    live_status=None,
+    profile=False,
+    scheduler=None,
+    retry_passes=2,
+    time_limit=None,
+):
+    """Scan an ID range with several worker processes and one writer process.
+
+    ``scraper_options`` are keyword arguments for each worker's Scraper
+    (e.g. base_url, use_tor, delay_scale, hedge, parse_cache_dir). With
+    ``profile`` every process writes its own profile report to the output
+    directory. With a ``scheduler`` (PriorityScheduler) chunks come from the
+    best-yielding blocks, re-ranked as the workers report their hit rates.
+    No chunks are handed out after ``time_limit`` seconds. Up to
+    ``retry_passes`` deferred passes over transiently failed IDs run after the
+    workers have finished.
+    """
+    processes = processes or os.cpu_count() or 1
+    context = mp.get_context("spawn")
+
+    direction = "NEWEST → OLDEST" if reverse else "OLDEST → NEWEST"
+    if scheduler is not None:
+        direction = "PRIORITY (best-yielding blocks first)"
+    print(
+        f"\nMulti-process scanning ID range: {min_id} - {max_id} "
+        f"(step: {step}, processes: {processes}, "
+        f"workers per process: {max_workers}, chunk: {chunk_size})"
+    )
+    print(f"Direction: {direction}")
+    print(f"Shared request budget: {requests_per_second} requests/s")
+
+    if scheduler is not None:
+        total_ids = len(scheduler)
+
+        def next_chunk():
+            return scheduler.next_batch(chunk_size)
+
+    else:
+        if reverse:
+            id_range = range(max_id, min_id - 1, -step)
+        else:
+            id_range = range(min_id, max_id + 1, step)
+        total_ids = len(id_range)
+        starts = iter(range(0, total_ids, chunk_size))
+
+        def next_chunk():
+            start = next(starts, None)
+            return [] if start is None else list(id_range[start : start + chunk_size])
+
+    # Wall clock, as the deadline is also checked in the writer process
+    deadline = time.time() + time_limit if time_limit else None
+
+    task_queue = context.Queue()
+    result_queue = context.Queue()
+    feedback_queue = context.Queue()
+    feeder = _ChunkFeeder(
+        task_queue,
+        feedback_queue,
+        next_chunk,
+        processes,
+        scheduler.stats if scheduler is not None else None,
+        deadline,
+    )
+
+    rate_limiter = SharedRateLimiter(requests_per_second, context)
+    # Worker log records are forwarded to this process's log sinks
+    log_queue, log_listener = process_log_queue(context)
+    log_level = logger.level
+    retry_config = ScanConfig(
+        min_id,
+        max_id,
+        max_workers=max_workers,
+        selected_categories=selected_categories,
+        retry_passes=retry_passes,
+    )
+
+    writer = context.Process(
+        target=_writer_main,
+        args=(
+            result_queue,
+            output_dir,
+            filename,
+            rescan,
+            save_frequency,
+            processes,
+            total_ids,
+            metrics_port,
+            live_status,
+            log_queue,
+            log_level,
+            profile,
+            rate_limiter,
+            scraper_options or {},
+            retry_config,
+            deadline,
+        ),
+    )
+    writer.start()
+
+    current_chunks = [context.Value("i", -1) for _ in range(processes)]
+    done_events = [context.Event() for _ in range(processes)]
+    workers = [
+        context.Process(
+            target=_worker_main,
+            args=(
+                task_queue,
+                result_queue,
+                feedback_queue,
+                rate_limiter,
+                max_workers,
+                selected_categories,
+                output_dir,
+                scraper_options or {},
+                log_queue,
+                log_level,
+                profile,
+                current_chunk,
+                done_reported,
+            ),
+        )
+        for current_chunk, done_reported in zip(current_chunks, done_events)
+    ]
+    for worker in workers:
+        worker.start()
+    feeder.start()
+
+    try:
+        for worker, current_chunk, done_reported in zip(
+            workers, current_chunks, done_events
+        ):
+            worker.join()
+            if worker.exitcode and not done_reported.is_set():
+                # Died before it could report - do not leave the writer waiting
+                print(f"Worker process {worker.pid} died (exit code {worker.exitcode})")
+                if current_chunk.value >= 0:
+                    result_queue.put(
+                        (_CHUNK_LOST, feeder.chunks[current_chunk.value])
+                    )
+                    feedback_queue.put({})
+                result_queue.put(_WORKER_DONE)
+        feedback_queue.put(_FEEDER_STOP)
+        feeder.join()
+        writer.join()
+    except KeyboardInterrupt:
+        for process in workers + [writer]:
+            process.terminate()
+        raise
+    finally:
+        if log_listener is not None:
+            log_listener.stop()
+
+    articles = list(iter_articles(os.path.join(output_dir, filename)))
+    print(
+        f"\nMulti-process scan complete: {len(articles)} articles "
+        f"in range {min_id}-{max_id}"
+    )
+    return articles
@@ -0,0 +1,131 @@
+"""
+Cache of extraction results keyed by article ID, raw page and extractor version.
+Re-running extraction over recorded pages (CacheOnlyTransport/ReplayTransport)
+after changes elsewhere in the pipeline then skips BeautifulSoup entirely.
+Entries live in ``<cache_dir>/<extractor version>/<sha256 of ID and HTML>.json``,
+so bumping EXTRACTOR_VERSION invalidates exactly the old results; those are
+the first to go when the cache exceeds its size limit, followed by the least
+recently used entries. Pages that yield no article are cached as well. The ID
+is part of the key because the same HTML (e.g. an error page) can be served
+for different IDs.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from metrics import PARSE_CACHE
+from serializer import dumps, loads
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ParseCache:
+    """Thread-safe, size-bounded parse-result cache on disk."""
+
+    def __init__(self, cache_dir, version, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.version = str(version)
+        self.max_bytes = max_bytes
+        self.version_dir = os.path.join(cache_dir, self.version)
+        os.makedirs(self.version_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # path -> size, eviction order first
+        self._scan()
+
+    def _scan(self):
+        """Index existing entries: other versions first, then by last use."""
+        found = []
+        for version in os.listdir(self.cache_dir):
+            version_dir = os.path.join(self.cache_dir, version)
+            if not os.path.isdir(version_dir):
+                continue
+            for name in os.listdir(version_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(version_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                current = version == self.version
+                found.append((current, stat.st_mtime, path, stat.st_size))
+        for _, _, path, size in sorted(found):
+            self._entries[path] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _path(self, article_id, raw_content):
+        digest = hashlib.sha256(f"{article_id}\n".encode("ascii"))
+        digest.update(raw_content)
+        return os.path.join(self.version_dir, digest.hexdigest() + ".json")
+
+    def get(self, article_id, raw_content):
+        """(hit, article data) for a page; article data is None for non-articles."""
+        path = self._path(article_id, raw_content)
+        try:
+            with open(path, "rb") as f:
+                result = loads(f.read())
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            PARSE_CACHE.inc(result="miss")
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        PARSE_CACHE.inc(result="hit")
+        return True, result
+
+    def put(self, article_id, raw_content, result):
+        """Store the extraction result of a page (None if it had no article)."""
+        path = self._path(article_id, raw_content)
+        data = dumps(result)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self._evict()
+
+    def _evict(self):
+        """Drop entries from the front until the cache fits (lock held)."""
+        while self.total_bytes > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            PARSE_CACHE.inc(result="eviction")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+            }
+
+    def print_summary(self):
+        stats = self.stats()
+        print(
+            f"Parse cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['evictions']} evicted, "
+            f"{stats['entries']} entries / {stats['bytes'] / 1024 / 1024:.1f} MB"
+        )
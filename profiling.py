@@ -0,0 +1,220 @@
+"""
+Opt-in profiling of the scan hot path.
+While a Profiler is active, instrumented code records wall and CPU time per
+stage (request, sleeps, rate limiting, decoding, BeautifulSoup construction,
+each extraction step, dedup, save) and how long threads wait for the shared
+locks, and a sampling thread collects the stacks of all threads. At the end
+a stage table is printed and written as JSON, and the stacks are written in
+the folded format read by flamegraph.pl and speedscope.
+
+When no profiler is active every hook is a single global lookup.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+DEFAULT_SAMPLE_INTERVAL = 0.01  # seconds
+
+_active = None
+
+
+class _NullTimer:
+    def mark(self, stage):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class StageTimer:
+    """Checkpoint timer: each mark() charges the time since the previous one."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+
+    def mark(self, stage):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        self.profiler.record_stage(stage, wall - self.wall, cpu - self.cpu)
+        self.wall, self.cpu = wall, cpu
+
+
+def stage_timer():
+    """StageTimer of the active profiler, or a no-op timer."""
+    profiler = _active
+    if profiler is None:
+        return _NULL_TIMER
+    return StageTimer(profiler)
+
+
+class ProfiledLock:
+    """threading.Lock that reports acquisition wait time while profiling."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking=True, timeout=-1):
+        profiler = _active
+        if profiler is None:
+            return self._lock.acquire(blocking, timeout)
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        profiler.record_lock_wait(self.name, time.perf_counter() - started)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def _frame_name(code):
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Stage timings, lock waits and sampled stacks of one run."""
+
+    def __init__(self, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.sample_interval = sample_interval
+        self.stages = {}  # stage -> [count, wall, cpu]
+        self.lock_waits = {}  # lock -> [count, total wait, max wait]
+        self.stacks = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sampler = None
+        self._started = None
+        self._cpu_started = None
+
+    def record_stage(self, stage, wall, cpu):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += wall
+            entry[2] += cpu
+
+    def record_lock_wait(self, name, wait):
+        with self._lock:
+            entry = self.lock_waits.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += wait
+            entry[2] = max(entry[2], wait)
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.sample_interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        """Activate the hooks and start sampling stacks."""
+        global _active
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        _active = self
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def report(self):
+        """Collected data as a JSON-serializable dict."""
+        wall = time.perf_counter() - self._started
+        return {
+            "wall_seconds": round(wall, 3),
+            "process_cpu_seconds": round(time.process_time() - self._cpu_started, 3),
+            "stack_samples": self.samples,
+            "stages": {
+                stage: {
+                    "count": count,
+                    "wall_seconds": round(wall_total, 4),
+                    "cpu_seconds": round(cpu_total, 4),
+                    "avg_wall_ms": round(1000 * wall_total / count, 3),
+                }
+                for stage, (count, wall_total, cpu_total) in sorted(
+                    self.stages.items(), key=lambda x: x[1][1], reverse=True
+                )
+            },
+            "lock_waits": {
+                name: {
+                    "acquisitions": count,
+                    "total_wait_seconds": round(total, 4),
+                    "max_wait_ms": round(1000 * longest, 3),
+                }
+                for name, (count, total, longest) in self.lock_waits.items()
+            },
+        }
+
+    def save(self, output_dir, prefix="profile"):
+        """Write <prefix>_<timestamp>.json and .folded, return their paths."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(output_dir, f"{prefix}_{timestamp}")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return base + ".json", base + ".folded"
+
+    def finish(self, output_dir=".", prefix="profile", summary=True):
+        """Stop, optionally print the stage table and write the report files."""
+        self.stop()
+        if summary:
+            self.print_summary()
+        try:
+            json_path, folded_path = self.save(output_dir, prefix)
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+            return
+        print(f"Profile written: {json_path} (flamegraph stacks: {folded_path})")
+
+    def print_summary(self):
+        report = self.report()
+        print(
+            f"\nPROFILE ({report['wall_seconds']:.1f} s wall, "
+            f"{report['process_cpu_seconds']:.1f} s CPU, "
+            f"{report['stack_samples']} stack samples)"
+        )
+        print(f"{'stage':<22} {'count':>8} {'wall s':>10} {'cpu s':>10} {'avg ms':>9}")
+        for stage, entry in report["stages"].items():
+            print(
+                f"{stage:<22} {entry['count']:>8} {entry['wall_seconds']:>10.2f} "
+                f"{entry['cpu_seconds']:>10.2f} {entry['avg_wall_ms']:>9.2f}"
+            )
+        for name, entry in report["lock_waits"].items():
+            print(
+                f"Lock {name}: {entry['acquisitions']} acquisitions, "
+                f"{entry['total_wait_seconds']:.2f} s waiting "
+                f"(max {entry['max_wait_ms']:.1f} ms)"
+            )
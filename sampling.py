@@ -0,0 +1,236 @@
+"""
+Stratified random sampling estimator for the category distribution.
+Random IDs are drawn from equal-width strata of the ID range (IDs grow with
+publication time, so this also spreads the sample over time) until every
+category proportion is known within the requested confidence interval.
+"""
+
+import json
+import math
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from statistics import NormalDist
+
+
+class _Stratum:
+    """Sampling state of one ID sub-range."""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+        self.drawn = set()
+        self.found = 0
+        self.categories = {}
+
+    @property
+    def size(self):
+        return self.high - self.low + 1
+
+    @property
+    def requested(self):
+        return len(self.drawn)
+
+    def draw(self, count, rng):
+        """Draw up to ``count`` IDs not requested before."""
+        remaining = self.size - len(self.drawn)
+        count = min(count, remaining)
+        ids = []
+        # Rejection sampling is fine while the stratum is sparsely sampled
+        while len(ids) < count:
+            if len(self.drawn) > self.size // 2:
+                pool = [
+                    i for i in range(self.low, self.high + 1) if i not in self.drawn
+                ]
+                ids.extend(rng.sample(pool, count - len(ids)))
+                self.drawn.update(ids)
+                break
+            article_id = rng.randint(self.low, self.high)
+            if article_id not in self.drawn:
+                self.drawn.add(article_id)
+                ids.append(article_id)
+        return ids
+
+    def weight(self):
+        """Estimated number of articles in the stratum."""
+        if not self.requested:
+            return 0.0
+        return self.size * self.found / self.requested
+
+
+def _make_strata(min_id, max_id, strata):
+    total = max_id - min_id + 1
+    strata = max(1, min(strata, total))
+    bounds = [min_id + (total * i) // strata for i in range(strata + 1)]
+    return [_Stratum(bounds[i], bounds[i + 1] - 1) for i in range(strata)]
+
+
+def compute_estimates(strata, confidence=0.95):
+    """Combine per-stratum counts into category proportions with intervals.
+
+    Returns a list of (category, proportion, margin) sorted by proportion.
+    The variance uses add-one smoothing so that categories seen zero or all
+    times in a stratum do not report a spuriously tight interval.
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    weights = [s.weight() for s in strata]
+    total_weight = sum(weights)
+    if not total_weight:
+        return []
+
+    categories = set()
+    for stratum in strata:
+        categories.update(stratum.categories)
+
+    estimates = []
+    for category in categories:
+        proportion = 0.0
+        variance = 0.0
+        for stratum, weight in zip(strata, weights):
+            if not stratum.found:
+                continue
+            share = weight / total_weight
+            count = stratum.categories.get(category, 0)
+            proportion += share * count / stratum.found
+            smoothed = (count + 1) / (stratum.found + 2)
+            variance += share**2 * smoothed * (1 - smoothed) / stratum.found
+        estimates.append((category, proportion, z * math.sqrt(variance)))
+
+    estimates.sort(key=lambda x: x[1], reverse=True)
+    return estimates
+
+
+def estimate_category_distribution(
+    fetch_article,
+    min_id,
+    max_id,
+    strata=10,
+    target_margin=0.05,
+    confidence=0.95,
+    per_round=5,
+    min_found_per_stratum=3,
+    max_requests=600,
+    max_workers=5,
+    seed=None,
+):
+    """Estimate category proportions from a stratified random sample of IDs.
+
+    ``fetch_article`` is called with an article ID and returns an article dict
+    or None. Sampling proceeds in rounds of ``per_round`` IDs per stratum and
+    stops once every category's margin of error is within ``target_margin``,
+    after ``max_requests`` requests, or when the range is exhausted.
+    """
+    rng = random.Random(seed)
+    strata_list = _make_strata(min_id, max_id, strata)
+    articles = []
+    estimates = []
+    requests_made = 0
+    rounds = 0
+    converged = False
+
+    print(
+        f"\nStratified sampling: IDs {min_id}-{max_id} in {len(strata_list)} strata, "
+        f"target ±{target_margin * 100:.1f}% at {confidence * 100:.0f}% confidence"
+    )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while requests_made < max_requests:
+            budget = max_requests - requests_made
+            draws = []
+            for stratum in strata_list:
+                count = min(per_round, budget - len(draws))
+                if count <= 0:
+                    break
+                draws.extend((stratum, i) for i in stratum.draw(count, rng))
+            if not draws:
+                break
+
+            results = executor.map(lambda draw: fetch_article(draw[1]), draws)
+            for (stratum, _), article in zip(draws, results):
+                requests_made += 1
+                if not article:
+                    continue
+                stratum.found += 1
+                category = article.get("category", "Uncategorized")
+                stratum.categories[category] = stratum.categories.get(category, 0) + 1
+                articles.append(article)
+
+            rounds += 1
+            estimates = compute_estimates(strata_list, confidence)
+            worst_margin = max((e[2] for e in estimates), default=1.0)
+            print(
+                f"Round {rounds}: {requests_made} requests, {len(articles)} articles, "
+                f"max margin ±{worst_margin * 100:.1f}%"
+            )
+
+            if worst_margin <= target_margin and all(
+                s.found >= min_found_per_stratum or s.requested >= s.size
+                for s in strata_list
+            ):
+                converged = True
+                break
+
+    return {
+        "min_id": min_id,
+        "max_id": max_id,
+        "confidence": confidence,
+        "target_margin": target_margin,
+        "converged": converged,
+        "requests": requests_made,
+        "articles_found": len(articles),
+        "estimates": estimates,
+        "strata": [
+            {
+                "min_id": s.low,
+                "max_id": s.high,
+                "requested": s.requested,
+                "found": s.found,
+                "categories": s.categories,
+            }
+            for s in strata_list
+        ],
+        "articles": articles,
+    }
+
+
+def print_estimates(result):
+    """Print category estimates with error bars."""
+    status = "converged" if result["converged"] else "target margin not reached"
+    print(
+        f"\nCATEGORY ESTIMATES ({result['articles_found']} articles from "
+        f"{result['requests']} requests, {status})"
+    )
+    for i, (category, proportion, margin) in enumerate(result["estimates"], 1):
+        print(f"{i}. {category}: {proportion * 100:.1f}% ± {margin * 100:.1f}%")
+
+
+def save_estimates_to_json(result, output_dir):
+    """Save sampling estimates (without the sampled articles) to JSON file."""
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        estimates_file = os.path.join(
+            output_dir, f"category_estimates_{timestamp}.json"
+        )
+
+        estimates_data = {"analysis_date": datetime.now().isoformat()}
+        estimates_data.update({k: v for k, v in result.items() if k != "articles"})
+        estimates_data["estimates"] = [
+            {
+                "category": category,
+                "proportion": round(proportion, 4),
+                "low": round(max(0.0, proportion - margin), 4),
+                "high": round(min(1.0, proportion + margin), 4),
+            }
+            for category, proportion, margin in result["estimates"]
+        ]
+
+        with open(estimates_file, "w", encoding="utf-8") as f:
+            json.dump(estimates_data, f, ensure_ascii=False, indent=2)
+
+        print(f"Category estimates saved to: {estimates_file}")
+        return estimates_file
+
+    except Exception as e:
+        print(f"Error saving category estimates: {e}")
+        return None
@@ -0,0 +1,215 @@
+"""
+Priority scheduling of the ID space.
+The range is split into fixed-size blocks. Each block is scored by the
+expected number of useful articles per request: its hit rate in earlier runs
+(persisted in block_stats.json), the share of the selected categories when a
+category filter is active, and recency (newer IDs first among equals).
+Blocks without history borrow the hit rate of their scanned neighbours.
+Batches are taken from the best blocks and scores follow the counts as
+batches complete, so a time-boxed run spends its requests where the articles
+are.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+DEFAULT_BLOCK_SIZE = 100
+BLOCK_STATS_FILE = "block_stats.json"
+PRIOR_STRENGTH = 5  # pseudo-requests at the global rate added to every block
+NEIGHBOUR_RADIUS = 5  # blocks an unscanned block borrows its hit rate from
+RECENCY_HALF_LIFE = 50000  # IDs
+
+
+class BlockStats:
+    """Thread-safe, persisted per-block counts of requests, hits and categories."""
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self.blocks = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def block_of(self, article_id):
+        return article_id // self.block_size
+
+    def record(self, article_id, found, category=None):
+        """Count one answered request (found or missing) for an ID."""
+        with self._lock:
+            entry = self.blocks.setdefault(
+                self.block_of(article_id),
+                {"requested": 0, "found": 0, "categories": {}},
+            )
+            entry["requested"] += 1
+            if found:
+                entry["found"] += 1
+                if category:
+                    categories = entry["categories"]
+                    categories[category] = categories.get(category, 0) + 1
+            entry["scanned"] = datetime.now().isoformat(timespec="seconds")
+            self._dirty = True
+
+    def totals(self, selected_categories=None):
+        """(requested, found, found in selected categories) over all blocks."""
+        requested = found = selected = 0
+        with self._lock:
+            for entry in self.blocks.values():
+                requested += entry["requested"]
+                found += entry["found"]
+                if selected_categories:
+                    selected += sum(
+                        count
+                        for category, count in entry["categories"].items()
+                        if category in selected_categories
+                    )
+        return requested, found, selected
+
+    def pop_all(self):
+        """Take all counts out (worker processes ship them to the writer)."""
+        with self._lock:
+            blocks, self.blocks = self.blocks, {}
+        return blocks
+
+    def merge(self, blocks):
+        """Add counts taken from another BlockStats of the same block size."""
+        with self._lock:
+            for block, other in blocks.items():
+                entry = self.blocks.setdefault(
+                    block, {"requested": 0, "found": 0, "categories": {}}
+                )
+                entry["requested"] += other["requested"]
+                entry["found"] += other["found"]
+                categories = entry["categories"]
+                for category, count in other["categories"].items():
+                    categories[category] = categories.get(category, 0) + count
+                entry["scanned"] = max(entry.get("scanned", ""), other["scanned"])
+                self._dirty = True
+
+    def load(self, path):
+        """Merge a saved stats file into memory (same block size only)."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error loading block statistics: {e}")
+            return
+        if data.get("block_size") != self.block_size:
+            print("Block statistics use another block size - starting fresh")
+            return
+        with self._lock:
+            for key, entry in data["blocks"].items():
+                self.blocks.setdefault(int(key), entry)
+
+    def save(self, path):
+        """Write the stats to disk if they changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "block_size": self.block_size,
+                "blocks": {str(k): v for k, v in sorted(self.blocks.items())},
+            }
+            self._dirty = False
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class PriorityScheduler:
+    """Hand out ID batches from the blocks with the best expected yield."""
+
+    def __init__(
+        self,
+        stats,
+        min_id,
+        max_id,
+        step=1,
+        reverse=True,
+        selected_categories=None,
+        recency_half_life=RECENCY_HALF_LIFE,
+    ):
+        self.stats = stats
+        self.selected_categories = selected_categories
+        self.recency_half_life = recency_half_life
+        self.newest_block = stats.block_of(max_id)
+
+        # Remaining IDs per block, each block in the requested direction
+        self._remaining = {}
+        for article_id in range(min_id, max_id + 1, step):
+            self._remaining.setdefault(stats.block_of(article_id), []).append(
+                article_id
+            )
+        if reverse:
+            for ids in self._remaining.values():
+                ids.reverse()
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._remaining.values())
+
+    def _priors(self):
+        """Global hit rate and selected-category share used for smoothing."""
+        requested, found, selected = self.stats.totals(self.selected_categories)
+        hit_rate = (found + 1) / (requested + 2)
+        share = (selected + 1) / (found + 2) if self.selected_categories else 1.0
+        return hit_rate, share
+
+    def _counts(self, block):
+        """Counts of a block, or distance-weighted counts of its neighbours."""
+        entry = self.stats.blocks.get(block)
+        if entry and entry["requested"]:
+            return [(1.0, entry)]
+        neighbours = []
+        for distance in range(1, NEIGHBOUR_RADIUS + 1):
+            for other in (block - distance, block + distance):
+                entry = self.stats.blocks.get(other)
+                if entry and entry["requested"]:
+                    neighbours.append((1.0 / distance, entry))
+        return neighbours
+
+    def score(self, block, priors=None):
+        """Expected useful articles per request in a block (with recency)."""
+        prior_rate, prior_share = priors or self._priors()
+        counts = self._counts(block)
+
+        requested = sum(weight * entry["requested"] for weight, entry in counts)
+        found = sum(weight * entry["found"] for weight, entry in counts)
+        rate = (found + PRIOR_STRENGTH * prior_rate) / (requested + PRIOR_STRENGTH)
+
+        if self.selected_categories:
+            selected = sum(
+                weight * count
+                for weight, entry in counts
+                for category, count in entry["categories"].items()
+                if category in self.selected_categories
+            )
+            rate *= (selected + PRIOR_STRENGTH * prior_share) / (
+                found + PRIOR_STRENGTH
+            )
+
+        age = (self.newest_block - block) * self.stats.block_size
+        recency = 0.5 ** (max(0, age) / self.recency_half_life)
+        return rate * (0.5 + 0.5 * recency)
+
+    def ranked_blocks(self):
+        priors = self._priors()
+        return sorted(
+            self._remaining, key=lambda block: self.score(block, priors), reverse=True
+        )
+
+    def next_batch(self, batch_size):
+        """Up to ``batch_size`` IDs from the best remaining blocks."""
+        batch = []
+        for block in self.ranked_blocks():
+            ids = self._remaining[block]
+            taken = ids[: batch_size - len(batch)]
+            del ids[: len(taken)]
+            if not ids:
+                del self._remaining[block]
+            batch.extend(taken)
+            if len(batch) >= batch_size:
+                break
+        return batch
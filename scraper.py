@@ -0,0 +1,2079 @@
+"""
+Protext.cz scraping library.
+Fetching, extraction, storage and scanning of press releases. The Scraper
+class owns the per-run state (HTTP transport, rate limiter, processed-ID
+registry, category cache); main.py is the interactive front end over it.
+"""
+
+import requests
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import re
+import os
+import time
+import random
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import socket
+import hashlib
+import tempfile
+import logging
+import unicodedata
+
+from article import Article, dump_jsonl
+from article_store import (
+    INDEX_SUFFIX,
+    ArticleStore,
+    ArticleStoreWriter,
+    build_store,
+    store_stem,
+)
+from category_views import VIEWS_SUFFIX, CategoryViews, export_view
+from category_filter import CategoryCache, read_until_category
+from analytics import aggregate_file, iter_articles, save_analysis_to_json
+from date_index import DATE_INDEX_FILE, DateIndex, parse_czech_date
+from dead_letters import (
+    FAILURE_NETWORK,
+    FAILURE_PARSE,
+    FAILURE_THROTTLED,
+    DeadLetterQueue,
+    FetchError,
+)
+from dedup import NearDuplicateIndex, save_duplicate_clusters
+from keyword_index import KeywordIndex, tokenize_keywords
+from parse_cache import ParseCache
+from profiling import ProfiledLock, Profiler, stage_timer
+from status import StatusMonitor
+from structured_log import ProgressReporter, log_event
+from metrics import (
+    ACTIVE_WORKERS,
+    ARTICLES,
+    BYTES_DOWNLOADED,
+    FETCH_FAILURES,
+    QUEUE_DEPTH,
+    REQUESTS,
+    RETRIES,
+    STAGE_SECONDS,
+    TOR_RENEWALS,
+    REGISTRY,
+    MetricsExporter,
+)
+from sampling import estimate_category_distribution, print_estimates
+from scheduler import BLOCK_STATS_FILE, BlockStats, PriorityScheduler
+from serializer import dataset_stem, dump_articles, dump_file, load_file
+from transport import TOR_PROXIES, HedgedTransport, RequestsTransport, Transport
+
+BASE_URL = "https://www.protext.cz"
+
+USER_AGENTS = [
+    # Chrome Windows - latest versions
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
+    # Chrome macOS
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    # Firefox Windows
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0",
+    # Firefox macOS
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:120.0) Gecko/20100101 Firefox/120.0",
+    # Safari macOS
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/16.6 Safari/605.1.15",
+    # Edge Windows
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0",
+    # Linux Chrome
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/119.0.0.0 Safari/537.36",
+    # Linux Firefox
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0",
+    # Mobile Chrome Android
+    "Mozilla/5.0 (Linux; Android 14; SM-G998B) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/119.0.0.0 Mobile Safari/537.36",
+    # Mobile Safari iOS
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPad; CPU OS 17_1 like Mac OS X) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1",
+]
+
+
+def get_random_user_agent():
+    """Get a random User-Agent string."""
+    return random.choice(USER_AGENTS)
+
+
+TOR_HOST = "127.0.0.1"
+TOR_SOCKS_PORT = 9050
+TOR_CONTROL_PORT = 9051
+# A successful check is trusted this long (restarts skip the probe entirely)
+TOR_HEALTH_TTL = 60  # seconds
+TOR_HEALTH_FILE = os.path.join(tempfile.gettempdir(), "protext_tor_health.json")
+
+
+def probe_tor_socks(timeout=1.0):
+    """True if a SOCKS5 server answers the greeting on the local Tor port."""
+    try:
+        with socket.create_connection((TOR_HOST, TOR_SOCKS_PORT), timeout) as sock:
+            sock.sendall(b"\x05\x01\x00")  # SOCKS5, one method: no auth
+            return sock.recv(2) == b"\x05\x00"
+    except OSError:
+        return False
+
+
+def probe_tor_control(timeout=1.0):
+    """True if the Tor control port answers (needed for circuit renewal)."""
+    try:
+        with socket.create_connection((TOR_HOST, TOR_CONTROL_PORT), timeout) as sock:
+            sock.sendall(b"PROTOCOLINFO 1\r\n")
+            return sock.recv(1024).startswith(b"250")
+    except OSError:
+        return False
+
+
+def _read_tor_health():
+    """Age in seconds of the last successful check, or None."""
+    try:
+        with open(TOR_HEALTH_FILE, "r", encoding="utf-8") as f:
+            checked = json.load(f)["checked"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    age = time.time() - checked
+    return age if 0 <= age < TOR_HEALTH_TTL else None
+
+
+def _write_tor_health(ok):
+    try:
+        if ok:
+            with open(TOR_HEALTH_FILE, "w", encoding="utf-8") as f:
+                json.dump({"checked": time.time()}, f)
+        elif os.path.exists(TOR_HEALTH_FILE):
+            os.remove(TOR_HEALTH_FILE)
+    except OSError:
+        pass  # the cache is only an optimization
+
+
+def check_tor_connection(use_cache=True, verify_exit=False):
+    """Check if Tor is running and accessible.
+
+    The check is local: a SOCKS5 handshake on the Tor port (milliseconds, no
+    traffic through the network). A success is cached for TOR_HEALTH_TTL
+    seconds. ``verify_exit`` additionally sends a request through Tor to
+    httpbin.org and prints the exit IP.
+    """
+    if use_cache and not verify_exit:
+        age = _read_tor_health()
+        if age is not None:
+            print(f"Tor connection active (checked {age:.0f} s ago)")
+            return True
+
+    if not probe_tor_socks():
+        print(f"Tor SOCKS proxy not reachable on {TOR_HOST}:{TOR_SOCKS_PORT}")
+        _write_tor_health(False)
+        return False
+    if not probe_tor_control():
+        print("Tor control port not accessible - circuits will not be renewed")
+
+    if verify_exit:
+        try:
+            session = get_tor_session()
+            response = session.get("https://httpbin.org/ip", timeout=10)
+            ip_info = response.json()
+            print(f"Tor exit IP: {ip_info.get('origin', 'Unknown')}")
+        except Exception as e:
+            print(f"Tor connection failed: {e}")
+            _write_tor_health(False)
+            return False
+
+    print("Tor connection active")
+    _write_tor_health(True)
+    return True
+
+
+def wait_for_tor(timeout=15, interval=0.25):
+    """Poll the SOCKS port until Tor accepts connections or timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if probe_tor_socks():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def start_tor_service():
+    """Start Tor service if not running."""
+    import subprocess
+
+    try:
+        # Check if Tor is already running
+        if check_tor_connection():
+            return True
+
+        print("Starting Tor service...")
+
+        # Try to start Tor (macOS with Homebrew)
+        try:
+            subprocess.run(
+                ["brew", "services", "start", "tor"], check=True, capture_output=True
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            # Try system Tor
+            try:
+                subprocess.run(
+                    ["sudo", "systemctl", "start", "tor"],
+                    check=True,
+                    capture_output=True,
+                )
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                print("Could not start Tor service automatically")
+                print("Please install and start Tor manually:")
+                print("  brew install tor && brew services start tor")
+                print("  sudo apt install tor && sudo systemctl start tor")
+                return False
+
+        # Returns as soon as the SOCKS port accepts connections
+        wait_for_tor()
+        return check_tor_connection(use_cache=False)
+
+    except Exception as e:
+        print(f"Error starting Tor: {e}")
+        return False
+
+
+def get_tor_session():
+    """Create a requests session with Tor proxy."""
+    session = requests.Session()
+    session.proxies = dict(TOR_PROXIES)
+    return session
+
+
+def renew_tor_circuit():
+    """Renew Tor circuit for new IP with better error handling."""
+    try:
+        # Connect to Tor control port
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(5)  # Add timeout
+        sock.connect(("127.0.0.1", 9051))  # Tor control port
+        
+        # Send authentication
+        sock.send(b'AUTHENTICATE ""\r\n')
+        response = sock.recv(1024)
+        if b"250" not in response:
+            print("Tor authentication failed")
+            sock.close()
+            return False
+        
+        # Send NEWNYM signal
+        sock.send(b"SIGNAL NEWNYM\r\n")
+        response = sock.recv(1024)
+        if b"250" not in response:
+            print("Tor NEWNYM signal failed")
+            sock.close()
+            return False
+            
+        sock.close()
+        TOR_RENEWALS.inc()
+        print("Tor circuit renewed - new IP")
+        time.sleep(3)  # Wait for circuit to establish
+        return True
+        
+    except socket.timeout:
+        print("Tor circuit renewal timeout - continuing without renewal")
+        return False
+    except ConnectionRefusedError:
+        print("Tor control port not accessible - continuing without renewal")
+        return False
+    except Exception as e:
+        print(f"Tor circuit renewal failed: {e} - continuing without renewal")
+        return False
+
+
+def _retry_after_seconds(response, default):
+    """Seconds from a Retry-After header (only the delta-seconds form)."""
+    try:
+        return max(0, int(response.headers.get("Retry-After", default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def make_request_with_retry(
+    url,
+    max_retries=3,
+    base_delay=1,
+    use_tor=True,
+    stream=False,
+    transport=None,
+    rate_limiter=None,
+    delay_scale=1.0,
+    raise_on_failure=False,
+):
+    """Make HTTP request with Tor and advanced anti-blocking techniques.
+
+    A caller-owned ``transport`` (see transport.py) is reused instead of a new
+    session per request; ``rate_limiter.acquire()`` is called before each try.
+    All waits are multiplied by ``delay_scale`` (0 for offline load tests).
+    A 404 is final and returns None without retrying. When all attempts fail
+    None is returned, or with ``raise_on_failure`` a FetchError saying whether
+    the request was throttled or failed in the network.
+    """
+    if transport is None:
+        transport = RequestsTransport(use_tor)
+    timer = stage_timer()
+    throttled_status = None
+
+    for attempt in range(max_retries):
+        try:
+            # Minimal delay before request
+            time.sleep(random.uniform(0.05, 0.2) * delay_scale)  # Reduced from 0.1-0.5
+            timer.mark("request_jitter")
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+                timer.mark("rate_limit_wait")
+
+            # Advanced headers to mimic real browser
+            headers = {
+                "User-Agent": get_random_user_agent(),
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,"
+                "image/avif,image/webp,image/apng,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.7",  # Changed to en-US
+                "Accept-Encoding": "gzip, deflate, br",
+                "Connection": "keep-alive",
+                "Upgrade-Insecure-Requests": "1",
+                "Sec-Fetch-Dest": "document",
+                "Sec-Fetch-Mode": "navigate",
+                "Sec-Fetch-Site": "none",
+                "Sec-Fetch-User": "?1",
+                "Cache-Control": "max-age=0",
+                "DNT": "1",
+                "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", '
+                '"Google Chrome";v="120"',
+                "Sec-Ch-Ua-Mobile": "?0",
+                "Sec-Ch-Ua-Platform": '"Windows"',
+            }
+
+            # Balanced timeout for stability
+            timeout = random.uniform(12, 20)  # Increased from 8-15
+
+            response = transport.get(
+                url, headers=headers, timeout=timeout, stream=stream
+            )
+            timer.mark("request")
+            REQUESTS.inc(status=response.status_code)
+
+            # Handle different response codes - only renew Tor circuit when blocked
+            if response.status_code == 429:
+                retry_after = _retry_after_seconds(response, 180)
+                log_event(
+                    logging.DEBUG,
+                    "rate limited",
+                    url=url,
+                    status=429,
+                    wait=retry_after,
+                    renew_circuit=use_tor,
+                )
+                if use_tor:
+                    renew_tor_circuit()  # Get new IP only when blocked
+                throttled_status = 429
+                if attempt == max_retries - 1:
+                    break  # no point in waiting after the last attempt
+                RETRIES.inc()
+                time.sleep(retry_after * delay_scale)
+                timer.mark("retry_wait")
+                continue
+            elif response.status_code == 403:
+                delay = random.uniform(10, 20)
+                log_event(
+                    logging.DEBUG,
+                    "forbidden",
+                    url=url,
+                    status=403,
+                    wait=round(delay, 1),
+                    renew_circuit=use_tor,
+                )
+                if use_tor:
+                    renew_tor_circuit()  # Get new IP only when blocked
+                throttled_status = 403
+                if attempt == max_retries - 1:
+                    break
+                RETRIES.inc()
+                time.sleep(delay * delay_scale)
+                timer.mark("retry_wait")
+                continue
+            elif response.status_code == 503:
+                # Shorter wait, or what the server asks for
+                delay = _retry_after_seconds(response, random.uniform(10, 20))
+                renew = use_tor and attempt >= 1  # Only renew after first retry
+                log_event(
+                    logging.DEBUG,
+                    "service unavailable",
+                    url=url,
+                    status=503,
+                    wait=round(delay, 1),
+                    renew_circuit=renew,
+                )
+                if renew:
+                    renew_tor_circuit()  # Get new IP only when blocked
+                throttled_status = 503
+                if attempt == max_retries - 1:
+                    break
+                RETRIES.inc()
+                time.sleep(delay * delay_scale)
+                timer.mark("retry_wait")
+                continue
+            elif response.status_code == 404:
+                # Missing ID - retrying will not make it appear
+                response.close()
+                return None
+
+            response.raise_for_status()
+            return response
+
+        except requests.exceptions.RequestException as e:
+            timer.mark("request")
+            if getattr(e, "response", None) is None:
+                REQUESTS.inc(status="error")
+            if attempt < max_retries - 1:
+                RETRIES.inc()
+                # Progressive backoff with randomization
+                delay = (base_delay * (2**attempt) + random.uniform(2, 8)) * delay_scale
+                # Only renew Tor circuit on persistent failures (not on first retry)
+                renew = use_tor and attempt >= 2  # Only after 2+ failures
+                log_event(
+                    logging.DEBUG,
+                    "request failed",
+                    url=url,
+                    attempt=attempt + 1,
+                    max_retries=max_retries,
+                    error=str(e)[:200],
+                    wait=round(delay, 1),
+                    renew_circuit=renew,
+                )
+                if renew:
+                    renew_tor_circuit()
+
+                time.sleep(delay)
+                timer.mark("retry_wait")
+            else:
+                log_event(
+                    logging.WARNING,
+                    "request gave up",
+                    url=url,
+                    attempts=max_retries,
+                    error=str(e)[:200],
+                )
+                if raise_on_failure:
+                    raise FetchError(FAILURE_NETWORK, str(e)[:200]) from e
+                return None
+
+    if throttled_status is not None:
+        log_event(
+            logging.WARNING,
+            "request gave up",
+            url=url,
+            attempts=max_retries,
+            status=throttled_status,
+        )
+        if raise_on_failure:
+            raise FetchError(FAILURE_THROTTLED, f"HTTP {throttled_status}")
+    return None
+
+
+# Thread-safe file writing
+FILE_LOCK = ProfiledLock("file_lock")
+CATEGORY_CACHE_FILE = "category_cache.json"
+DEAD_LETTERS_FILE = "dead_letters.json"
+RETRY_PASS_DELAY = 30  # seconds before the first deferred retry pass
+PROBE_ATTEMPTS = 3  # tries of one date probe before the date search gives up
+PROBE_RETRY_DELAY = 5  # seconds before retrying a failed date probe
+METRICS_FILE = "metrics.json"
+STATUS_FILE = "status.json"
+
+# Bump whenever fetch_article_by_id extracts fields differently
+EXTRACTOR_VERSION = "2"
+
+# Fields that define the content of an article for change detection
+HASHED_FIELDS = ("title", "content", "date", "keywords", "category")
+
+
+def compute_content_hash(article):
+    """Compute a stable hash of the normalized article content and metadata."""
+    parts = []
+    for field in HASHED_FIELDS:
+        value = article.get(field) or ""
+        value = unicodedata.normalize("NFC", str(value))
+        parts.append(re.sub(r"\s+", " ", value).strip())
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def remove_duplicates_from_json(file_path):
+    """Remove duplicate articles from JSON file based on ID."""
+    try:
+        articles = load_file(file_path)
+        
+        # Create dictionary with ID as key to automatically remove duplicates
+        unique_articles = {}
+        duplicates_count = 0
+        
+        for article in articles:
+            article_id = article.get("id")
+            if article_id:
+                if article_id in unique_articles:
+                    duplicates_count += 1
+                else:
+                    unique_articles[article_id] = article
+            else:
+                # Articles without ID - keep them but add a warning
+                unique_articles[f"no_id_{len(unique_articles)}"] = article
+        
+        # Convert back to list
+        cleaned_articles = list(unique_articles.values())
+        
+        # Save cleaned data
+        dump_articles(cleaned_articles, file_path)
+        
+        print(f"Removed {duplicates_count} duplicate articles from {file_path}")
+        print(f"Original: {len(articles)} articles, Cleaned: {len(cleaned_articles)} articles")
+        
+        return cleaned_articles
+        
+    except Exception as e:
+        print(f"Error removing duplicates from {file_path}: {e}")
+        return None
+
+
+def find_near_duplicates_in_json(file_path, output_dir):
+    """Build near-duplicate clusters for an existing JSON dataset."""
+    try:
+        articles = iter_articles(file_path)
+
+        index = NearDuplicateIndex()
+        index.add_articles(articles)
+        save_duplicate_clusters(index, output_dir)
+        return index.clusters()
+
+    except Exception as e:
+        print(f"Error finding near-duplicates in {file_path}: {e}")
+        return None
+
+
+def build_keyword_index_from_json(file_path):
+    """Build the keyword index for an existing dataset and save it next to it."""
+    try:
+        index = KeywordIndex()
+        index.add_articles(iter_articles(file_path))
+        index_path = dataset_stem(file_path) + ".keywords.json"
+        index.save(index_path)
+        print(
+            f"Keyword index: {len(index.postings)} keywords from {len(index)} articles"
+        )
+        print(f"Keyword index saved to: {index_path}")
+        return index
+
+    except Exception as e:
+        print(f"Error building keyword index for {file_path}: {e}")
+        return None
+
+
+def build_store_from_json(file_path):
+    """Build the memory-mapped article store for an existing dataset."""
+    try:
+        count = build_store(iter_articles(file_path), store_stem(file_path))
+        print(f"Article store: {count} articles indexed by ID")
+        return count
+
+    except Exception as e:
+        print(f"Error building article store for {file_path}: {e}")
+        return None
+
+
+def load_articles(file_path, min_id=None, max_id=None):
+    """Yield the articles of a dataset, optionally only an ID range.
+
+    Reads through the article store when the dataset has one, so an ID range
+    costs an index lookup instead of a pass over the whole file.
+    """
+    min_id = 0 if min_id is None else min_id
+    max_id = 2**32 - 1 if max_id is None else max_id
+    store = ArticleStore.for_dataset(file_path)
+    if store is not None:
+        with store:
+            yield from store.range(min_id, max_id)
+        return
+    for article in iter_articles(file_path):
+        if min_id <= article.get("id", 0) <= max_id:
+            yield Article(article)
+
+
+def save_articles_progressively(articles, output_dir, filename, store=None):
+    """Save articles to JSON file progressively with thread safety and change detection.
+
+    Articles whose content hash matches the stored record are skipped, changed
+    articles replace the stored record as a new revision (the previous one is
+    appended to ``<name>.revisions.jsonl``) and the file is only rewritten when
+    something was added or updated. New and updated records are also appended
+    to ``store`` (an ArticleStoreWriter) if given. Returns a dict with
+    new/updated/unchanged counts.
+    """
+    stats = {"new": 0, "updated": 0, "unchanged": 0}
+    if not articles:
+        return stats
+
+    try:
+        with FILE_LOCK:
+            file_path = os.path.join(output_dir, filename)
+
+            # Load existing data if file exists
+            existing_data = []
+            if os.path.exists(file_path):
+                try:
+                    existing_data = [Article(record) for record in load_file(file_path)]
+                except (ValueError, FileNotFoundError):
+                    existing_data = []
+
+            # Map existing IDs to their position for fast lookup
+            existing_positions = {
+                article.get("id"): position
+                for position, article in enumerate(existing_data)
+                if article.get("id")
+            }
+
+            replaced_revisions = []
+            for article in articles:
+                article_id = article.get("id")
+                if not article_id:
+                    continue
+
+                new_hash = article.get("content_hash") or compute_content_hash(article)
+                position = existing_positions.get(article_id)
+
+                if position is None:
+                    record = Article(article, content_hash=new_hash, revision=1)
+                    record.setdefault("extractor_version", EXTRACTOR_VERSION)
+                    existing_positions[article_id] = len(existing_data)
+                    existing_data.append(record)
+                    if store is not None:
+                        store.append(record)
+                    stats["new"] += 1
+                    continue
+
+                current = existing_data[position]
+                current_hash = current.get("content_hash") or compute_content_hash(
+                    current
+                )
+                if current_hash == new_hash:
+                    stats["unchanged"] += 1
+                    continue
+
+                record = Article(
+                    article,
+                    content_hash=new_hash,
+                    revision=current.get("revision", 1) + 1,
+                )
+                record.setdefault("extractor_version", EXTRACTOR_VERSION)
+                replaced_revisions.append(current)
+                existing_data[position] = record
+                if store is not None:
+                    store.append(record)
+                stats["updated"] += 1
+
+            # Nothing new or changed - skip the write entirely
+            if stats["new"] or stats["updated"]:
+                if replaced_revisions:
+                    revisions_path = dataset_stem(file_path) + ".revisions.jsonl"
+                    with open(revisions_path, "a", encoding="utf-8") as f:
+                        dump_jsonl(replaced_revisions, f)
+
+                dump_articles(existing_data, file_path)
+                if store is not None:
+                    store.flush()
+
+            print(
+                f"Saved to {filename}: {stats['new']} new, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged (Total: {len(existing_data)})"
+            )
+    except IOError as e:
+        print(f"Error saving file: {e}")
+
+    return stats
+
+
+def clean_content(text):
+    """Clean and filter content text."""
+    if not text:
+        return ""
+
+    # Remove CDATA tags if present
+    text = re.sub(r"<!\[CDATA\[(.*?)\]\]>", r"\1", text)
+
+    # Remove HTML tags
+    text = re.sub(r"<[^>]+>", "", text)
+
+    # Remove extra whitespace and normalize
+    text = re.sub(r"\s+", " ", text.strip())
+
+    # Filter out very short content
+    if len(text) < 50:
+        return ""
+
+    return text
+
+
+def parse_article_html(raw_content, article_id, url):
+    """Extract article data from a raw Protext.cz article page."""
+    try:
+        # Parsing libraries are imported on first use (fast startup)
+        import chardet
+        from bs4 import BeautifulSoup
+
+        started = time.perf_counter()
+        timer = stage_timer()
+        # Detect encoding
+        detected = chardet.detect(raw_content)
+        encoding = detected["encoding"] if detected["encoding"] else "utf-8"
+
+        try:
+            content = raw_content.decode(encoding)
+        except UnicodeDecodeError:
+            content = raw_content.decode("utf-8", errors="ignore")
+        decoded = time.perf_counter()
+        STAGE_SECONDS.observe(decoded - started, stage="decode")
+        timer.mark("decode")
+
+        # Parse HTML with BeautifulSoup
+        soup = BeautifulSoup(content, "html.parser")
+        timer.mark("soup")
+
+        # Extract article data
+        article_data = {}
+
+        # Extract title - specific for Protext.cz structure
+        title_elem = (
+            soup.find("h1", {"itemprop": "name headline"})
+            or soup.find("h1")
+            or soup.find("title")
+        )
+        if title_elem:
+            article_data["title"] = clean_content(title_elem.get_text())
+        timer.mark("extract_title")
+
+        # Extract content - specific selectors for Protext.cz
+        content_selectors = [
+            "#articlebody",  # Main content area
+            '[itemprop="articleBody"]',  # Schema.org markup
+            ".omega.seven.columns",  # Content column
+            'article[role="main"]',  # Main article
+            ".article-content",
+            ".content",
+            "article",
+            "#content",
+        ]
+
+        full_text = ""
+        for selector in content_selectors:
+            elements = soup.select(selector)
+            if elements:
+                for element in elements:
+                    # Remove unwanted elements
+                    for unwanted in element.select(
+                        "script, style, nav, header, footer, aside, .note"
+                    ):
+                        unwanted.decompose()
+
+                    text = element.get_text(separator=" ", strip=True)
+                    if len(text) > len(full_text):
+                        full_text = text
+                break
+
+        if not full_text:
+            # Fallback - get all text but clean it
+            for unwanted in soup.select("script, style, nav, header, footer, aside"):
+                unwanted.decompose()
+            full_text = soup.get_text(separator=" ", strip=True)
+
+        article_data["content"] = clean_content(full_text)
+        article_data["link"] = url
+        article_data["id"] = article_id
+        timer.mark("extract_content")
+
+        # Extract date - specific for Protext.cz structure
+        date_elem = (
+            soup.find("p", {"itemprop": "datePublished"})
+            or soup.find("time")
+            or soup.find(class_="date")
+        )
+        if date_elem:
+            article_data["date"] = date_elem.get_text().strip()
+            published, location = parse_czech_date(article_data["date"])
+            if published:
+                article_data["published"] = published
+            if location:
+                article_data["location"] = location
+        timer.mark("extract_date")
+
+        # Extract keywords if available - improved search
+        keywords_text = ""
+        
+        # Method 1: Look for paragraph containing "Klíčová slova"
+        keywords_elem = soup.find(
+            "p", string=lambda text: text and "Klíčová slova" in text
+        )
+        if keywords_elem:
+            keywords_text = (
+                keywords_elem.get_text().replace("Klíčová slova", "").strip()
+            )
+        
+        # Method 2: Look for paragraph with strong tag containing "Klíčová slova"
+        if not keywords_text:
+            keywords_elem = soup.find("p", string=lambda text: text and "Klíčová slova" in text)
+            if keywords_elem:
+                # Get the full paragraph text
+                full_text = keywords_elem.get_text()
+                # Remove "Klíčová slova" and clean up
+                keywords_text = full_text.replace("Klíčová slova", "").strip()
+        
+        # Method 3: Look for any element containing "Klíčová slova" text
+        if not keywords_text:
+            keywords_elem = soup.find(string=lambda text: text and "Klíčová slova" in text)
+            if keywords_elem:
+                # Get parent element and extract text
+                parent = keywords_elem.parent
+                if parent:
+                    full_text = parent.get_text()
+                    keywords_text = full_text.replace("Klíčová slova", "").strip()
+        
+        # Method 4: Look for alternative keywords labels
+        if not keywords_text:
+            for keyword_label in ["Keywords", "Klíčová slova", "Tagy", "Tags"]:
+                keywords_elem = soup.find(string=lambda text: text and keyword_label in text)
+                if keywords_elem:
+                    parent = keywords_elem.parent
+                    if parent:
+                        full_text = parent.get_text()
+                        keywords_text = full_text.replace(keyword_label, "").strip()
+                        break
+        
+        # Method 5: Look for meta keywords
+        if not keywords_text:
+            meta_keywords = soup.find("meta", {"name": "keywords"})
+            if meta_keywords and meta_keywords.get("content"):
+                keywords_text = meta_keywords.get("content").strip()
+        
+        # Clean and format keywords
+        if keywords_text:
+            # Remove extra whitespace and normalize
+            keywords_text = re.sub(r'\s+', ' ', keywords_text.strip())
+            # Remove leading/trailing dashes and clean up
+            keywords_text = re.sub(r'^[-–—\s]+|[-–—\s]+$', '', keywords_text)
+            # Only add if we have meaningful content
+            if len(keywords_text) > 2:
+                article_data["keywords"] = keywords_text
+                article_data["keyword_tokens"] = tokenize_keywords(keywords_text)
+        timer.mark("extract_keywords")
+
+        # Extract category if available
+        category_elem = soup.find("span", {"itemprop": "about"})
+        if category_elem:
+            article_data["category"] = category_elem.get_text().strip()
+        timer.mark("extract_category")
+
+        article_data["content_hash"] = compute_content_hash(article_data)
+        article_data["extractor_version"] = EXTRACTOR_VERSION
+        timer.mark("content_hash")
+        STAGE_SECONDS.observe(time.perf_counter() - decoded, stage="parse")
+
+        return (
+            Article(article_data)
+            if article_data.get("title") and article_data.get("content")
+            else None
+        )
+
+    except Exception as e:
+        log_event(logging.WARNING, "parse failed", id=article_id, error=str(e)[:200])
+        return None
+
+
+class DatasetWriter:
+    """Saves found articles and keeps the derived files next to the dataset.
+
+    Besides the JSON dataset this maintains the article store (random access
+    by ID), the per-category views, the keyword index, the near-duplicate signatures and clusters,
+    and the category cache.
+    """
+
+    def __init__(self, output_dir, filename, rescan=False, category_cache=None):
+        self.output_dir = output_dir
+        self.filename = filename
+        self.rescan = rescan
+        self.pending = []
+        self.totals = {"new": 0, "updated": 0, "unchanged": 0}
+
+        stem = dataset_stem(os.path.join(output_dir, filename))
+
+        # Near-duplicate signatures are computed as articles come in; re-scans
+        # extend the saved index so new articles are compared with earlier runs
+        self.duplicate_index = NearDuplicateIndex()
+        self.signatures_path = stem + ".minhash.json"
+        if rescan and os.path.exists(self.signatures_path):
+            try:
+                self.duplicate_index = NearDuplicateIndex.load(self.signatures_path)
+            except (ValueError, KeyError, OSError):
+                print(
+                    "Near-duplicate index unreadable - rebuilding from scanned articles"
+                )
+
+        # Keyword index lives next to the dataset and is extended on every save
+        self.keyword_index = KeywordIndex()
+        self.keyword_index_path = stem + ".keywords.json"
+        if rescan and os.path.exists(self.keyword_index_path):
+            try:
+                self.keyword_index = KeywordIndex.load(self.keyword_index_path)
+            except (json.JSONDecodeError, KeyError, OSError):
+                print("Keyword index unreadable - rebuilding from scanned articles")
+
+        # Known categories let filtered scans skip non-matching IDs entirely
+        self.category_cache = (
+            category_cache if category_cache is not None else CategoryCache()
+        )
+        self.category_cache_path = os.path.join(output_dir, CATEGORY_CACHE_FILE)
+        self.category_cache.load(self.category_cache_path)
+
+        # Initialize file (re-scans compare against the existing file)
+        file_path = os.path.join(output_dir, filename)
+        if not rescan:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write("")  # Create empty file
+        elif (
+            os.path.exists(file_path)
+            and os.path.getsize(file_path)
+            and not os.path.exists(stem + INDEX_SUFFIX)
+        ):
+            build_store_from_json(file_path)
+
+        # Store records are appended as the dataset is saved
+        self.store = ArticleStoreWriter(stem, reset=not rescan)
+
+        # Category views follow every save, so filtered exports need no pass
+        views_path = stem + VIEWS_SUFFIX
+        bootstrap_views = (
+            rescan and os.path.exists(file_path) and not os.path.exists(views_path)
+        )
+        self.views = CategoryViews(views_path, reset=not rescan)
+        if bootstrap_views and os.path.getsize(file_path):
+            self.views.add(iter_articles(file_path))
+
+    def add(self, articles):
+        """Queue found articles for saving and index their signatures."""
+        self.pending.extend(articles)
+        timer = stage_timer()
+        with STAGE_SECONDS.time(stage="dedup"):
+            new_pairs = self.duplicate_index.add_articles(articles)
+        timer.mark("dedup")
+        if new_pairs:
+            print(f"Near-duplicates: {new_pairs} new similar pairs in batch")
+
+    def save(self):
+        """Save queued articles and update the keyword index."""
+        if not self.pending:
+            return
+        timer = stage_timer()
+        with STAGE_SECONDS.time(stage="save"):
+            stats = save_articles_progressively(
+                self.pending, self.output_dir, self.filename, store=self.store
+            )
+            timer.mark("save_dataset")
+            self.views.add(self.pending)
+            timer.mark("save_category_views")
+            for key in self.totals:
+                self.totals[key] += stats[key]
+            # Written once on close - rewriting all postings per batch is O(index)
+            self.keyword_index.add_articles(self.pending)
+            timer.mark("save_keyword_index")
+            self.category_cache.save(self.category_cache_path)
+            timer.mark("save_category_cache")
+        self.pending = []
+
+    def close(self):
+        """Final save plus the end-of-run reports."""
+        self.save()
+        self.store.close()
+        self.category_cache.save(self.category_cache_path)
+        self.keyword_index.save(self.keyword_index_path)
+
+        if self.rescan:
+            print(
+                f"Re-scan summary: {self.totals['new']} new, "
+                f"{self.totals['updated']} updated, "
+                f"{self.totals['unchanged']} unchanged"
+            )
+
+        # Keep signatures next to the dataset and report duplicate clusters
+        if self.duplicate_index.signatures:
+            self.duplicate_index.save(self.signatures_path)
+            save_duplicate_clusters(self.duplicate_index, self.output_dir)
+
+
+@dataclass
+class ScanConfig:
+    """Parameters of one ID range scan."""
+
+    min_id: int
+    max_id: int
+    step: int = 1
+    max_workers: int = 10
+    batch_size: int = 500
+    output_dir: Optional[str] = None
+    filename: Optional[str] = None
+    reverse: bool = True
+    save_frequency: int = 50
+    selected_categories: Optional[list] = None
+    rescan: bool = False
+    processes: int = 1
+    metrics_port: Optional[int] = None
+    live_status: Optional[bool] = None  # status line, default: on a terminal
+    profile: bool = False  # stage timings, lock waits and stack samples
+    retry_passes: int = 2  # deferred passes over IDs that failed transiently
+    order: str = "sequential"  # or "priority": best-yielding ID blocks first
+    time_limit: Optional[float] = None  # seconds; no new batches after that
+
+
+class Scraper:
+    """Protext.cz scraper owning its transport, rate limiter and ID registry.
+
+    Instances do not share state, so several scans can run in one process.
+    With ``hedge`` slow requests are duplicated on a second Tor circuit (see
+    HedgedTransport in transport.py). With ``parse_cache_dir`` extraction
+    results are cached by page hash and extractor version (see parse_cache.py).
+    """
+
+    def __init__(
+        self,
+        use_tor=True,
+        rate_limiter=None,
+        category_cache=None,
+        transport=None,
+        base_url=BASE_URL,
+        delay_scale=1.0,
+        hedge=False,
+        parse_cache_dir=None,
+    ):
+        self.use_tor = use_tor
+        self.rate_limiter = rate_limiter
+        self.category_cache = (
+            category_cache if category_cache is not None else CategoryCache()
+        )
+        self.hedge = hedge
+        if hedge and transport is None:
+            transport = HedgedTransport(
+                RequestsTransport(use_tor, isolation="protext-primary"),
+                RequestsTransport(use_tor, isolation="protext-hedge"),
+            )
+        elif hedge and not isinstance(transport, HedgedTransport):
+            hedge_transport = transport
+            if isinstance(transport, Transport):
+                hedge_transport = transport.isolated("protext-hedge")
+            transport = HedgedTransport(transport, hedge_transport)
+        self.transport = transport or RequestsTransport(use_tor)
+        self.base_url = base_url.rstrip("/")
+        self.delay_scale = delay_scale
+        self.processed_ids = set()
+        self._ids_lock = ProfiledLock("processed_ids_lock")
+        self.dead_letters = DeadLetterQueue()
+        self.parse_cache_dir = parse_cache_dir
+        self.parse_cache = None
+        if parse_cache_dir:
+            self.parse_cache = ParseCache(parse_cache_dir, EXTRACTOR_VERSION)
+
+    def request(self, url, **kwargs):
+        """Make a request through this scraper's transport and rate limiter."""
+        return make_request_with_retry(
+            url,
+            use_tor=self.use_tor,
+            transport=self.transport,
+            rate_limiter=self.rate_limiter,
+            delay_scale=self.delay_scale,
+            **kwargs,
+        )
+
+    def article_url(self, article_id):
+        return f"{self.base_url}/zprava.php?id={article_id}"
+
+    def set_max_workers(self, max_workers):
+        """Announce how many threads fetch concurrently (sizes the hedging pool)."""
+        if isinstance(self.transport, HedgedTransport):
+            self.transport.set_max_workers(max_workers)
+
+    def fetch_latest_ids(self):
+        """Fetch the RSS feed, returns (newest ID, oldest ID) or (None, None)."""
+        print("Fetching latest articles from RSS feeds to find newest ID...")
+
+        # Use only main RSS feed for speed
+        main_feed = f"{self.base_url}/rss/cz.php"
+        all_ids = []
+
+        try:
+            print(f"Checking {main_feed}...")
+            response = self.request(main_feed, max_retries=2, base_delay=0.5)
+            if response and response.status_code == 200:
+                # Parse RSS content
+                import xml.etree.ElementTree as ET
+
+                root = ET.fromstring(response.text)
+                items = root.findall(".//item")
+
+                for item in items:
+                    link_elem = item.find("link")
+                    if link_elem is not None and link_elem.text:
+                        article_id = extract_protext_id(link_elem.text)
+                        if article_id:
+                            all_ids.append(article_id)
+
+        except Exception as e:
+            print(f"Error fetching {main_feed}: {e}")
+
+        if all_ids:
+            max_id = max(all_ids)
+            min_id = min(all_ids)
+            print(f"Found {len(all_ids)} articles in RSS feed")
+            print(f"ID range: {min_id} - {max_id}")
+            print(f"Newest article ID: {max_id}")
+            return max_id, min_id
+        else:
+            print("No articles found in RSS feed, using fallback")
+            return None, None
+
+    def fetch(self, article_id, selected_categories=None, defer_failures=False):
+        """Fetch article content by ID from Protext.cz.
+
+        With ``selected_categories`` the page is streamed and the download is
+        aborted (returning None) as soon as a non-selected category is seen.
+        With ``defer_failures`` there is a single attempt and a failure raises
+        FetchError (network, throttled or parse) instead of returning None, so
+        None always means a missing or filtered ID.
+        """
+        url = self.article_url(article_id)
+        request_options = (
+            {"max_retries": 1, "raise_on_failure": True} if defer_failures else {}
+        )
+        try:
+            started = time.perf_counter()
+            if selected_categories:
+                response = self.request(url, stream=True, **request_options)
+                if not response:
+                    return None
+                raw_content, category = read_until_category(
+                    response, selected_categories
+                )
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="fetch")
+                if category is not None:
+                    self.category_cache.set(article_id, category)
+                if raw_content is None:
+                    return None
+            else:
+                response = self.request(url, **request_options)
+                if not response:
+                    return None
+                raw_content = response.content
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="fetch")
+                BYTES_DOWNLOADED.inc(len(raw_content))
+
+            article_data = self.parse(raw_content, article_id, url)
+            if article_data:
+                self.category_cache.set(
+                    article_id, article_data.get("category", "Uncategorized")
+                )
+            elif defer_failures:
+                raise FetchError(FAILURE_PARSE, "no title or content extracted")
+            return article_data
+
+        except FetchError:
+            raise
+        except requests.exceptions.RequestException as e:
+            # Connection lost while reading the body
+            if defer_failures:
+                raise FetchError(FAILURE_NETWORK, str(e)[:200]) from e
+            log_event(
+                logging.WARNING, "fetch failed", id=article_id, error=str(e)[:200]
+            )
+            return None
+        except Exception as e:
+            log_event(
+                logging.WARNING, "fetch failed", id=article_id, error=str(e)[:200]
+            )
+            return None
+
+    def parse(self, raw_content, article_id, url):
+        """parse_article_html through the parse-result cache if there is one."""
+        if self.parse_cache is None:
+            return parse_article_html(raw_content, article_id, url)
+        hit, result = self.parse_cache.get(article_id, raw_content)
+        if hit:
+            return Article(result, link=url, id=article_id) if result else None
+        article_data = parse_article_html(raw_content, article_id, url)
+        cached = None
+        if article_data:
+            cached = {
+                key: value
+                for key, value in article_data.items()
+                if key not in ("link", "id")
+            }
+        self.parse_cache.put(article_id, raw_content, cached)
+        return article_data
+
+    def probe_date(self, article_id):
+        """Publication date (ISO) of a single ID, or None if it is missing.
+
+        A failed fetch must not look like a missing ID to the date search, so
+        network errors and throttling are retried and finally raise FetchError.
+        Unparsable pages are stepped over like missing IDs.
+        """
+        for attempt in range(PROBE_ATTEMPTS):
+            try:
+                article_data = self.fetch(article_id, defer_failures=True)
+            except FetchError as e:
+                if e.kind == FAILURE_PARSE:
+                    return None
+                if attempt + 1 == PROBE_ATTEMPTS:
+                    raise
+                time.sleep(PROBE_RETRY_DELAY * (attempt + 1) * self.delay_scale)
+                continue
+            return article_data.get("published") if article_data else None
+
+    def id_range_for_dates(self, start, end, min_id, max_id, output_dir=None):
+        """Map ISO dates ``start``..``end`` to an ID range with a few probes.
+
+        Uses and refines the sparse date index in ``date_index.json`` of the
+        output directory (see date_index.py). Returns (first, last) or None;
+        raises FetchError if a probe keeps failing.
+        """
+        date_index = DateIndex()
+        index_path = None
+        if output_dir:
+            index_path = os.path.join(output_dir, DATE_INDEX_FILE)
+            date_index.load(index_path)
+        try:
+            id_range = date_index.id_range_for_dates(
+                start, end, self.probe_date, min_id, max_id
+            )
+        finally:
+            # Keep the dates probed so far, also when the search is aborted
+            if index_path:
+                date_index.save(index_path)
+        print(
+            f"Date range {start} - {end}: "
+            + (f"IDs {id_range[0]}-{id_range[1]}" if id_range else "no IDs")
+            + f" ({date_index.probes} probes, {len(date_index)} indexed IDs)"
+        )
+        return id_range
+
+    def process_id(self, article_id, selected_categories=None, defer_failures=False):
+        """Process single article ID (for parallel execution) without duplicates.
+
+        With ``defer_failures`` an ID that fails is not retried inline but
+        recorded in ``self.dead_letters`` for a deferred retry pass.
+        """
+        ACTIVE_WORKERS.inc()
+        try:
+            return self._process_id(article_id, selected_categories, defer_failures)
+        finally:
+            ACTIVE_WORKERS.dec()
+
+    def _process_id(self, article_id, selected_categories, defer_failures):
+        # Check if already processed
+        with self._ids_lock:
+            if article_id in self.processed_ids:
+                ARTICLES.inc(result="duplicate")
+                log_event(logging.DEBUG, "id", id=article_id, result="duplicate")
+                return None
+            self.processed_ids.add(article_id)
+
+        # Skip IDs whose category is already known not to match
+        if selected_categories and self.category_cache.is_rejected(
+            article_id, selected_categories
+        ):
+            ARTICLES.inc(result="filtered")
+            log_event(
+                logging.DEBUG,
+                "id",
+                id=article_id,
+                result="filtered",
+                category=self.category_cache.get(article_id),
+                source="cache",
+            )
+            return None
+
+        try:
+            article_data = self.fetch(article_id, selected_categories, defer_failures)
+        except FetchError as e:
+            # A later pass may process the ID again
+            with self._ids_lock:
+                self.processed_ids.discard(article_id)
+            self.dead_letters.add(article_id, e.kind, e.detail)
+            ARTICLES.inc(result="deferred")
+            FETCH_FAILURES.inc(kind=e.kind)
+            log_event(
+                logging.DEBUG,
+                "id",
+                id=article_id,
+                result="deferred",
+                failure=e.kind,
+                error=e.detail,
+            )
+            return None
+        if defer_failures:
+            self.dead_letters.remove(article_id)  # resolved one way or another
+
+        if article_data:
+            # Filter by category if specified
+            if selected_categories:
+                article_category = article_data.get("category", "Uncategorized")
+                if article_category not in selected_categories:
+                    ARTICLES.inc(result="filtered")
+                    log_event(
+                        logging.DEBUG,
+                        "id",
+                        id=article_id,
+                        result="filtered",
+                        category=article_category,
+                        source="page",
+                    )
+                    return None
+
+            ARTICLES.inc(result="found")
+            log_event(
+                logging.DEBUG,
+                "id",
+                id=article_id,
+                result="found",
+                title=article_data["title"][:50],
+                keywords=(article_data.get("keywords") or "")[:30],
+            )
+            return article_data
+        elif selected_categories and self.category_cache.is_rejected(
+            article_id, selected_categories
+        ):
+            ARTICLES.inc(result="filtered")
+            log_event(
+                logging.DEBUG,
+                "id",
+                id=article_id,
+                result="filtered",
+                category=self.category_cache.get(article_id),
+                source="stream",
+            )
+            return None
+        else:
+            ARTICLES.inc(result="missing")
+            log_event(logging.DEBUG, "id", id=article_id, result="missing")
+            return None
+
+    def scan(self, config):
+        """Scan an ID range in batches, yielding articles as batches complete.
+
+        With ``config.rescan`` the existing output file is kept and re-scraped
+        articles are compared against it by content hash. With
+        ``config.processes > 1`` the range is split across worker processes
+        (see multiprocess.py); worker processes use the default transport.
+        Metrics are written to ``metrics.json`` in the output directory and
+        served on ``config.metrics_port`` if set; a rolling status with an ETA
+        goes to ``status.json`` and the terminal status line. With
+        ``config.profile`` a stage/lock profile and flamegraph stacks are
+        written to the output directory at the end (see profiling.py).
+
+        IDs that fail (network errors, throttling, unparsable pages) are not
+        retried inline but collected in a dead-letter queue persisted to
+        ``dead_letters.json``; up to ``config.retry_passes`` deferred passes at
+        the end retry the transient ones, including IDs left over from
+        earlier runs (in multi-process mode the writer process runs them once
+        all workers are done).
+
+        Hit rates per ID block are learned into ``block_stats.json``; with
+        ``config.order == "priority"`` batches come from the blocks with the
+        best expected yield (see scheduler.py). Publication dates of found
+        articles are sampled into the sparse ``date_index.json``.
+
+        With ``config.processes > 1`` the scan runs in worker processes (see
+        multiprocess.py), which requires ``output_dir`` and ``filename``;
+        ``batch_size`` is then the size of the chunks handed to the workers.
+        """
+        block_stats = None
+        if config.output_dir:
+            block_stats = BlockStats()
+            block_stats_path = os.path.join(config.output_dir, BLOCK_STATS_FILE)
+            block_stats.load(block_stats_path)
+            date_index = DateIndex()
+            date_index_path = os.path.join(config.output_dir, DATE_INDEX_FILE)
+            date_index.load(date_index_path)
+        scheduler = None
+        if config.order == "priority":
+            scheduler = PriorityScheduler(
+                block_stats or BlockStats(),
+                config.min_id,
+                config.max_id,
+                config.step,
+                config.reverse,
+                config.selected_categories,
+            )
+
+        if config.processes > 1:
+            if not (config.output_dir and config.filename):
+                raise ValueError("Multi-process scans need output_dir and filename")
+            from multiprocess import scan_id_range_multiprocess
+
+            yield from scan_id_range_multiprocess(
+                config.min_id,
+                config.max_id,
+                scheduler=scheduler,
+                processes=config.processes,
+                max_workers=config.max_workers,
+                chunk_size=config.batch_size,
+                step=config.step,
+                output_dir=config.output_dir,
+                filename=config.filename,
+                reverse=config.reverse,
+                save_frequency=config.save_frequency,
+                selected_categories=config.selected_categories,
+                rescan=config.rescan,
+                metrics_port=config.metrics_port,
+                live_status=config.live_status,
+                profile=config.profile,
+                retry_passes=config.retry_passes,
+                time_limit=config.time_limit,
+                scraper_options={
+                    "use_tor": self.use_tor,
+                    "base_url": self.base_url,
+                    "delay_scale": self.delay_scale,
+                    "hedge": self.hedge,
+                    "parse_cache_dir": self.parse_cache_dir,
+                },
+            )
+            return
+
+        dead_letters_path = None
+        if config.output_dir:
+            dead_letters_path = os.path.join(config.output_dir, DEAD_LETTERS_FILE)
+            self.dead_letters.load(dead_letters_path)
+
+        self.set_max_workers(config.max_workers)
+        min_id, max_id = config.min_id, config.max_id
+        step, batch_size = config.step, config.batch_size
+        direction = "NEWEST → OLDEST" if config.reverse else "OLDEST → NEWEST"
+        if scheduler is not None:
+            direction = "PRIORITY (best-yielding blocks first)"
+        print(
+            f"\nBatch parallel scanning ID range: {min_id} - {max_id} "
+            f"(step: {step}, workers: {config.max_workers}, batch: {batch_size})"
+        )
+        print(f"Direction: {direction}")
+
+        total_range = max_id - min_id + 1
+        total_batches = (total_range + batch_size - 1) // batch_size
+
+        print(
+            f"Total range: {total_range} IDs, Processing in {total_batches} "
+            f"batches of {batch_size}"
+        )
+        print(f"Saving every {config.save_frequency} articles")
+
+        found_count = 0
+        writer = None
+        if config.output_dir and config.filename:
+            writer = DatasetWriter(
+                config.output_dir,
+                config.filename,
+                config.rescan,
+                category_cache=self.category_cache,
+            )
+        exporter = MetricsExporter(
+            json_path=(
+                os.path.join(config.output_dir, METRICS_FILE)
+                if config.output_dir
+                else None
+            ),
+            port=config.metrics_port,
+        ).start()
+        progress = ProgressReporter(REGISTRY.snapshot, total_range).start()
+        status = StatusMonitor(
+            REGISTRY.snapshot,
+            len(range(min_id, max_id + 1, step)),
+            status_path=(
+                os.path.join(config.output_dir, STATUS_FILE)
+                if config.output_dir
+                else None
+            ),
+            live=config.live_status,
+        ).start()
+        profiler = Profiler().start() if config.profile else None
+        deadline = (
+            time.monotonic() + config.time_limit if config.time_limit else None
+        )
+
+        try:
+            # Process in batches (reverse order if requested)
+            for batch_num in range(total_batches):
+                if deadline is not None and time.monotonic() > deadline:
+                    print(
+                        f"\nTime limit reached after {batch_num} of "
+                        f"{total_batches} batches"
+                    )
+                    break
+                if scheduler is not None:
+                    batch_id_list = scheduler.next_batch(batch_size)
+                    if not batch_id_list:
+                        break
+                elif config.reverse:
+                    # Start from highest ID and go down
+                    batch_start = max_id - (batch_num * batch_size)
+                    batch_end = max(batch_start - batch_size + 1, min_id)
+                    batch_id_list = list(range(batch_start, batch_end - 1, -step))
+                else:
+                    # Start from lowest ID and go up
+                    batch_start = min_id + (batch_num * batch_size)
+                    batch_end = min(batch_start + batch_size - 1, max_id)
+                    batch_id_list = list(range(batch_start, batch_end + 1, step))
+
+                if scheduler is not None:
+                    # Blocks are not contiguous - show the span they come from
+                    id_span = f"{min(batch_id_list)}-{max(batch_id_list)}"
+                else:
+                    id_span = f"{batch_id_list[0]}-{batch_id_list[-1]}"
+                print(
+                    f"\nProcessing batch {batch_num + 1}/{total_batches}: "
+                    f"IDs {id_span} ({direction})"
+                )
+
+                batch_found_articles = self._process_batch(batch_id_list, config)
+                if block_stats is not None:
+                    self.record_blocks(
+                        block_stats, batch_id_list, batch_found_articles
+                    )
+                    date_index.add_articles(batch_found_articles)
+
+                found_count += len(batch_found_articles)
+                print(
+                    f"Batch {batch_num + 1} complete: Found "
+                    f"{len(batch_found_articles)} articles (Total: {found_count})"
+                )
+
+                # Progressive saving - save every N articles
+                if writer is not None:
+                    writer.add(batch_found_articles)
+                    if len(writer.pending) >= config.save_frequency:
+                        print(f"Saving {len(writer.pending)} articles to disk...")
+                        writer.save()
+
+                yield from batch_found_articles
+
+                # Shorter delay between batches since we have Tor
+                if batch_num < total_batches - 1:
+                    # Increased for stability
+                    delay = random.uniform(2, 5) * self.delay_scale
+                    print(f"Waiting {delay:.1f} seconds before next batch...")
+                    timer = stage_timer()
+
+                    # Optionally renew Tor circuit every few batches (every 15)
+                    if self.use_tor and batch_num % 15 == 0 and batch_num > 0:
+                        print("Renewing Tor circuit for fresh IP...")
+                        renew_tor_circuit()
+
+                    time.sleep(delay)
+                    timer.mark("batch_delay")
+
+                if dead_letters_path:
+                    self.dead_letters.save(dead_letters_path)
+                if block_stats is not None:
+                    block_stats.save(block_stats_path)
+                    date_index.save(date_index_path)
+
+            if deadline is None or time.monotonic() <= deadline:
+                for article_data in self.retry_dead_letters(config, writer):
+                    found_count += 1
+                    yield article_data
+        finally:
+            # Final save of all remaining articles (also if the caller stops early)
+            if writer is not None:
+                if writer.pending:
+                    print(f"Final save: {len(writer.pending)} articles")
+                writer.close()
+            if dead_letters_path:
+                self.dead_letters.save(dead_letters_path)
+            self._print_dead_letters(dead_letters_path)
+            exporter.stop()
+            progress.stop()
+            status.stop()
+            if isinstance(self.transport, HedgedTransport):
+                self.transport.print_summary()
+            if self.parse_cache is not None:
+                self.parse_cache.print_summary()
+            if profiler is not None:
+                profiler.finish(config.output_dir or ".")
+
+        print(
+            f"\nBatch parallel scan complete: Found {found_count} "
+            f"articles in range {min_id}-{max_id}"
+        )
+
+    def _process_batch(self, id_list, config):
+        """Process IDs in parallel, return the found articles."""
+        found = []
+        with ThreadPoolExecutor(max_workers=config.max_workers) as executor:
+            # Submit all tasks for this batch
+            future_to_id = {
+                executor.submit(
+                    self.process_id,
+                    article_id,
+                    config.selected_categories,
+                    defer_failures=True,
+                ): article_id
+                for article_id in id_list
+            }
+
+            QUEUE_DEPTH.set(len(future_to_id))
+
+            # Process completed tasks
+            for future in as_completed(future_to_id):
+                QUEUE_DEPTH.dec()
+                article_id = future_to_id[future]
+                try:
+                    article_data = future.result()
+                    if article_data:
+                        found.append(article_data)
+
+                except Exception as e:
+                    log_event(
+                        logging.WARNING,
+                        "processing failed",
+                        id=article_id,
+                        error=str(e)[:200],
+                    )
+        return found
+
+    def record_blocks(self, block_stats, id_list, found):
+        """Count the answered IDs of a batch into the per-block statistics."""
+        found_categories = {article["id"]: article.get("category") for article in found}
+        for article_id in id_list:
+            if article_id in found_categories:
+                block_stats.record(article_id, True, found_categories[article_id])
+            elif article_id not in self.dead_letters:
+                # Filtered IDs exist - their category is known from the cache
+                category = self.category_cache.get(article_id)
+                block_stats.record(article_id, category is not None, category)
+
+    def retry_dead_letters(self, config, writer):
+        """Deferred passes over transiently failed IDs, yields recovered articles."""
+        for pass_num in range(config.retry_passes):
+            failed_ids = self.dead_letters.pending()
+            if not failed_ids:
+                return
+            # Back off once for the whole queue instead of per ID in the workers
+            delay = RETRY_PASS_DELAY * (pass_num + 1) * self.delay_scale
+            print(
+                f"\nRetry pass {pass_num + 1}/{config.retry_passes}: "
+                f"{len(failed_ids)} failed IDs (waiting {delay:.0f} s first)"
+            )
+            time.sleep(delay)
+
+            recovered = self._process_batch(failed_ids, config)
+            print(
+                f"Retry pass {pass_num + 1} complete: recovered {len(recovered)} "
+                f"articles, {len(self.dead_letters.pending())} IDs still failing"
+            )
+            if writer is not None:
+                writer.add(recovered)
+                writer.save()
+            yield from recovered
+
+    def _print_dead_letters(self, path):
+        counts = self.dead_letters.counts()
+        if not counts:
+            return
+        summary = ", ".join(
+            f"{kind}: {count}" for kind, count in sorted(counts.items())
+        )
+        where = f" in {os.path.basename(path)}" if path else ""
+        print(f"Failed IDs kept for a later run{where} - {summary}")
+
+    def scan_range(self, min_id, max_id, **options):
+        """Scan an ID range and return all found articles as a list."""
+        return list(self.scan(ScanConfig(min_id, max_id, **options)))
+
+
+# Module-level API backed by one shared Scraper (used by the interactive CLI)
+DEFAULT_SCRAPER = Scraper()
+
+
+def fetch_article_by_id(article_id, selected_categories=None):
+    """Fetch article content by ID from Protext.cz (see Scraper.fetch)."""
+    return DEFAULT_SCRAPER.fetch(article_id, selected_categories)
+
+
+def process_article_id(
+    article_id, output_dir=None, filename=None, selected_categories=None
+):
+    """Process single article ID with duplicate prevention (see Scraper.process_id)."""
+    return DEFAULT_SCRAPER.process_id(article_id, selected_categories)
+
+
+def scan_id_range_parallel_batch(min_id, max_id, **options):
+    """Scan a large range of IDs using batch processing (see Scraper.scan)."""
+    return DEFAULT_SCRAPER.scan_range(min_id, max_id, **options)
+
+
+def scan_id_range_parallel(
+    min_id,
+    max_id,
+    step=1,
+    max_workers=20,
+    output_dir=None,
+    filename=None,
+    selected_categories=None,
+):
+    """Scan a range of IDs using parallel workers for much faster processing."""
+    print(
+        f"\nParallel scanning ID range: {min_id} - {max_id} "
+        f"(step: {step}, workers: {max_workers})"
+    )
+
+    # Create list of IDs to process
+    id_list = list(range(min_id, max_id + 1, step))
+    found_articles = []
+    article_count = 0
+
+    # Initialize file if needed
+    if output_dir and filename:
+        with open(os.path.join(output_dir, filename), "w", encoding="utf-8") as f:
+            f.write("")  # Create empty file
+
+    # Process IDs in parallel
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Submit all tasks
+        future_to_id = {
+            executor.submit(
+                process_article_id,
+                article_id,
+                output_dir,
+                filename,
+                selected_categories,
+            ): article_id
+            for article_id in id_list
+        }
+
+        # Process completed tasks
+        for future in as_completed(future_to_id):
+            article_id = future_to_id[future]
+            try:
+                article_data = future.result()
+                if article_data:
+                    found_articles.append(article_data)
+                    article_count += 1
+
+                    # Note: Articles are saved progressively in batch mode
+
+                # Progress update
+                if len(found_articles) % 100 == 0:
+                    print(f"Progress: {len(found_articles)} articles found so far...")
+
+            except Exception as e:
+                print(f"Error processing ID {article_id}: {e}")
+
+    print(
+        f"\nParallel scan complete: Found {len(found_articles)} "
+        f"articles in range {min_id}-{max_id}"
+    )
+    return found_articles
+
+
+def scan_id_range(min_id, max_id, step=1, output_dir=None, filename=None):
+    """Scan a range of IDs to find all available articles with progressive saving."""
+    print(f"\nScanning ID range: {min_id} - {max_id} (step: {step})")
+    found_articles = []
+
+    for article_id in range(min_id, max_id + 1, step):
+        print(f"Checking ID {article_id}...", end=" ")
+
+        article_data = fetch_article_by_id(article_id)
+        if article_data:
+            found_articles.append(article_data)
+            print(f"✓ Found: {article_data['title'][:50]}...")
+
+            # Save progressively every 5 articles
+            if output_dir and filename and len(found_articles) % 5 == 0:
+                save_articles_progressively(found_articles, output_dir, filename)
+                print(f"Saved {len(found_articles)} articles to disk")
+        else:
+            print("✗ Not found")
+
+        # Reduced delay for faster scraping
+        time.sleep(random.uniform(0.2, 0.8))
+
+        # Progress update every 20 articles
+        if article_id % 20 == 0:
+            print(f"Progress: {article_id}/{max_id} (found: {len(found_articles)})")
+
+    # Final save
+    if output_dir and filename and found_articles:
+        save_articles_progressively(found_articles, output_dir, filename)
+
+    print(
+        f"\nScan complete: Found {len(found_articles)} articles in range "
+        f"{min_id}-{max_id}"
+    )
+    return found_articles
+
+
+def extract_protext_id(url):
+    """Extract ID number from Protext.cz URL."""
+    if not url or "protext.cz" not in url:
+        return None
+
+    # Pattern: https://www.protext.cz/zprava.php?id=53986
+    match = re.search(r"id=(\d+)", url)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def fetch_full_content(url):
+    """Fetch full content from article URL."""
+    import chardet
+    from bs4 import BeautifulSoup
+
+    try:
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        }
+        response = requests.get(url, headers=headers, timeout=15)
+        response.raise_for_status()
+
+        # Detect encoding
+        raw_content = response.content
+        detected = chardet.detect(raw_content)
+        encoding = detected["encoding"] if detected["encoding"] else "utf-8"
+
+        try:
+            content = raw_content.decode(encoding)
+        except UnicodeDecodeError:
+            content = raw_content.decode("utf-8", errors="ignore")
+
+        # Parse HTML with BeautifulSoup
+        soup = BeautifulSoup(content, "html.parser")
+
+        # Remove script and style elements
+        for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
+            script.decompose()
+
+        # Try to find main content area
+        content_selectors = [
+            "article",
+            ".content",
+            ".article-content",
+            ".post-content",
+            ".entry-content",
+            ".press-release",
+            ".news-content",
+            "main",
+            ".main-content",
+            "#content",
+            ".body",
+        ]
+
+        full_text = ""
+        for selector in content_selectors:
+            elements = soup.select(selector)
+            if elements:
+                for element in elements:
+                    text = element.get_text(separator=" ", strip=True)
+                    if len(text) > len(full_text):
+                        full_text = text
+                break
+
+        # If no specific content found, get all text
+        if not full_text:
+            full_text = soup.get_text(separator=" ", strip=True)
+
+        # Clean up the text
+        full_text = re.sub(r"\s+", " ", full_text.strip())
+
+        return full_text if len(full_text) > 100 else None
+
+    except Exception as e:
+        print(f"Error fetching full content from {url}: {e}")
+        return None
+
+
+def fetch_latest_rss_articles():
+    """Fetch latest articles from RSS feeds to find the newest ID."""
+    return DEFAULT_SCRAPER.fetch_latest_ids()
+
+
+def analyze_categories_from_json(json_file_path, output_dir=None):
+    """Analyze categories from scraped JSON data and return category statistics.
+
+    The file is streamed, so this works on datasets larger than memory. When
+    ``output_dir`` is given, the full analysis (category x month counts,
+    keyword frequencies, content lengths, ID ranges) is saved there as well.
+    """
+    try:
+        aggregator = aggregate_file(json_file_path)
+
+        categories = dict(aggregator.categories)
+        total_articles = aggregator.total_articles
+
+        # Sort categories by count (descending)
+        sorted_categories = aggregator.sorted_categories()
+
+        print("\nCATEGORY ANALYSIS")
+        print(f"Total articles: {total_articles}")
+        print(f"Number of categories: {len(categories)}")
+        print("\nCategories (article count):")
+
+        for category, count in sorted_categories:
+            percentage = (count / total_articles) * 100
+            print(f"  {category}: {count} ({percentage:.1f}%)")
+
+        if output_dir:
+            save_analysis_to_json(aggregator, output_dir, json_file_path)
+
+        return categories, sorted_categories
+
+    except Exception as e:
+        print(f"Error analyzing categories: {e}")
+        return {}, []
+
+
+def save_categories_to_json(categories, output_dir):
+    """Save categories analysis to JSON file."""
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        categories_file = os.path.join(output_dir, f"categories_{timestamp}.json")
+
+        categories_data = {
+            "analysis_date": datetime.now().isoformat(),
+            "total_categories": len(categories),
+            "categories": categories,
+        }
+
+        dump_file(categories_data, categories_file)
+
+        print(f"Categories saved to: {categories_file}")
+        return categories_file
+
+    except Exception as e:
+        print(f"Error saving categories: {e}")
+        return None
+
+
+def filter_articles_by_categories(articles, selected_categories):
+    """Filter articles by selected categories."""
+    if not selected_categories:
+        return articles
+
+    filtered_articles = []
+    for article in articles:
+        article_category = article.get("category", "Uncategorized")
+        if article_category in selected_categories:
+            filtered_articles.append(article)
+
+    return filtered_articles
+
+
+def export_filtered_articles(file_path, selected_categories, output_dir):
+    """Save the articles of the selected categories to a new filtered file.
+
+    Uses the category views and article store kept next to the dataset, so
+    nothing is re-read; datasets without them are streamed and filtered.
+    Returns (filtered file name, article count).
+    """
+    filtered_filename = (
+        f"filtered_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output_path = os.path.join(output_dir, filtered_filename)
+    views = CategoryViews.for_dataset(file_path)
+    store = ArticleStore.for_dataset(file_path)
+    if views is not None and store is not None:
+        with store:
+            count = export_view(views, store, selected_categories, output_path)
+    else:
+        filtered_articles = filter_articles_by_categories(
+            iter_articles(file_path), selected_categories
+        )
+        dump_articles(filtered_articles, output_path)
+        count = len(filtered_articles)
+    return filtered_filename, count
+
+
+def get_categories_from_file():
+    """Try to load categories from existing JSON file."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    categories_file = os.path.join(script_dir, "data", "categories.json")
+
+    if os.path.exists(categories_file):
+        try:
+            with open(categories_file, "r", encoding="utf-8") as f:
+                categories_list = json.load(f)
+
+            # Convert list to sorted tuples format (count = 0 since we don't have stats)
+            sorted_categories = [(cat, 0) for cat in categories_list]
+
+            print(f"\nCategories loaded from file: {categories_file}")
+            print(f"Available categories ({len(categories_list)}):")
+            for i, (category, count) in enumerate(sorted_categories, 1):
+                print(f"{i}. {category}")
+
+            return sorted_categories
+        except Exception as e:
+            print(f"Error loading categories from file: {e}")
+
+    return None
+
+
+def get_categories_from_sample(
+    latest_id, max_requests=300, min_id=1, fetch_article=None
+):
+    """Get available categories from a stratified random sample of article IDs.
+
+    IDs are drawn across the whole ID range instead of the newest window, so
+    the result is not biased toward recent news. Sampling stops as soon as
+    the category proportions are known within the target margin.
+    """
+    print(f"\nEstimating available categories from at most {max_requests} requests...")
+
+    result = estimate_category_distribution(
+        fetch_article or fetch_article_by_id,
+        min_id,
+        latest_id,
+        target_margin=0.05,
+        max_requests=max_requests,
+    )
+
+    if not result["articles"]:
+        print("Failed to retrieve a sample of articles for category analysis.")
+        return None
+
+    print_estimates(result)
+
+    # Keep the (category, count) format used by the selection menu
+    counts = {}
+    for stratum in result["strata"]:
+        for category, count in stratum["categories"].items():
+            counts[category] = counts.get(category, 0) + count
+    return [(category, counts[category]) for category, _, _ in result["estimates"]]
@@ -0,0 +1,183 @@
+"""
+JSON serialization backend and output file handling.
+Datasets are written compactly, one article per line inside the JSON array,
+through the fastest available encoder: orjson, then msgspec, then the
+standard library. Output files named ``*.gz`` or ``*.zst`` are compressed as
+a stream (zstd needs the optional ``zstandard`` package). Indented output is
+an explicit export step (``export_pretty``).
+"""
+
+import gzip
+import io
+import json
+import os
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+DATASET_SUFFIXES = (".json", ".jsonl")
+
+
+def _default(obj):
+    """Encode mapping-like records (Article) as plain dicts."""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibBackend:
+    name = "json"
+
+    def dumps(self, obj, pretty=False):
+        if pretty:
+            text = json.dumps(obj, ensure_ascii=False, indent=2, default=_default)
+        else:
+            text = json.dumps(
+                obj, ensure_ascii=False, separators=(",", ":"), default=_default
+            )
+        return text.encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    name = "orjson"
+
+    def dumps(self, obj, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class MsgspecBackend:
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder(enc_hook=_default)
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj, pretty=False):
+        data = self._encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    def loads(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return self._decoder.decode(data)
+
+
+def get_backend(name=None):
+    """Backend by name ("orjson", "msgspec", "json") or the fastest installed."""
+    available = {"json": StdlibBackend}
+    if msgspec is not None:
+        available["msgspec"] = MsgspecBackend
+    if orjson is not None:
+        available["orjson"] = OrjsonBackend
+    if name is None:
+        name = next(n for n in ("orjson", "msgspec", "json") if n in available)
+    if name not in available:
+        raise ValueError(f"JSON backend not available: {name}")
+    return available[name]()
+
+
+BACKEND = get_backend(os.environ.get("PROTEXT_JSON_BACKEND") or None)
+
+
+def dumps(obj, pretty=False):
+    """Serialize to UTF-8 JSON bytes (compact unless ``pretty``)."""
+    return BACKEND.dumps(obj, pretty)
+
+
+def loads(data):
+    """Parse JSON from bytes or str (decode errors are ValueError)."""
+    return BACKEND.loads(data)
+
+
+def compression_of(path):
+    """"gzip", "zstd" or None, from the file name."""
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1])
+
+
+def dataset_stem(path):
+    """Path without compression and JSON suffixes (for files kept next to it)."""
+    if compression_of(path):
+        path = os.path.splitext(path)[0]
+    root, ext = os.path.splitext(path)
+    return root if ext in DATASET_SUFFIXES else path
+
+
+def open_binary(path, mode="rb", compression=None):
+    """Open a file for binary I/O, compressed as named by ``path``."""
+    compression = compression or compression_of(path)
+    if compression == "gzip":
+        # Fast level - output files are rewritten on every save
+        return gzip.open(path, mode, compresslevel=3)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd output needs the zstandard package")
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+def open_text(path, mode="r"):
+    """Open a (possibly compressed) file as UTF-8 text."""
+    if compression_of(path) is None:
+        return open(path, mode, encoding="utf-8")
+    return io.TextIOWrapper(open_binary(path, mode + "b"), encoding="utf-8")
+
+
+def load_file(path):
+    """Parse a whole (possibly compressed) JSON file."""
+    with open_binary(path, "rb") as f:
+        return loads(f.read())
+
+
+def _atomic_write(path, write):
+    tmp_path = path + ".tmp"
+    with open_binary(tmp_path, "wb", compression_of(path)) as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def dump_file(obj, path, pretty=False):
+    """Write one JSON document atomically."""
+    _atomic_write(path, lambda f: f.write(dumps(obj, pretty)))
+
+
+def dump_articles(articles, path):
+    """Write articles as a JSON array, one compact record per line, atomically."""
+
+    def write(f):
+        f.write(b"[")
+        for position, article in enumerate(articles):
+            f.write(b",\n" if position else b"\n")
+            f.write(dumps(article))
+        f.write(b"\n]\n")
+
+    _atomic_write(path, write)
+
+
+def export_pretty(path, output_path=None):
+    """Write an indented, uncompressed copy of a dataset, return its path."""
+    output_path = output_path or dataset_stem(path) + ".pretty.json"
+    dump_file(load_file(path), output_path, pretty=True)
+    return output_path
@@ -0,0 +1,218 @@
+"""
+Live scan status with rolling rates and an ETA.
+A background thread samples the metrics registry once per interval and keeps
+a short window of samples; rates and the ETA come from that window, so they
+follow the current throughput rather than the run average. The status is
+rewritten to a small JSON file and, on a terminal, shown as one updating line.
+Workers are never touched - everything is derived from the metrics.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+DEFAULT_STATUS_INTERVAL = 1.0  # seconds
+DEFAULT_STATUS_WINDOW = 60  # seconds of samples used for rates
+
+THROTTLE_STATUSES = ("429", "403")
+
+
+def _totals(snapshot):
+    """Cumulative counts the status is computed from."""
+    totals = {
+        "requests": 0,
+        "errors": 0,
+        "throttled": 0,
+        "unavailable": 0,
+        "processed": 0,
+        "found": 0,
+        "bytes": 0,
+    }
+    for labels, value in snapshot.get("protext_requests_total", {}).get("values", []):
+        status = str(labels.get("status"))
+        totals["requests"] += value
+        if status == "error" or (status.isdigit() and int(status) >= 400):
+            if status != "404":  # a missing ID is a normal answer
+                totals["errors"] += value
+        if status in THROTTLE_STATUSES:
+            totals["throttled"] += value
+        elif status == "503":
+            totals["unavailable"] += value
+    for labels, value in snapshot.get("protext_ids_total", {}).get("values", []):
+        totals["processed"] += value
+        if labels.get("result") == "found":
+            totals["found"] += value
+    for _, value in snapshot.get("protext_bytes_downloaded_total", {}).get(
+        "values", []
+    ):
+        totals["bytes"] += value
+    return totals
+
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days}d{hours:02d}h"
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m{seconds:02d}s"
+
+
+class StatusMonitor:
+    """Sample metrics periodically and publish a rolling status.
+
+    ``collect`` returns a metrics snapshot (see metrics.py). The live line is
+    shown by default only when stderr is a terminal.
+    """
+
+    def __init__(
+        self,
+        collect,
+        total_ids,
+        status_path=None,
+        live=None,
+        interval=DEFAULT_STATUS_INTERVAL,
+        window=DEFAULT_STATUS_WINDOW,
+    ):
+        self.collect = collect
+        self.total_ids = total_ids
+        self.status_path = status_path
+        self.live = sys.stderr.isatty() if live is None else live
+        self.interval = interval
+        self._samples = deque(maxlen=max(2, int(window / interval) + 1))
+        self._baseline = None
+        self._started = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        """Take one sample and return the current status dict."""
+        now = time.monotonic()
+        totals = _totals(self.collect())
+        if self._baseline is None:
+            self._baseline = totals
+            self._started = now
+        # Metrics are process-wide - count only this run
+        totals = {key: totals[key] - self._baseline[key] for key in totals}
+        self._samples.append((now, totals))
+        return self.status()
+
+    def status(self):
+        now, current = self._samples[-1]
+        first_time, first = self._samples[0]
+        elapsed = now - first_time
+        delta = {key: current[key] - first[key] for key in current}
+
+        def rate(key):
+            return delta[key] / elapsed if elapsed > 0 else 0.0
+
+        ids_per_second = rate("processed")
+        remaining = max(0, self.total_ids - current["processed"])
+        eta_seconds = remaining / ids_per_second if ids_per_second > 0 else None
+
+        if delta["throttled"]:
+            throttle_state = "throttled"
+        elif delta["unavailable"]:
+            throttle_state = "degraded"
+        else:
+            throttle_state = "ok"
+
+        return {
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "elapsed_seconds": round(now - self._started, 1),
+            "total_ids": self.total_ids,
+            "processed": current["processed"],
+            "found": current["found"],
+            "progress": (
+                round(current["processed"] / self.total_ids, 4)
+                if self.total_ids
+                else None
+            ),
+            "requests_per_second": round(rate("requests"), 2),
+            "ids_per_second": round(ids_per_second, 2),
+            "articles_per_second": round(rate("found"), 2),
+            "hit_rate": (
+                round(delta["found"] / delta["processed"], 3)
+                if delta["processed"]
+                else None
+            ),
+            "error_rate": (
+                round(delta["errors"] / delta["requests"], 3)
+                if delta["requests"]
+                else None
+            ),
+            "throttle_state": throttle_state,
+            "throttled_responses": delta["throttled"],
+            "unavailable_responses": delta["unavailable"],
+            "bytes_per_second": round(rate("bytes")),
+            "eta_seconds": round(eta_seconds) if eta_seconds is not None else None,
+            "eta": (
+                (datetime.now() + timedelta(seconds=eta_seconds)).isoformat(
+                    timespec="seconds"
+                )
+                if eta_seconds is not None
+                else None
+            ),
+            "window_seconds": round(elapsed, 1),
+        }
+
+    def format_line(self, status):
+        """One-line summary for the terminal."""
+        progress = status["progress"] or 0.0
+        parts = [
+            f"[{progress * 100:5.1f}%] {status['processed']}/{status['total_ids']} IDs",
+            f"{status['requests_per_second']:.1f} req/s",
+            f"{status['articles_per_second']:.1f} art/s",
+        ]
+        if status["hit_rate"] is not None:
+            parts.append(f"hit {status['hit_rate'] * 100:.0f}%")
+        if status["error_rate"] is not None:
+            parts.append(f"err {status['error_rate'] * 100:.1f}%")
+        parts.append(status["throttle_state"])
+        parts.append(f"{status['bytes_per_second'] / 1024:.0f} KB/s")
+        eta = status["eta_seconds"]
+        parts.append(f"ETA {_format_duration(eta) if eta is not None else '?'}")
+        return " | ".join(parts)
+
+    def publish(self, status):
+        if self.status_path:
+            tmp_path = self.status_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(status, f, indent=2)
+            os.replace(tmp_path, self.status_path)
+        if self.live:
+            sys.stderr.write("\r\033[K" + self.format_line(status))
+            sys.stderr.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.publish(self.sample())
+            except OSError as e:
+                print(f"Error writing status: {e}")
+
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling; the status file and line get a final update."""
+        self._stop_event.set()
+        if self._thread is None:
+            return
+        self._thread.join()
+        try:
+            self.publish(self.sample())
+        except OSError as e:
+            print(f"Error writing status: {e}")
+        if self.live:
+            sys.stderr.write("\n")
@@ -0,0 +1,206 @@
+"""
+Structured (JSON lines) logging fed through a queue.
+Hot paths only enqueue records (QueueHandler); formatting and terminal/file
+I/O happen in one background QueueListener thread. Per-ID events are logged
+at DEBUG and cost a single level check when disabled; at INFO a
+ProgressReporter writes one aggregated progress line per interval, so log
+volume does not grow with the request rate.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+LOGGER_NAME = "protext"
+DEFAULT_PROGRESS_INTERVAL = 10  # seconds
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# Sink handlers of the running listener (reused for worker process queues)
+_sink_handlers = []
+_listener = None
+
+
+def log_event(level, event, **fields):
+    """Log an event with structured fields (skipped cheaply when disabled)."""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event and fields."""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        data.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable console line: event followed by key=value fields."""
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        parts = [record.getMessage()]
+        parts.extend(f"{key}={value}" for key, value in fields.items())
+        return " ".join(parts)
+
+
+def configure_logging(level="INFO", path=None, console=True, console_format="text"):
+    """Route the protext logger through a queue to console and/or a JSONL file.
+
+    Calling again replaces the previous configuration.
+    """
+    global _listener
+    stop_logging()
+
+    level = logging.getLevelName(level) if isinstance(level, str) else level
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(
+            JsonFormatter() if console_format == "json" else TextFormatter()
+        )
+        handlers.append(console_handler)
+    if path:
+        file_handler = logging.FileHandler(path, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    for handler in handlers:
+        handler.setLevel(level)
+
+    log_queue = queue.SimpleQueue()
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _sink_handlers[:] = handlers
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and close the sinks."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for handler in _sink_handlers:
+            handler.close()
+
+
+atexit.register(stop_logging)
+
+
+def process_log_queue(context):
+    """Queue for worker processes, drained into the configured sinks.
+
+    Returns (queue, listener), or (None, None) when logging is not configured.
+    """
+    if _listener is None:
+        return None, None
+    log_queue = context.Queue()
+    listener = logging.handlers.QueueListener(
+        log_queue, *_sink_handlers, respect_handler_level=True
+    )
+    listener.start()
+    return log_queue, listener
+
+
+def attach_queue(log_queue, level):
+    """In a worker process: send protext log records to the parent's queue."""
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+class ProgressReporter:
+    """Background thread logging aggregated scan progress at INFO level.
+
+    ``collect`` returns a metrics snapshot (see metrics.py).
+    """
+
+    def __init__(self, collect, total_ids=None, interval=DEFAULT_PROGRESS_INTERVAL):
+        self.collect = collect
+        self.total_ids = total_ids
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._baseline = {}
+        self._last = None
+
+    def _counts(self):
+        snapshot = self.collect()
+        counts = {"retries": 0}
+        for labels, value in snapshot.get("protext_ids_total", {}).get("values", []):
+            counts[labels.get("result")] = value
+        for _, value in snapshot.get("protext_retries_total", {}).get("values", []):
+            counts["retries"] += value
+        return counts
+
+    def report(self):
+        # Metrics are process-wide - report only what happened since start()
+        counts = self._counts()
+        fields = {
+            key: counts.get(key, 0) - self._baseline.get(key, 0)
+            for key in (
+                "found",
+                "missing",
+                "filtered",
+                "duplicate",
+                "deferred",
+                "retries",
+            )
+        }
+        processed = sum(fields.values()) - fields["retries"]
+
+        now = time.monotonic()
+        last_time, last_processed = self._last
+        elapsed = now - last_time
+        rate = (processed - last_processed) / elapsed if elapsed > 0 else 0
+        self._last = (now, processed)
+
+        fields = dict(processed=processed, **fields)
+        fields["ids_per_second"] = round(rate, 1)
+        if self.total_ids:
+            fields["total"] = self.total_ids
+        log_event(logging.INFO, "progress", **fields)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.report()
+
+    def start(self):
+        if logger.isEnabledFor(logging.INFO):
+            self._baseline = self._counts()
+            self._last = (time.monotonic(), 0)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop reporting after one final progress line."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.report()
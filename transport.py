@@ -0,0 +1,468 @@
+"""
+HTTP transports used by make_request_with_retry.
+A transport only has to provide ``get(url, headers, timeout, stream)``
+returning a requests-like response (status_code, headers, content, text,
+iter_content, close, raise_for_status). The retry, backoff and rate limiting
+logic stays in scraper.py, so it behaves the same over the live site, a
+recorded cache or the local mock server (mock_server.py).
+"""
+
+import hashlib
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from metrics import HEDGED_REQUESTS
+
+# Optional dependency, imported by AsyncTransport on first use (as is
+# asyncio, to keep startup fast for the blocking transports)
+aiohttp = None
+
+TOR_PROXIES = {
+    "http": "socks5://127.0.0.1:9050",
+    "https": "socks5://127.0.0.1:9050",
+}
+
+DEFAULT_HEDGE_QUANTILE = 0.95
+DEFAULT_HEDGE_BUDGET = 0.05  # hedges per request at most
+DEFAULT_HEDGE_CALLERS = 10  # caller threads until set_max_workers is called
+HEDGE_STATS_WINDOW = 100000  # latencies kept for the p99 report
+
+
+def tor_proxies(isolation=None):
+    """Tor proxy settings; different ``isolation`` tokens use different circuits.
+
+    Tor keeps streams with different SOCKS credentials on separate circuits
+    (IsolateSOCKSAuth, on by default), so the token is sent as the username.
+    """
+    if isolation is None:
+        return dict(TOR_PROXIES)
+    return {
+        scheme: url.replace("://", f"://{isolation}:protext@", 1)
+        for scheme, url in TOR_PROXIES.items()
+    }
+
+
+class StaticResponse:
+    """Fully read response with the subset of the requests.Response API we use."""
+
+    def __init__(self, url, status_code, headers, content, elapsed=0.0):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.elapsed = elapsed
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def iter_content(self, chunk_size=8192):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+
+class Transport:
+    """Base class of transports."""
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        raise NotImplementedError
+
+    def isolated(self, isolation):
+        """Equivalent transport over another network path (Tor circuit).
+
+        Transports without such a notion return themselves.
+        """
+        return self
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """requests-based transport with one keep-alive session per thread.
+
+    Transports with different ``isolation`` tokens go through different Tor
+    circuits.
+    """
+
+    def __init__(self, use_tor=True, isolation=None):
+        self.use_tor = use_tor
+        self.isolation = isolation
+        self._local = threading.local()
+
+    def isolated(self, isolation):
+        return RequestsTransport(self.use_tor, isolation)
+
+    def session(self):
+        """HTTP session of the calling thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            if self.use_tor:
+                session.proxies = tor_proxies(self.isolation)
+            self._local.session = session
+        return session
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        return self.session().get(
+            url, headers=headers, timeout=timeout, allow_redirects=True, stream=stream
+        )
+
+
+def _cache_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class CacheOnlyTransport(Transport):
+    """Serve responses recorded by RecordingTransport, never touch the network.
+
+    URLs missing from the cache get a 404 response.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _paths(self, url):
+        key = _cache_key(url)
+        return (
+            os.path.join(self.cache_dir, key + ".json"),
+            os.path.join(self.cache_dir, key + ".body"),
+        )
+
+    def load(self, url):
+        """Recorded (metadata, body) of a URL, or None if it is not cached."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        return meta, body
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        cached = self.load(url)
+        if cached is None:
+            return StaticResponse(url, 404, {}, b"")
+        meta, body = cached
+        return StaticResponse(
+            url, meta["status_code"], meta["headers"], body, meta.get("elapsed", 0.0)
+        )
+
+
+class ReplayTransport(CacheOnlyTransport):
+    """Replay recorded responses including their original response times."""
+
+    def __init__(self, cache_dir, speed=1.0):
+        super().__init__(cache_dir)
+        self.speed = speed
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        response = super().get(url, headers, timeout, stream)
+        if response.elapsed and self.speed > 0:
+            time.sleep(response.elapsed / self.speed)
+        return response
+
+
+class RecordingTransport(Transport):
+    """Pass requests through another transport and record every response."""
+
+    def __init__(self, cache_dir, inner=None):
+        self.cache_dir = cache_dir
+        self.inner = inner or RequestsTransport()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def isolated(self, isolation):
+        inner = self.inner
+        if isinstance(inner, Transport):
+            inner = inner.isolated(isolation)
+        return RecordingTransport(self.cache_dir, inner)
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        started = time.monotonic()
+        response = self.inner.get(url, headers=headers, timeout=timeout, stream=False)
+        body = response.content
+        elapsed = time.monotonic() - started
+
+        key = _cache_key(url)
+        meta = {
+            "url": url,
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "elapsed": elapsed,
+        }
+        with open(os.path.join(self.cache_dir, key + ".body"), "wb") as f:
+            f.write(body)
+        # Metadata last - a cache entry only counts once it exists
+        meta_path = os.path.join(self.cache_dir, key + ".json")
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        return StaticResponse(url, response.status_code, meta["headers"], body, elapsed)
+
+    def close(self):
+        self.inner.close()
+
+
+def _percentiles(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class HedgedTransport(Transport):
+    """Send a duplicate request when the first one is slower than usual.
+
+    A request still running after the ``quantile`` of recent latencies gets a
+    hedge on ``hedge`` (for Tor: a transport with another isolation token,
+    i.e. another circuit). The first response wins; the other one is
+    cancelled if it has not started yet, or closed as soon as it arrives. At
+    most ``budget`` hedges per request are sent, and none until
+    ``min_samples`` latencies have been observed. Hedges bypass the rate
+    limiter, the budget is what bounds the extra load.
+
+    Primaries and hedges run in a pool of two threads per caller thread, so a
+    hedge never queues behind other callers' requests; callers announce their
+    concurrency with set_max_workers.
+    """
+
+    def __init__(
+        self,
+        primary,
+        hedge,
+        quantile=DEFAULT_HEDGE_QUANTILE,
+        budget=DEFAULT_HEDGE_BUDGET,
+        min_samples=20,
+        window=500,
+        min_delay=0.05,
+        max_workers=DEFAULT_HEDGE_CALLERS,
+    ):
+        self.primary = primary
+        self.hedge = hedge
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self.max_workers = 0
+        self._executor = None
+        self.set_max_workers(max_workers)
+        self._recent = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Primary latency is what a request would have taken without hedging
+        self.primary_latencies = deque(maxlen=HEDGE_STATS_WINDOW)
+        self.latencies = deque(maxlen=HEDGE_STATS_WINDOW)
+
+    def set_max_workers(self, max_workers):
+        """Grow the pool to two threads (primary + hedge) per caller thread."""
+        with self._lock:
+            if max_workers <= self.max_workers:
+                return
+            previous = self._executor
+            self._executor = ThreadPoolExecutor(
+                2 * max_workers, thread_name_prefix="hedge"
+            )
+            self.max_workers = max_workers
+        if previous is not None:
+            # Requests already running there finish, idle threads exit
+            previous.shutdown(wait=False)
+
+    def _submit(self, transport, url, headers, timeout, stream):
+        with self._lock:
+            return self._executor.submit(
+                transport.get, url, headers=headers, timeout=timeout, stream=stream
+            )
+
+    def hedge_delay(self):
+        """Current hedging threshold in seconds, or None while warming up."""
+        with self._lock:
+            if len(self._recent) < self.min_samples:
+                return None
+            recent = sorted(self._recent)
+        index = min(len(recent) - 1, int(self.quantile * len(recent)))
+        return max(self.min_delay, recent[index])
+
+    def _take_budget(self):
+        with self._lock:
+            if self.hedges >= self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def _record_primary(self, started, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        latency = time.monotonic() - started
+        with self._lock:
+            self._recent.append(latency)
+            self.primary_latencies.append(latency)
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        started = time.monotonic()
+        with self._lock:
+            self.requests += 1
+        delay = self.hedge_delay()
+        primary = self._submit(self.primary, url, headers, timeout, stream)
+        primary.add_done_callback(lambda f: self._record_primary(started, f))
+        pending = {primary}
+        hedged = False
+
+        if delay is not None:
+            done, _ = wait(pending, timeout=delay)
+            if not done and self._take_budget():
+                hedge = self._submit(self.hedge, url, headers, timeout, stream)
+                pending.add(hedge)
+                hedged = True
+
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner is None:
+                first_error = first_error or next(iter(done)).exception()
+                continue
+            for loser in (done | pending) - {winner}:
+                if not loser.cancel():
+                    loser.add_done_callback(_close_response)
+            with self._lock:
+                self.latencies.append(time.monotonic() - started)
+                if primary is not winner:
+                    self.hedge_wins += 1
+            if hedged:
+                HEDGED_REQUESTS.inc(outcome="lost" if primary is winner else "won")
+            return winner.result()
+        raise first_error
+
+    def report(self):
+        """Hedging statistics: extra requests and latency with/without hedging."""
+        with self._lock:
+            primary = list(self.primary_latencies)
+            effective = list(self.latencies)
+            requests, hedges, wins = self.requests, self.hedges, self.hedge_wins
+        return {
+            "requests": requests,
+            "hedges": hedges,
+            "extra_request_ratio": round(hedges / requests, 4) if requests else 0.0,
+            "hedge_wins": wins,
+            "latency_without_hedging": {
+                key: round(value, 3) for key, value in _percentiles(primary).items()
+            },
+            "latency_with_hedging": {
+                key: round(value, 3) for key, value in _percentiles(effective).items()
+            },
+        }
+
+    def print_summary(self):
+        report = self.report()
+        if not report["requests"]:
+            return
+        before = report["latency_without_hedging"]["p99"]
+        after = report["latency_with_hedging"]["p99"]
+        print(
+            f"Hedging: {report['hedges']} extra requests "
+            f"({report['extra_request_ratio'] * 100:.1f}% of {report['requests']}), "
+            f"{report['hedge_wins']} won by the hedge; "
+            f"p99 latency {before:.2f} s -> {after:.2f} s"
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.primary.close()
+        if self.hedge is not self.primary:
+            self.hedge.close()
+
+
+class AsyncTransport(Transport):
+    """aiohttp client on a background event loop, shared by all caller threads.
+
+    Many concurrent requests are multiplexed over one connection pool instead
+    of one blocking socket per thread. Requires the optional ``aiohttp``
+    package; SOCKS (Tor) proxies are not supported, only plain HTTP proxies.
+    """
+
+    def __init__(self, limit=100, proxy=None):
+        global aiohttp
+        if aiohttp is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise RuntimeError(
+                    "AsyncTransport requires the aiohttp package"
+                ) from None
+        import asyncio
+
+        self.limit = limit
+        self.proxy = proxy
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._session = asyncio.run_coroutine_threadsafe(
+            self._open_session(), self._loop
+        ).result()
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit=self.limit)
+        return aiohttp.ClientSession(connector=connector)
+
+    async def _get(self, url, headers, timeout):
+        started = time.monotonic()
+        async with self._session.get(
+            url,
+            headers=headers,
+            proxy=self.proxy,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            body = await response.read()
+            return StaticResponse(
+                str(response.url),
+                response.status,
+                dict(response.headers),
+                body,
+                time.monotonic() - started,
+            )
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        import asyncio
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._get(url, headers, timeout), self._loop
+        )
+        try:
+            return future.result()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Surface as requests errors so the retry logic handles them
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def close(self):
+        import asyncio
+
+        asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()